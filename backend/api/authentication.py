@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+
+def get_cache_key(key: str):
+    return f'auth:token:{key}'
+
+
+def invalidate(*keys):
+    cache.delete_many([get_cache_key(key) for key in keys])
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    TokenAuthentication с кешем пользователя по ключу токена.
+
+    Вместо запроса к базе на каждый запрос пользователь берется из
+    общего кеша. Записи сбрасываются сигналами при сохранении
+    пользователя и удалении токена (api.signals); срок жизни
+    AUTH_TOKEN_CACHE_TIMEOUT ограничивает устаревание при изменениях
+    в обход сигналов.
+    """
+
+    def authenticate_credentials(self, key):
+        user = cache.get(get_cache_key(key))
+        if user is not None:
+            return user, Token(key=key, user=user)
+
+        user, token = super().authenticate_credentials(key)
+        cache.set(
+            get_cache_key(key), user, settings.AUTH_TOKEN_CACHE_TIMEOUT
+        )
+        return user, token
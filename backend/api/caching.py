@@ -0,0 +1,88 @@
+"""
+Кеширование ответов, которые редко меняются и часто запрашиваются.
+
+Кеш общий для всех воркеров (utils.mmap_cache), записи сбрасываются
+сигналами из api.signals.
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.shortcuts import get_object_or_404
+
+from recipes.models import Recipe
+
+
+# ===========================================================
+#                       Короткие ссылки
+# ===========================================================
+
+
+def get_short_link_key(code: str):
+    return f'short_link:{code}'
+
+
+def get_recipe_id(code: str):
+    """id рецепта по короткому коду или 404"""
+    recipe_id = cache.get(get_short_link_key(code))
+    if recipe_id is None:
+        recipe_id = get_object_or_404(
+            Recipe.objects.only('pk'), short_code=code
+        ).pk
+        cache.set(
+            get_short_link_key(code), recipe_id,
+            settings.SHORT_LINK_CACHE_TIMEOUT
+        )
+    return recipe_id
+
+
+def invalidate_short_link(code: str):
+    cache.delete(get_short_link_key(code))
+
+
+# ===========================================================
+#                       Поиск ингредиентов
+# ===========================================================
+
+
+INGREDIENTS_VERSION_KEY = 'ingredients:version'
+
+
+def get_ingredients_version():
+    """
+    Версия справочника в ключах поиска.
+
+    Изменение справочника меняет версию, и все прежние результаты
+    поиска перестают находиться, не требуя удаления по одному.
+    """
+    version = cache.get(INGREDIENTS_VERSION_KEY)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(INGREDIENTS_VERSION_KEY, version, None):
+            version = cache.get(INGREDIENTS_VERSION_KEY, version)
+    return version
+
+
+def get_ingredients_search_key(name: str):
+    digest = hashlib.md5(name.lower().encode()).hexdigest()
+    return f'ingredients:{get_ingredients_version()}:{digest}'
+
+
+def get_ingredients_search(name: str, search):
+    """
+    Результат search() для префикса name из кеша.
+
+    Длинные списки (короткие префиксы) в слот кеша не помещаются и
+    каждый раз читаются из базы.
+    """
+    key = get_ingredients_search_key(name)
+    data = cache.get(key)
+    if data is None:
+        data = search()
+        cache.set(key, data, settings.INGREDIENTS_SEARCH_CACHE_TIMEOUT)
+    return data
+
+
+def invalidate_ingredients():
+    cache.set(INGREDIENTS_VERSION_KEY, time.time_ns(), None)
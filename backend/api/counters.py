@@ -0,0 +1,47 @@
+"""
+Счетчики для бейджей текущего пользователя.
+
+Значения считаются одним запросом по индексам и кешируются на
+пользователя; сигналы сбрасывают кеш при изменении связей.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+
+from recipes.models import Favorites, Recipe, ShoppingCart
+from users.models import Follower
+from utils.queries import count_subquery
+
+
+User = get_user_model()
+
+COUNTERS = {
+    'shopping_cart': (ShoppingCart.objects, 'user'),
+    'favorites': (Favorites.objects, 'user'),
+    'subscriptions': (Follower.objects, 'subscriber'),
+    'recipes': (Recipe.objects, 'author'),
+}
+
+
+def get_cache_key(user_id: int):
+    return f'counters:{user_id}'
+
+
+def get_counters(user):
+    counters = cache.get(get_cache_key(user.pk))
+    if counters is None:
+        # Имена аннотаций не должны совпадать с обратными связями модели
+        row = User.objects.filter(pk=user.pk).values(**{
+            f'{name}_count': count_subquery(queryset, field_name)
+            for name, (queryset, field_name) in COUNTERS.items()
+        }).get()
+        counters = {name: row[f'{name}_count'] for name in COUNTERS}
+        cache.set(
+            get_cache_key(user.pk), counters,
+            settings.COUNTERS_CACHE_TIMEOUT
+        )
+    return counters
+
+
+def invalidate(*user_ids):
+    cache.delete_many([get_cache_key(user_id) for user_id in user_ids])
@@ -0,0 +1,209 @@
+"""
+Быстрое построение ответов для списков без ModelSerializer.
+
+Ответы собираются напрямую из строк .values() и совпадают побайтно
+с выводом RecipeSerializer, FollowSerializer и ShortRecipeSerializer.
+Включается настройкой FAST_READ_SERIALIZERS.
+"""
+from collections import defaultdict
+from operator import itemgetter
+
+from django.core.files.storage import default_storage
+from django.db.models import BooleanField, Exists, OuterRef, QuerySet, Value
+from django.utils.encoding import filepath_to_uri
+
+from recipes.models import Favorites, Recipe, ShoppingCart
+from users.models import Follower
+from utils.export import get_ingredients_map
+from utils.queries import limit_per_group
+
+
+SHORT_RECIPE_FIELDS = ('id', 'name', 'image', 'cooking_time')
+
+USER_FIELDS = (
+    'email', 'id', 'username', 'first_name',
+    'last_name', 'is_subscribed', 'avatar'
+)
+
+RECIPE_AUTHOR_FIELDS = tuple(
+    f'author__{field}' for field in USER_FIELDS if field != 'is_subscribed'
+)
+
+
+class MediaURL:
+    """
+    Построение URL файлов по заранее вычисленному префиксу.
+
+    Повторяет ImageField.to_representation: абсолютный URL при наличии
+    запроса и относительный без него.
+    """
+
+    def __init__(self, request=None):
+        self.prefix = default_storage.base_url
+        if request is not None:
+            self.prefix = request.build_absolute_uri(self.prefix)
+
+    def __call__(self, name):
+        if not name:
+            return None
+        return self.prefix + filepath_to_uri(name).lstrip('/')
+
+
+def user_exists(
+    queryset: QuerySet, user, user_field: str,
+    outer_field: str, outer_ref: str = 'pk'
+):
+    """Признак наличия связи с текущим пользователем для каждой строки"""
+    if not user.is_authenticated:
+        return Value(False, output_field=BooleanField())
+    return Exists(
+        queryset.filter(
+            **{user_field: user},
+            **{outer_field: OuterRef(outer_ref)}
+        )
+    )
+
+
+# ===========================================================
+#                       Recipes
+# ===========================================================
+
+
+RECIPE_FIELDS = (
+    'id', 'author', 'ingredients',
+    'is_favorited', 'is_in_shopping_cart',
+    'name', 'image', 'text', 'cooking_time'
+)
+
+
+def recipe_rows(queryset: QuerySet, user, fields: tuple = RECIPE_FIELDS):
+    """
+    Строки рецептов с полями RecipeSerializer из fields.
+
+    Для неучтенных полей не выбираются колонки, не строится JOIN
+    с автором и не добавляются подзапросы EXISTS.
+    """
+    columns = ['id'] + [
+        field for field in ('name', 'image', 'text', 'cooking_time')
+        if field in fields
+    ]
+    annotations = {}
+    if 'author' in fields:
+        columns.extend(RECIPE_AUTHOR_FIELDS)
+        annotations['author_is_subscribed'] = user_exists(
+            Follower.objects, user, 'subscriber', 'subscribed', 'author'
+        )
+    if 'is_favorited' in fields:
+        annotations['is_favorited'] = user_exists(
+            Favorites.objects, user, 'user', 'recipe'
+        )
+    if 'is_in_shopping_cart' in fields:
+        annotations['is_in_shopping_cart'] = user_exists(
+            ShoppingCart.objects, user, 'user', 'recipe'
+        )
+    return queryset.prefetch_related(None).values(
+        *columns
+    ).annotate(**annotations)
+
+
+def recipes_data(rows: list, request, fields: tuple = RECIPE_FIELDS):
+    """Аналог RecipeSerializer(rows, many=True).data для полей fields"""
+    media_url = MediaURL(request)
+    ingredients_map = {}
+    if 'ingredients' in fields:
+        ingredients_map = get_ingredients_map([row['id'] for row in rows])
+
+    values = {
+        'author': lambda row: {
+            'email': row['author__email'],
+            'id': row['author__id'],
+            'username': row['author__username'],
+            'first_name': row['author__first_name'],
+            'last_name': row['author__last_name'],
+            'is_subscribed': row['author_is_subscribed'],
+            'avatar': media_url(row['author__avatar'])
+        },
+        'ingredients': lambda row: ingredients_map.get(row['id'], []),
+        'image': lambda row: media_url(row['image']),
+    }
+    getters = [
+        (field, values.get(field, itemgetter(field))) for field in fields
+    ]
+
+    return [
+        {field: getter(row) for field, getter in getters}
+        for row in rows
+    ]
+
+
+def short_recipe_data(recipe, media_url: MediaURL):
+    """Аналог ShortRecipeSerializer для строки или объекта рецепта"""
+    if isinstance(recipe, Recipe):
+        recipe = {
+            'id': recipe.id,
+            'name': recipe.name,
+            'image': recipe.image.name,
+            'cooking_time': recipe.cooking_time
+        }
+    return {
+        'id': recipe['id'],
+        'name': recipe['name'],
+        'image': media_url(recipe['image']),
+        'cooking_time': recipe['cooking_time']
+    }
+
+
+# ===========================================================
+#                       Users
+# ===========================================================
+
+
+FOLLOW_FIELDS = USER_FIELDS + ('recipes', 'recipes_count')
+
+
+def follow_rows(queryset: QuerySet, fields: tuple = FOLLOW_FIELDS):
+    """
+    Строки пользователей с полями FollowSerializer из fields.
+
+    is_subscribed и recipes_count должны быть аннотированы в queryset.
+    """
+    return queryset.prefetch_related(None).values('id', *(
+        field for field in fields
+        if field != 'recipes' and field != 'id'
+    ))
+
+
+def follows_data(rows: list, request, fields: tuple = FOLLOW_FIELDS):
+    """Аналог FollowSerializer(rows, many=True).data для полей fields"""
+    media_url = MediaURL(request)
+    recipes_map = defaultdict(list)
+
+    if 'recipes' in fields:
+        recipes = Recipe.objects.filter(
+            author_id__in=[row['id'] for row in rows]
+        )
+        recipes_limit = request.query_params.get('recipes_limit')
+        if recipes_limit:
+            recipes = limit_per_group(
+                recipes, 'author_id', int(recipes_limit)
+            )
+        recipes = recipes.order_by('pk').values(
+            'author_id', *SHORT_RECIPE_FIELDS
+        )
+        for recipe in recipes:
+            recipes_map[recipe['author_id']].append(
+                short_recipe_data(recipe, media_url)
+            )
+
+    values = {
+        'avatar': lambda row: media_url(row['avatar']),
+        'recipes': lambda row: recipes_map[row['id']],
+    }
+    getters = [
+        (field, values.get(field, itemgetter(field))) for field in fields
+    ]
+
+    return [
+        {field: getter(row) for field, getter in getters}
+        for row in rows
+    ]
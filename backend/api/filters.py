@@ -1,7 +1,23 @@
+from django.db.models import Exists, OuterRef
 from django_filters.rest_framework import filters, FilterSet
+from rest_framework.exceptions import ValidationError
 
 from ingredients.models import Ingredient
-from recipes.models import Recipe
+from recipes.models import Favorites, Recipe, RecipeIngredient, ShoppingCart
+
+
+MAX_FILTER_VALUES = 20
+
+
+class NumberInFilter(filters.BaseInFilter, filters.NumberFilter):
+    """Список чисел через запятую: ?author=1,2,3"""
+
+
+def check_values_count(values: list):
+    if len(values) > MAX_FILTER_VALUES:
+        raise ValidationError(
+            {'detail': f'Не больше {MAX_FILTER_VALUES} значений в фильтре'}
+        )
 
 
 # ===========================================================
@@ -27,28 +43,80 @@ class IngredientFilter(FilterSet):
 
 
 class RecipeFilter(FilterSet):
-    """Фильтры для модели Recipe"""
+    """
+    Фильтры для модели Recipe.
 
-    author = filters.NumberFilter(field_name='author__id')
+    Фильтры по связанным таблицам строятся через EXISTS, а не через
+    JOIN: строки рецептов не размножаются, DISTINCT не нужен, а
+    COUNT для пагинации остается простым.
+    """
+
+    author = NumberInFilter(method='filter_author')
     is_favorited = filters.BooleanFilter(
         method='filter_is_favorited'
     )
     is_in_shopping_cart = filters.BooleanFilter(
         method='filter_is_in_shopping_cart'
     )
+    ingredients = NumberInFilter(
+        method='filter_ingredients'
+    )
+    exclude_ingredients = NumberInFilter(
+        method='filter_exclude_ingredients'
+    )
+    cooking_time = filters.RangeFilter()
+    ordering = filters.ChoiceFilter(
+        choices=(('trending', 'Популярные'),),
+        method='filter_ordering'
+    )
 
     class Meta:
         model = Recipe
         fields = ('author', )
 
+    def filter_author(self, queryset, name, value):
+        check_values_count(value)
+        return queryset.filter(author_id__in=value)
+
     def filter_is_favorited(self, queryset, name, value):
         user = self.request.user
         if value and user.is_authenticated:
-            return queryset.filter(favorites__user=user)
+            return queryset.filter(Exists(
+                Favorites.objects.filter(user=user, recipe=OuterRef('pk'))
+            ))
         return queryset
 
     def filter_is_in_shopping_cart(self, queryset, name, value):
         user = self.request.user
         if value and user.is_authenticated:
-            return queryset.filter(shopping_cart__user=user)
+            return queryset.filter(Exists(
+                ShoppingCart.objects.filter(user=user, recipe=OuterRef('pk'))
+            ))
         return queryset
+
+    def filter_ingredients(self, queryset, name, value):
+        # Рецепт должен содержать все перечисленные ингредиенты
+        check_values_count(value)
+        for ingredient_id in set(value):
+            queryset = queryset.filter(Exists(
+                RecipeIngredient.objects.filter(
+                    recipe=OuterRef('pk'), ingredient_id=ingredient_id
+                )
+            ))
+        return queryset
+
+    def filter_exclude_ingredients(self, queryset, name, value):
+        check_values_count(value)
+        return queryset.filter(~Exists(
+            RecipeIngredient.objects.filter(
+                recipe=OuterRef('pk'), ingredient_id__in=value
+            )
+        ))
+
+    def filter_ordering(self, queryset, name, value):
+        # Строка рейтинга есть у каждого рецепта, поэтому соединение
+        # внутреннее, а ключ сортировки целиком из recipes_recipescore и
+        # совпадает с индексом recipe_score_trending_idx
+        return queryset.filter(score__isnull=False).order_by(
+            '-score__score', '-score__recipe'
+        )
@@ -0,0 +1,189 @@
+import hashlib
+import json
+import threading
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import connection
+from django.http import HttpRequest
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+
+IDEMPOTENCY_HEADER = 'Idempotency-Key'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+
+
+def get_fingerprint(request: HttpRequest):
+    """Хеш метода, пути и тела запроса"""
+    body = json.dumps(
+        request.data, sort_keys=True, ensure_ascii=False, default=str
+    )
+    return hashlib.sha256(
+        f'{request.method} {request.path}\n{body}'.encode()
+    ).hexdigest()
+
+
+def replay(record: IdempotencyKey):
+    """Сохраненный ответ на первый запрос с этим ключом"""
+    return Response(
+        data=record.response,
+        status=record.status_code,
+        headers={REPLAYED_HEADER: 'true'}
+    )
+
+
+def acquire(user, key: str, fingerprint: str):
+    """
+    Захват ключа для выполнения запроса.
+
+    Возвращает (запись, None), если запрос нужно выполнить, или
+    (None, ответ), если ответ уже есть. Повторный запрос, пока первый
+    с тем же ключом выполняется, сразу получает 409. Ключ без ответа
+    освобождается, только если его владелец перестал продлевать
+    locked_until (процесс завершился, не записав ответ).
+    """
+    while True:
+        now = timezone.now()
+        record, created = IdempotencyKey.objects.get_or_create(
+            user=user, key=key,
+            defaults={
+                'fingerprint': fingerprint,
+                'locked_until': get_locked_until(now)
+            }
+        )
+        if created:
+            return record, None
+
+        expired = now - record.created_at > timedelta(
+            seconds=settings.IDEMPOTENCY_KEY_TTL
+        )
+        abandoned = record.status_code is None and (
+            record.locked_until is None or record.locked_until < now
+        )
+        if expired or abandoned:
+            IdempotencyKey.objects.filter(
+                pk=record.pk, locked_until=record.locked_until
+            ).delete()
+            continue
+
+        if record.fingerprint != fingerprint:
+            return None, Response(
+                data={
+                    'detail': 'Ключ идемпотентности уже использован '
+                              'для другого запроса'
+                },
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY
+            )
+        if record.status_code is not None:
+            return None, replay(record)
+        return None, Response(
+            data={'detail': 'Запрос с этим ключом еще выполняется'},
+            status=status.HTTP_409_CONFLICT,
+            headers={'Retry-After': '1'}
+        )
+
+
+def get_locked_until(now):
+    return now + timedelta(seconds=settings.IDEMPOTENCY_LOCK_TIMEOUT)
+
+
+class Heartbeat(threading.Thread):
+    """
+    Продление locked_until ключа, пока выполняется запрос.
+
+    Ключ продлевается каждую треть IDEMPOTENCY_LOCK_TIMEOUT, так что
+    медленный запрос не теряет ключ, а ключ упавшего процесса
+    освобождается не позже чем через IDEMPOTENCY_LOCK_TIMEOUT.
+    """
+
+    def __init__(self, record: IdempotencyKey):
+        super().__init__(name=f'idempotency-{record.pk}', daemon=True)
+        self.record = record
+        self.stopped = threading.Event()
+
+    def run(self):
+        try:
+            while not self.stopped.wait(
+                settings.IDEMPOTENCY_LOCK_TIMEOUT / 3
+            ):
+                IdempotencyKey.objects.filter(
+                    pk=self.record.pk, status_code__isnull=True
+                ).update(locked_until=get_locked_until(timezone.now()))
+        finally:
+            connection.close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stopped.set()
+        self.join()
+
+
+def idempotent(method):
+    """
+    Поддержка заголовка Idempotency-Key для POST-методов вьюсета.
+
+    Ответ на первый запрос сохраняется и возвращается на повторы с тем
+    же ключом в течение IDEMPOTENCY_KEY_TTL. Ответы с кодом 5xx и
+    исключения не сохраняются: ключ освобождается для повторной попытки.
+    """
+
+    @wraps(method)
+    def wrapper(self, request: HttpRequest, *args, **kwargs):
+        key = request.headers.get(IDEMPOTENCY_HEADER)
+        if (
+            not key
+            or request.method != 'POST'
+            or not request.user.is_authenticated
+        ):
+            return method(self, request, *args, **kwargs)
+
+        if len(key) > IdempotencyKey._meta.get_field('key').max_length:
+            return Response(
+                data={'detail': 'Слишком длинный ключ идемпотентности'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        record, response = acquire(
+            request.user, key, get_fingerprint(request)
+        )
+        if response is not None:
+            return response
+
+        try:
+            with Heartbeat(record):
+                response = method(self, request, *args, **kwargs)
+        except Exception:
+            record.delete()
+            raise
+
+        if response.status_code >= 500:
+            record.delete()
+        else:
+            record.status_code = response.status_code
+            record.response = response.data
+            record.locked_until = None
+            record.save(
+                update_fields=('status_code', 'response', 'locked_until')
+            )
+        return response
+
+    return wrapper
+
+
+def purge_expired():
+    """Удаление ключей старше IDEMPOTENCY_KEY_TTL"""
+    deleted, _ = IdempotencyKey.objects.filter(
+        created_at__lt=timezone.now() - timedelta(
+            seconds=settings.IDEMPOTENCY_KEY_TTL
+        )
+    ).delete()
+    return deleted
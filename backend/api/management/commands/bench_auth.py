@@ -0,0 +1,155 @@
+import statistics
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+
+User = get_user_model()
+
+PASSWORD = 'bench-Auth-password-1'
+
+
+def request(method: str, path: str, data: dict):
+    client = APIClient(SERVER_NAME='localhost')
+    started = time.perf_counter()
+    response = getattr(client, method)(path, data, format='json')
+    elapsed = time.perf_counter() - started
+    if response.status_code >= 400:
+        raise CommandError(
+            f'{path}: {response.status_code} {response.content[:200]}'
+        )
+    return elapsed
+
+
+def run_parallel(calls: list, concurrency: int):
+    """
+    Выполнение calls в concurrency потоках.
+
+    Возвращает длительности вызовов и общее время.
+    """
+    durations, errors = [], []
+
+    def worker(chunk):
+        try:
+            for call in chunk:
+                durations.append(call())
+        except Exception as error:
+            errors.append(error)
+        finally:
+            connection.close()
+
+    threads = [
+        threading.Thread(target=worker, args=(calls[index::concurrency],))
+        for index in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return durations, time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = 'Замер регистрации и получения токена для разных хешеров'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--runs',
+            type=int,
+            default=20,
+            help='Количество регистраций и входов на хешер'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=1,
+            help='Количество одновременных запросов'
+        )
+        parser.add_argument(
+            '--hashers',
+            default=settings.PASSWORD_HASHER,
+            help=(
+                'Хешеры через запятую: '
+                + ', '.join(settings.PASSWORD_HASHER_CHOICES)
+            )
+        )
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=settings.PASSWORD_PBKDF2_ITERATIONS,
+            help='Число итераций PBKDF2'
+        )
+
+    def handle(self, *args, **options):
+        names = options['hashers'].split(',')
+        for name in names:
+            if name not in settings.PASSWORD_HASHER_CHOICES:
+                raise CommandError(f'Неизвестный хешер {name}')
+
+        for name in names:
+            preferred = settings.PASSWORD_HASHER_CHOICES[name]
+            with override_settings(
+                PASSWORD_HASHERS=[preferred] + [
+                    hasher for hasher in settings.PASSWORD_HASHERS
+                    if hasher != preferred
+                ],
+                PASSWORD_PBKDF2_ITERATIONS=options['iterations']
+            ):
+                try:
+                    make_password(PASSWORD)
+                except ValueError as error:
+                    raise CommandError(f'Хешер {name} недоступен: {error}')
+                self.bench(name, options)
+
+    def bench(self, name: str, options: dict):
+        prefix = f'bench_{uuid.uuid4().hex[:8]}'
+        emails = [
+            f'{prefix}_{index}@example.com'
+            for index in range(options['runs'])
+        ]
+        try:
+            register = [
+                lambda email=email: request('post', '/api/users/', {
+                    'email': email,
+                    'username': email.split('@')[0],
+                    'first_name': 'Bench',
+                    'last_name': 'Auth',
+                    'password': PASSWORD,
+                })
+                for email in emails
+            ]
+            login = [
+                lambda email=email: request(
+                    'post', '/api/auth/token/login/',
+                    {'email': email, 'password': PASSWORD}
+                )
+                for email in emails
+            ]
+            for path, calls in (('register', register), ('login', login)):
+                durations, total = run_parallel(
+                    calls, options['concurrency']
+                )
+                self.report(name, path, durations, total)
+        finally:
+            User.objects.filter(username__startswith=prefix).delete()
+
+    def report(self, name: str, path: str, durations: list, total: float):
+        durations = sorted(duration * 1000 for duration in durations)
+        p95 = durations[min(len(durations) - 1, int(len(durations) * 0.95))]
+        self.stdout.write(
+            f'{name:8} {path:9} '
+            f'медиана {statistics.median(durations):7.1f} мс, '
+            f'p95 {p95:7.1f} мс, '
+            f'{len(durations) / total:7.1f} запр/с'
+        )
@@ -0,0 +1,108 @@
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+# То же, что делает воркер gunicorn до первого ответа: настройка Django,
+# создание WSGI-приложения с middleware и загрузка URLconf со вьюхами
+BOOT_CODE = (
+    'from django.core.wsgi import get_wsgi_application;'
+    'get_wsgi_application();'
+    'from django.urls import get_resolver;'
+    'get_resolver().url_patterns'
+)
+
+IMPORT_TIME_LINE = re.compile(
+    r'^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)$'
+)
+
+DEFAULT_BUDGET_MS = 800
+
+
+def measure():
+    """
+    Холодный старт в отдельном интерпретаторе с -X importtime.
+
+    Возвращает полное время запуска и суммарное время импортов в мс,
+    а также накопленное время импорта модулей верхнего уровня.
+    """
+    started = time.perf_counter()
+    result = subprocess.run(
+        (sys.executable, '-X', 'importtime', '-c', BOOT_CODE),
+        env=os.environ.copy(),
+        stderr=subprocess.PIPE,
+        stdout=subprocess.DEVNULL,
+        text=True
+    )
+    wall = (time.perf_counter() - started) * 1000
+    if result.returncode:
+        raise CommandError(result.stderr[-2000:])
+
+    total, modules = 0, {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match is None:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        total += int(self_us)
+        if not indent:
+            modules[name] = int(cumulative_us) / 1000
+    return wall, total / 1000, modules
+
+
+class Command(BaseCommand):
+    help = 'Замер времени холодного старта воркера по -X importtime'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--runs',
+            type=int,
+            default=5,
+            help='Количество запусков'
+        )
+        parser.add_argument(
+            '--budget',
+            type=float,
+            default=DEFAULT_BUDGET_MS,
+            help='Допустимое медианное время импортов, мс'
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=15,
+            help='Сколько самых медленных модулей показать'
+        )
+
+    def handle(self, *args, **options):
+        walls, totals, slowest = [], [], {}
+        for _ in range(options['runs']):
+            wall, total, modules = measure()
+            walls.append(wall)
+            totals.append(total)
+            for name, cumulative in modules.items():
+                slowest.setdefault(name, []).append(cumulative)
+
+        top = sorted(
+            (
+                (statistics.median(values), name)
+                for name, values in slowest.items()
+            ),
+            reverse=True
+        )[:options['top']]
+        for cumulative, name in top:
+            self.stdout.write(f'{cumulative:9.1f} мс  {name}')
+
+        import_time = statistics.median(totals)
+        self.stdout.write(
+            f'Запуск: {statistics.median(walls):.1f} мс, '
+            f'импорты: {import_time:.1f} мс '
+            f'(медиана из {options["runs"]}), '
+            f'бюджет: {options["budget"]:.0f} мс'
+        )
+        if import_time > options['budget']:
+            raise CommandError('Превышен бюджет времени импорта')
@@ -0,0 +1,206 @@
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Model, Prefetch, QuerySet
+
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import SAFE_METHODS
+
+from utils.queries import filter_in_order
+
+
+class EagerLoadingPlan:
+    """Набор select_related и Prefetch, нужных сериализатору"""
+
+    def __init__(self):
+        self.select_related = []
+        self.prefetch_related = []
+
+    def apply(self, queryset: QuerySet):
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        for lookup, model, plan in self.prefetch_related:
+            queryset = queryset.prefetch_related(
+                Prefetch(
+                    lookup,
+                    queryset=plan.apply(model._default_manager.all())
+                )
+            )
+        return queryset
+
+
+def build_plan(fields, model: Model, plan=None, prefix=''):
+    """
+    Обход полей сериализатора и их source= путей.
+
+    Связи «к одному» по пути поля попадают в select_related, связи
+    «ко многим» — в Prefetch, queryset которого строится тем же обходом
+    по полям вложенного сериализатора.
+    """
+    plan = plan or EagerLoadingPlan()
+
+    for field in fields.values():
+        if field.write_only or field.source == '*':
+            continue
+
+        nested = field
+        if isinstance(field, serializers.ListSerializer):
+            nested = field.child
+
+        current, path = model, prefix
+        attrs = field.source.split('.')
+        for index, attr in enumerate(attrs):
+            try:
+                model_field = current._meta.get_field(attr)
+            except FieldDoesNotExist:
+                break
+            if not model_field.is_relation:
+                break
+
+            lookup = f'{path}{attr}'
+            is_last = index == len(attrs) - 1
+            if model_field.one_to_many or model_field.many_to_many:
+                child_plan = EagerLoadingPlan()
+                if is_last and isinstance(nested, serializers.BaseSerializer):
+                    build_plan(
+                        nested.fields, model_field.related_model, child_plan
+                    )
+                plan.prefetch_related.append(
+                    (lookup, model_field.related_model, child_plan)
+                )
+                break
+
+            if lookup not in plan.select_related:
+                plan.select_related.append(lookup)
+            current, path = model_field.related_model, f'{lookup}__'
+            if is_last and isinstance(nested, serializers.BaseSerializer):
+                build_plan(nested.fields, current, plan, path)
+
+    return plan
+
+
+class EagerLoadingMixin:
+    """
+    Автоматическая подгрузка связанных объектов для вьюсета.
+
+    План select_related/Prefetch выводится из полей сериализатора
+    текущего действия и кешируется. Действия, которые не используют
+    основной сериализатор, отключают подгрузку аргументом
+    eager_loading=False в @action.
+    """
+
+    eager_loading = True
+    eager_loading_plans = {}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if not self.eager_loading:
+            return queryset
+
+        serializer = self.get_serializer()
+        key = (type(serializer), tuple(serializer.fields), queryset.model)
+        plan = self.eager_loading_plans.get(key)
+        if plan is None:
+            plan = build_plan(serializer.fields, queryset.model)
+            self.eager_loading_plans[key] = plan
+        return plan.apply(queryset)
+
+
+def get_sparse_fields(request, fields: tuple):
+    """
+    Поля ответа с учетом параметров ?fields= и ?omit=.
+
+    Оба параметра — списки имен через запятую; порядок полей остается
+    порядком сериализатора. Неизвестное имя — ошибка 400.
+    """
+    params = request.query_params
+    names = {}
+    for param in ('fields', 'omit'):
+        if param in params:
+            names[param] = set(filter(None, params[param].split(',')))
+            unknown = names[param].difference(fields)
+            if unknown:
+                raise ValidationError(
+                    {param: f'Неизвестные поля: {", ".join(sorted(unknown))}'}
+                )
+    if 'fields' in names:
+        fields = tuple(field for field in fields if field in names['fields'])
+    if 'omit' in names:
+        fields = tuple(
+            field for field in fields if field not in names['omit']
+        )
+    return fields
+
+
+class SparseFieldsetsMixin:
+    """
+    Выбор полей ответа параметрами ?fields= и ?omit=.
+
+    Поля убираются из сериализатора до обращения к данным, поэтому
+    EagerLoadingMixin не строит для них select_related и Prefetch, а
+    вьюхи по тем же параметрам пропускают лишние аннотации. Действует
+    только на чтение и только на корневой сериализатор: у вложенных
+    при создании нет запроса в контексте.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        request = self.context.get('request')
+        if request is None or request.method not in SAFE_METHODS:
+            return
+
+        keep = get_sparse_fields(request, tuple(self.fields))
+        for name in tuple(self.fields):
+            if name not in keep:
+                self.fields.pop(name)
+
+
+def get_batch_ids(request):
+    """
+    Список id из параметра ?ids=; повтор id — ошибка 400.
+
+    None, если параметра нет.
+    """
+    value = request.query_params.get('ids')
+    if value is None:
+        return None
+    try:
+        ids = [int(pk) for pk in value.split(',') if pk]
+    except ValueError:
+        raise ValidationError(
+            {'ids': 'Ожидается список целых чисел через запятую'}
+        )
+    if len(set(ids)) != len(ids):
+        raise ValidationError({'ids': 'id в запросе повторяются'})
+    if len(ids) > settings.BATCH_FETCH_MAX_IDS:
+        raise ValidationError(
+            {'ids': f'Не больше {settings.BATCH_FETCH_MAX_IDS} id в запросе'}
+        )
+    return ids
+
+
+class BatchFetchMixin:
+    """
+    Выборка набора объектов списком: ?ids=3,1,2.
+
+    Объекты возвращаются без пагинации в порядке перечисления id тем
+    же числом запросов, что и одна страница списка; отсутствующие id
+    пропускаются. Остальные фильтры списка продолжают действовать.
+    """
+
+    def get_batch_ids(self):
+        if self.action != 'list':
+            return None
+        return get_batch_ids(self.request)
+
+    def filter_queryset(self, queryset: QuerySet):
+        queryset = super().filter_queryset(queryset)
+        ids = self.get_batch_ids()
+        if ids is None:
+            return queryset
+        return filter_in_order(queryset, ids)
+
+    def paginate_queryset(self, queryset):
+        if self.get_batch_ids() is not None:
+            return None
+        return super().paginate_queryset(queryset)
@@ -0,0 +1,62 @@
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+
+
+class IdempotencyKey(models.Model):
+    """
+    Модель ключа идемпотентности.
+
+    Пока запрос выполняется, status_code пуст, а locked_until
+    продлевается процессом, выполняющим запрос; после ответа в записи
+    сохраняются код и тело ответа для повторных запросов с тем же ключом.
+    """
+
+    user = models.ForeignKey(
+        to=settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='idempotency_keys',
+        verbose_name='Пользователь'
+    )
+    key = models.CharField(
+        verbose_name='Ключ',
+        max_length=255
+    )
+    fingerprint = models.CharField(
+        verbose_name='Отпечаток запроса',
+        max_length=64
+    )
+    status_code = models.PositiveSmallIntegerField(
+        verbose_name='Код ответа',
+        null=True,
+        blank=True
+    )
+    response = models.JSONField(
+        verbose_name='Тело ответа',
+        encoder=DjangoJSONEncoder,
+        null=True,
+        blank=True
+    )
+    locked_until = models.DateTimeField(
+        verbose_name='Выполняется до',
+        null=True,
+        blank=True
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Создан',
+        auto_now_add=True,
+        db_index=True
+    )
+
+    class Meta:
+        verbose_name = 'ключ идемпотентности'
+        verbose_name_plural = 'Ключи идемпотентности'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'key'),
+                name='unique_idempotency_key'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.user_id}: {self.key}'
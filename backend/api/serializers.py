@@ -14,12 +14,14 @@ from .constants import (
     MIN_INGREDIENT_AMOUNT, MAX_INGREDIENT_AMOUNT,
     MIN_COOKING_TIME, MAX_COOKING_TIME
 )
+from .mixins import SparseFieldsetsMixin
 
 from ingredients.models import Ingredient
 from recipes.models import (
     RecipeIngredient, Recipe, Favorites,
     ShoppingCart
 )
+from recipes.similarity import index_recipes
 from users.models import Follower
 from utils.base64field import Base64ImageField
 
@@ -47,7 +49,9 @@ class CustomUserCreateSerializer(UserCreateSerializer):
         }
 
 
-class CustomUserSerializer(serializers.ModelSerializer):
+class CustomUserSerializer(
+    SparseFieldsetsMixin, serializers.ModelSerializer
+):
     """Сериализатор для кастоиного пользователя"""
 
     is_subscribed = serializers.SerializerMethodField()
@@ -62,6 +66,9 @@ class CustomUserSerializer(serializers.ModelSerializer):
         read_only_fields = ('id',)
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+
         request = self.context.get('request')
         current_user = request.user
         if current_user.is_authenticated:
@@ -99,6 +106,8 @@ class FollowSerializer(CustomUserSerializer):
         ).data
 
     def get_recipes_count(self, obj):
+        if hasattr(obj, 'recipes_count'):
+            return obj.recipes_count
         return obj.recipes.count()
 
 
@@ -212,7 +221,9 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
         )
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(
+    SparseFieldsetsMixin, serializers.ModelSerializer
+):
     """Сериализатор для рецептов"""
 
     ingredients = RecipeIngredientSerializer(
@@ -289,6 +300,7 @@ class RecipeSerializer(serializers.ModelSerializer):
             })
 
         RecipeIngredient.objects.bulk_create(ingredients_list)
+        index_recipes([recipe.pk])
 
     def create(self, validated_data: dict):
         ingredients = validated_data.pop('recipe_through')
@@ -309,10 +321,20 @@ class RecipeSerializer(serializers.ModelSerializer):
 
         return instance
 
+    def to_representation(self, instance: Recipe):
+        # Признак подписки, аннотированный api.views.annotate_recipes
+        if hasattr(instance, 'author_is_subscribed'):
+            instance.author.is_subscribed = instance.author_is_subscribed
+        return super().to_representation(instance)
+
     def get_is_favorited(self, obj: Recipe):
+        if hasattr(obj, 'is_favorited'):
+            return obj.is_favorited
         return self.is_recipe_added(obj, Favorites)
 
     def get_is_in_shopping_cart(self, obj: Recipe):
+        if hasattr(obj, 'is_in_shopping_cart'):
+            return obj.is_in_shopping_cart
         return self.is_recipe_added(obj, ShoppingCart)
 
     def is_recipe_added(
@@ -0,0 +1,90 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from . import authentication
+from .caching import invalidate_ingredients, invalidate_short_link
+from .counters import invalidate
+from ingredients.models import Ingredient
+from recipes.models import Favorites, Recipe, ShoppingCart
+from users.models import Follower
+
+
+User = get_user_model()
+
+
+@receiver(post_save, sender=Favorites)
+@receiver(post_delete, sender=Favorites)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_delete, sender=ShoppingCart)
+def user_relation_changed(sender, instance, **kwargs):
+    invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=Follower)
+@receiver(post_delete, sender=Follower)
+def follow_changed(sender, instance, **kwargs):
+    invalidate(instance.subscriber_id)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_saved(sender, instance, created, **kwargs):
+    if created:
+        invalidate(instance.author_id)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    invalidate(instance.author_id)
+    invalidate_short_link(instance.short_code)
+
+
+@receiver(post_save, sender=User)
+def user_saved(sender, instance, update_fields=None, **kwargs):
+    # Вход обновляет только last_login, кешированный пользователь
+    # остается верным
+    if update_fields and set(update_fields) == {'last_login'}:
+        return
+    authentication.invalidate(*Token.objects.filter(
+        user=instance
+    ).values_list('key', flat=True))
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    authentication.invalidate(instance.key)
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def ingredient_changed(sender, instance, **kwargs):
+    invalidate_ingredients()
+
+
+@receiver(m2m_changed, sender=Favorites)
+@receiver(m2m_changed, sender=ShoppingCart)
+def recipe_users_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    recipe.in_featured.add(user) и подобные вызовы.
+
+    Для связей через промежуточную модель add() и remove() не отправляют
+    post_save и post_delete, только m2m_changed.
+    """
+    if reverse:
+        # user.favorite_recipes.add(...): меняются счетчики instance
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            invalidate(instance.pk)
+        return
+
+    if action in ('post_add', 'post_remove'):
+        invalidate(*pk_set)
+    elif action == 'pre_clear':
+        field = (
+            'in_featured' if sender is Favorites else 'in_shopping_cart'
+        )
+        instance._cleared_user_ids = list(
+            getattr(instance, field).values_list('pk', flat=True)
+        )
+    elif action == 'post_clear':
+        invalidate(*getattr(instance, '_cleared_user_ids', ()))
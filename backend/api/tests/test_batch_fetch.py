@@ -0,0 +1,95 @@
+"""
+Выборка списком ?ids=: порядок запроса, постоянное число запросов
+и ограничение размера.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from ingredients.models import Ingredient
+from recipes.models import Recipe, RecipeIngredient
+
+
+User = get_user_model()
+
+URLS = ('/api/recipes/', '/api/users/')
+
+
+class BatchFetchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        salt = Ingredient.objects.create(name='соль', measurement_unit='г')
+        cls.users, cls.recipes = [], []
+        for index in range(50):
+            user = User.objects.create(
+                email=f'user{index}@example.com', username=f'user{index}',
+                first_name='Имя', last_name='Фамилия'
+            )
+            recipe = Recipe.objects.create(
+                author=user, name=f'Рецепт {index}', text='Описание',
+                cooking_time=10, image='cas/aa/bb/recipe.png'
+            )
+            RecipeIngredient.objects.create(
+                recipe=recipe, ingredient=salt, amount=1
+            )
+            recipe.in_featured.add(user)
+            cls.users.append(user)
+            cls.recipes.append(recipe)
+        cls.objects = {'/api/recipes/': cls.recipes, '/api/users/': cls.users}
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[0])
+
+    def get(self, url, ids):
+        response = self.client.get(
+            url, {'ids': ','.join(str(pk) for pk in ids)}
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        return [row['id'] for row in response.data]
+
+    def test_requested_order(self):
+        for fast in (False, True):
+            with override_settings(FAST_READ_SERIALIZERS=fast):
+                for url in URLS:
+                    objects = self.objects[url]
+                    ids = [objects[2].pk, objects[0].pk, objects[1].pk]
+                    self.assertEqual(self.get(url, ids), ids, url)
+
+    def test_missing_ids_are_skipped(self):
+        for url in URLS:
+            pk = self.objects[url][0].pk
+            self.assertEqual(self.get(url, [10 ** 9, pk]), [pk])
+
+    def test_other_filters_apply(self):
+        ids = [recipe.pk for recipe in self.recipes[:3]]
+        response = self.client.get(
+            '/api/recipes/',
+            {'ids': ','.join(map(str, ids)), 'author': self.users[1].pk}
+        )
+        self.assertEqual(
+            [row['id'] for row in response.data], [self.recipes[1].pk]
+        )
+
+    def test_query_count_does_not_depend_on_ids(self):
+        for fast in (False, True):
+            with override_settings(FAST_READ_SERIALIZERS=fast):
+                for url in URLS:
+                    objects = self.objects[url]
+                    with CaptureQueriesContext(connection) as single:
+                        self.get(url, [objects[0].pk])
+                    ids = [obj.pk for obj in reversed(objects)]
+                    with self.assertNumQueries(len(single.captured_queries)):
+                        self.assertEqual(self.get(url, ids), ids)
+
+    def test_invalid_ids(self):
+        too_many = ','.join(
+            str(pk) for pk in range(1, settings.BATCH_FETCH_MAX_IDS + 2)
+        )
+        for url in URLS:
+            for ids in ('1,x', '1,-', '1,2,1', too_many):
+                response = self.client.get(url, {'ids': ids})
+                self.assertEqual(response.status_code, 400, (url, ids))
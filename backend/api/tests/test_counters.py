@@ -0,0 +1,86 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from recipes.models import Favorites, Recipe
+
+
+User = get_user_model()
+
+URL = '/api/users/me/counters/'
+
+
+class CountersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='user@example.com', username='user',
+            first_name='Имя', last_name='Фамилия', password='x'
+        )
+        cls.author = User.objects.create_user(
+            email='author@example.com', username='author',
+            first_name='Имя', last_name='Фамилия', password='x'
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.author, name='Рецепт', text='Описание',
+            cooking_time=10, image='cas/aa/bb/recipe.png'
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assert_counters(self, **expected):
+        counters = {
+            'shopping_cart': 0, 'favorites': 0,
+            'subscriptions': 0, 'recipes': 0, **expected
+        }
+        response = self.client.get(URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, counters)
+        # Повторный ответ берется из кеша
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(URL).data, counters)
+
+    def test_favorite_and_cart_through_api(self):
+        self.assert_counters()
+        for name, url in (
+            ('favorites', f'/api/recipes/{self.recipe.pk}/favorite/'),
+            ('shopping_cart', f'/api/recipes/{self.recipe.pk}/shopping_cart/'),
+        ):
+            self.assertEqual(self.client.post(url).status_code, 201)
+            self.assert_counters(**{name: 1})
+            self.assertEqual(self.client.delete(url).status_code, 204)
+            self.assert_counters()
+
+    def test_favorite_through_models(self):
+        self.assert_counters()
+        favorite = Favorites.objects.create(user=self.user, recipe=self.recipe)
+        self.assert_counters(favorites=1)
+        favorite.delete()
+        self.assert_counters()
+        self.user.favorite_recipes.add(self.recipe)
+        self.assert_counters(favorites=1)
+        self.recipe.in_featured.clear()
+        self.assert_counters()
+
+    def test_follow(self):
+        self.assert_counters()
+        url = f'/api/users/{self.author.pk}/subscribe/'
+        self.assertEqual(self.client.post(url).status_code, 201)
+        self.assert_counters(subscriptions=1)
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assert_counters()
+
+    def test_recipe(self):
+        self.assert_counters()
+        recipe = Recipe.objects.create(
+            author=self.user, name='Свой рецепт', text='Описание',
+            cooking_time=10, image='cas/aa/bb/recipe.png'
+        )
+        self.assert_counters(recipes=1)
+        response = self.client.delete(f'/api/recipes/{recipe.pk}/')
+        self.assertEqual(response.status_code, 204)
+        self.assert_counters()
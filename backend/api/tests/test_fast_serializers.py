@@ -0,0 +1,222 @@
+"""
+Сравнение ответов api.fast_serializers с ответами ModelSerializer.
+
+Каждый запрос выполняется с FAST_READ_SERIALIZERS=False и True,
+тела ответов должны совпадать побайтно, включая порядок строк.
+"""
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from api import fast_serializers
+from api.serializers import (
+    FollowSerializer, RecipeSerializer, ShortRecipeSerializer
+)
+from ingredients.models import Ingredient
+from recipes.models import Recipe, RecipeIngredient
+from users.models import Follower
+from utils.queries import count_subquery
+
+
+User = get_user_model()
+
+
+class FastSerializersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            email='author@example.com', username='author',
+            first_name='Автор', last_name='Рецептов', password='x'
+        )
+        cls.author.avatar = 'cas/aa/bb/avatar.png'
+        cls.author.save()
+        cls.other = User.objects.create_user(
+            email='other@example.com', username='other',
+            first_name='Другой', last_name='Автор', password='x'
+        )
+        cls.reader = User.objects.create_user(
+            email='reader@example.com', username='reader',
+            first_name='Читатель', last_name='Рецептов', password='x'
+        )
+        Follower.objects.create(subscriber=cls.reader, subscribed=cls.author)
+        Follower.objects.create(subscriber=cls.reader, subscribed=cls.other)
+
+        salt = Ingredient.objects.create(name='соль', measurement_unit='г')
+        flour = Ingredient.objects.create(
+            name='мука', measurement_unit='г'
+        )
+        cls.recipes = []
+        for index in range(4):
+            recipe = Recipe.objects.create(
+                author=cls.author if index < 3 else cls.other,
+                name=f'Рецепт {index}',
+                text='Описание',
+                cooking_time=10 + index,
+                image=f'cas/cc/dd/recipe{index}.png',
+            )
+            cls.recipes.append(recipe)
+        # Рецепт с пустым списком ингредиентов: cls.recipes[3]
+        for recipe, ingredient, amount in (
+            (cls.recipes[0], salt, 5),
+            (cls.recipes[0], flour, 200),
+            (cls.recipes[1], flour, 100),
+            (cls.recipes[2], salt, 1),
+        ):
+            RecipeIngredient.objects.create(
+                recipe=recipe, ingredient=ingredient, amount=amount
+            )
+        cls.recipes[0].in_featured.add(cls.reader)
+        cls.recipes[1].in_shopping_cart.add(cls.reader)
+        cls.recipes[2].in_featured.add(cls.reader)
+        cls.recipes[2].in_shopping_cart.add(cls.reader)
+
+    def setUp(self):
+        cache.clear()
+
+    def get_both(self, url, user=None):
+        responses = []
+        for fast in (False, True):
+            client = APIClient()
+            if user is not None:
+                client.force_authenticate(user)
+            with override_settings(FAST_READ_SERIALIZERS=fast):
+                response = client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+            responses.append(response)
+        return responses
+
+    def assert_same(self, url, user=None):
+        slow, fast = self.get_both(url, user)
+        self.assertEqual(fast.content, slow.content, url)
+        return fast.json()
+
+    def test_recipe_list_anonymous(self):
+        data = self.assert_same('/api/recipes/?limit=10')
+        self.assertEqual(len(data['results']), 4)
+        self.assertFalse(any(
+            row['is_favorited'] or row['is_in_shopping_cart']
+            for row in data['results']
+        ))
+
+    def test_recipe_list_authenticated(self):
+        data = self.assert_same('/api/recipes/?limit=10', self.reader)
+        flags = {
+            row['id']: (row['is_favorited'], row['is_in_shopping_cart'])
+            for row in data['results']
+        }
+        self.assertEqual(flags, {
+            self.recipes[0].id: (True, False),
+            self.recipes[1].id: (False, True),
+            self.recipes[2].id: (True, True),
+            self.recipes[3].id: (False, False),
+        })
+        self.assertTrue(all(
+            row['author']['is_subscribed'] for row in data['results']
+        ))
+
+    def test_recipe_list_empty_ingredients(self):
+        data = self.assert_same(
+            f'/api/recipes/?author={self.other.id}', self.reader
+        )
+        self.assertEqual(data['results'][0]['ingredients'], [])
+
+    def test_recipe_list_filters(self):
+        for url in (
+            '/api/recipes/?is_favorited=1',
+            '/api/recipes/?is_in_shopping_cart=1',
+            f'/api/recipes/?author={self.author.id}'
+            '&ordering=trending&limit=2&offset=1',
+        ):
+            self.assert_same(url, self.reader)
+
+    def test_recipe_list_sparse_fields(self):
+        for url in (
+            '/api/recipes/?fields=id,name,image,cooking_time',
+            '/api/recipes/?fields=author,is_favorited',
+            '/api/recipes/?fields=ingredients',
+            '/api/recipes/?omit=author,ingredients',
+            '/api/recipes/?fields=author,is_favorited&omit=is_favorited',
+        ):
+            for user in (None, self.reader):
+                data = self.assert_same(url, user)
+                self.assertTrue(data['results'])
+
+    def test_subscriptions(self):
+        for url in (
+            '/api/users/subscriptions/',
+            '/api/users/subscriptions/?recipes_limit=2',
+            '/api/users/subscriptions/?fields=id,recipes_count',
+            '/api/users/subscriptions/?omit=recipes,is_subscribed',
+            '/api/users/subscriptions/?fields=recipes&recipes_limit=1',
+        ):
+            self.assert_same(url, self.reader)
+
+        data = self.assert_same(
+            '/api/users/subscriptions/?recipes_limit=2', self.reader
+        )
+        self.assertEqual(
+            [len(row['recipes']) for row in data['results']], [2, 1]
+        )
+        self.assertEqual(
+            [row['recipes_count'] for row in data['results']], [3, 1]
+        )
+
+    def test_short_recipe_data(self):
+        request = APIRequestFactory().get('/')
+        for recipe in self.recipes:
+            self.assertEqual(
+                fast_serializers.short_recipe_data(
+                    recipe, fast_serializers.MediaURL()
+                ),
+                ShortRecipeSerializer(recipe).data
+            )
+            self.assertEqual(
+                fast_serializers.short_recipe_data(
+                    recipe, fast_serializers.MediaURL(request)
+                ),
+                ShortRecipeSerializer(
+                    recipe, context={'request': request}
+                ).data
+            )
+
+    def test_recipes_data(self):
+        request = Request(APIRequestFactory().get('/api/recipes/'))
+        request.user = self.reader
+        queryset = Recipe.objects.order_by('pk')
+        self.assertEqual(
+            fast_serializers.recipes_data(
+                list(fast_serializers.recipe_rows(queryset, self.reader)),
+                request
+            ),
+            RecipeSerializer(
+                queryset, many=True, context={'request': request}
+            ).data
+        )
+
+    def test_follows_data(self):
+        request = Request(
+            APIRequestFactory().get('/api/users/subscriptions/')
+        )
+        request.user = self.reader
+        queryset = User.objects.filter(
+            pk__in=(self.author.pk, self.other.pk)
+        ).order_by('pk')
+        rows = fast_serializers.follow_rows(
+            queryset.annotate(
+                is_subscribed=fast_serializers.user_exists(
+                    Follower.objects, self.reader,
+                    'subscriber', 'subscribed'
+                ),
+                recipes_count=count_subquery(
+                    Recipe.objects, 'author'
+                )
+            )
+        )
+        self.assertEqual(
+            fast_serializers.follows_data(list(rows), request),
+            FollowSerializer(
+                queryset, many=True, context={'request': request}
+            ).data
+        )
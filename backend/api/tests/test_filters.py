@@ -0,0 +1,163 @@
+"""
+Фильтры списка рецептов: результат и форма SQL.
+
+Фильтры по связанным таблицам должны оставаться полусоединениями
+EXISTS, без JOIN и DISTINCT. Сортировка trending — внутреннее
+соединение с ключом из индекса recipe_score_trending_idx.
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from api.filters import MAX_FILTER_VALUES
+from ingredients.models import Ingredient
+from recipes.models import Recipe, RecipeIngredient, RecipeScore
+
+
+User = get_user_model()
+
+
+class RecipeFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='user@example.com', username='user',
+            first_name='Имя', last_name='Фамилия', password='x'
+        )
+        cls.other = User.objects.create_user(
+            email='other@example.com', username='other',
+            first_name='Имя', last_name='Фамилия', password='x'
+        )
+        cls.salt = Ingredient.objects.create(
+            name='соль', measurement_unit='г'
+        )
+        cls.flour = Ingredient.objects.create(
+            name='мука', measurement_unit='г'
+        )
+        cls.sugar = Ingredient.objects.create(
+            name='сахар', measurement_unit='г'
+        )
+        cls.bread, cls.cake, cls.soup = (
+            Recipe.objects.create(
+                author=author, name=name, text='Описание',
+                cooking_time=cooking_time, image='cas/aa/bb/recipe.png'
+            )
+            for author, name, cooking_time in (
+                (cls.user, 'Хлеб', 60),
+                (cls.user, 'Пирог', 90),
+                (cls.other, 'Суп', 30),
+            )
+        )
+        for recipe, ingredients in (
+            (cls.bread, (cls.salt, cls.flour)),
+            (cls.cake, (cls.flour, cls.sugar)),
+            (cls.soup, (cls.salt,)),
+        ):
+            for ingredient in ingredients:
+                RecipeIngredient.objects.create(
+                    recipe=recipe, ingredient=ingredient, amount=1
+                )
+        cls.bread.in_featured.add(cls.user)
+        cls.soup.in_shopping_cart.add(cls.user)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, query):
+        """id найденных рецептов и SQL запросов к таблице рецептов"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                f'/api/recipes/?fields=id&limit=100&{query}'
+            )
+        self.assertEqual(response.status_code, 200, response.data)
+        table = Recipe._meta.db_table
+        statements = [
+            query['sql'] for query in queries.captured_queries
+            if f'FROM "{table}"' in query['sql']
+        ]
+        return {row['id'] for row in response.data['results']}, statements
+
+    def assert_semi_join(self, query):
+        ids, statements = self.get(query)
+        self.assertEqual(len(statements), 2, statements)
+        for sql in statements:
+            self.assertIn('EXISTS', sql)
+            self.assertNotIn('DISTINCT', sql)
+            self.assertNotIn('JOIN', sql)
+        return ids
+
+    def test_is_favorited(self):
+        self.assertEqual(
+            self.assert_semi_join('is_favorited=1'), {self.bread.pk}
+        )
+
+    def test_is_in_shopping_cart(self):
+        self.assertEqual(
+            self.assert_semi_join('is_in_shopping_cart=1'), {self.soup.pk}
+        )
+
+    def test_ingredients_all_required(self):
+        self.assertEqual(
+            self.assert_semi_join(
+                f'ingredients={self.salt.pk},{self.flour.pk}'
+            ),
+            {self.bread.pk}
+        )
+
+    def test_exclude_ingredients(self):
+        self.assertEqual(
+            self.assert_semi_join(f'exclude_ingredients={self.salt.pk}'),
+            {self.cake.pk}
+        )
+
+    def test_combined(self):
+        self.assertEqual(
+            self.assert_semi_join(
+                f'author={self.user.pk},{self.other.pk}'
+                f'&ingredients={self.salt.pk}'
+                f'&exclude_ingredients={self.sugar.pk}'
+                '&is_favorited=1&cooking_time_min=10&cooking_time_max=60'
+            ),
+            {self.bread.pk}
+        )
+
+    def test_author_without_join(self):
+        ids, statements = self.get(f'author={self.other.pk}')
+        self.assertEqual(ids, {self.soup.pk})
+        for sql in statements:
+            self.assertNotIn('JOIN', sql)
+
+    def test_values_count_limit(self):
+        values = ','.join(str(pk) for pk in range(1, MAX_FILTER_VALUES + 2))
+        for name in ('author', 'ingredients', 'exclude_ingredients'):
+            response = self.client.get(f'/api/recipes/?{name}={values}')
+            self.assertEqual(response.status_code, 400, name)
+
+    def test_trending_order_uses_score_index(self):
+        RecipeScore.objects.filter(recipe=self.bread).update(score=5)
+        RecipeScore.objects.filter(recipe=self.soup).update(score=1)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                '/api/recipes/?fields=id&ordering=trending'
+                f'&author={self.user.pk},{self.other.pk}'
+            )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(
+            [row['id'] for row in response.data['results']],
+            [self.bread.pk, self.soup.pk, self.cake.pk]
+        )
+        page_sql = next(
+            query['sql'] for query in queries.captured_queries
+            if 'ORDER BY' in query['sql']
+        )
+        table = RecipeScore._meta.db_table
+        self.assertIn(f'INNER JOIN "{table}"', page_sql)
+        self.assertNotIn('LEFT OUTER JOIN', page_sql)
+        self.assertNotIn('NULLS', page_sql)
+        self.assertIn(
+            f'ORDER BY "{table}"."score" DESC, "{table}"."recipe_id" DESC',
+            page_sql
+        )
@@ -0,0 +1,80 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from api.idempotency import get_fingerprint
+from api.models import IdempotencyKey
+from recipes.models import Recipe
+
+
+User = get_user_model()
+
+
+class IdempotencyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='user@example.com', username='user',
+            first_name='Имя', last_name='Фамилия', password='x'
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.user, name='Рецепт', text='Описание',
+            cooking_time=10, image='cas/aa/bb/recipe.png'
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = f'/api/recipes/{self.recipe.pk}/favorite/'
+
+    def post(self, key='key-1', data=None):
+        return self.client.post(
+            self.url, data or {}, format='json', HTTP_IDEMPOTENCY_KEY=key
+        )
+
+    def lock_key(self, locked_until):
+        """Ключ, захваченный запросом, который еще не ответил"""
+        request = Request(
+            APIRequestFactory().post(self.url, {}, format='json'),
+            parsers=[JSONParser()]
+        )
+        return IdempotencyKey.objects.create(
+            user=self.user, key='key-1',
+            fingerprint=get_fingerprint(request),
+            locked_until=locked_until
+        )
+
+    def test_replay(self):
+        first = self.post()
+        second = self.post()
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(second.status_code, 201)
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second['Idempotent-Replayed'], 'true')
+        self.assertEqual(self.recipe.in_featured.count(), 1)
+
+    def test_other_request_with_same_key(self):
+        self.post()
+        response = self.post(data={'other': 1})
+        self.assertEqual(response.status_code, 422)
+
+    def test_in_flight_key_conflicts(self):
+        """Повтор во время выполнения первого запроса сразу получает 409"""
+        self.lock_key(timezone.now() + timedelta(minutes=1))
+        response = self.post()
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(self.recipe.in_featured.exists())
+
+    def test_abandoned_key_is_taken_over(self):
+        """Ключ, который никто не продлевает, освобождается"""
+        self.lock_key(timezone.now() - timedelta(seconds=1))
+        response = self.post()
+        self.assertEqual(response.status_code, 201)
+        record = IdempotencyKey.objects.get(key='key-1')
+        self.assertEqual(record.status_code, 201)
+        self.assertIsNone(record.locked_until)
@@ -0,0 +1,102 @@
+"""
+Параметры ?fields= и ?omit=: убранные поля не должны стоить запросов,
+соединений и подзапросов.
+"""
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from ingredients.models import Ingredient
+from recipes.models import Favorites, Recipe, RecipeIngredient, ShoppingCart
+
+
+User = get_user_model()
+
+SHORT_FIELDS = 'id,name,image,cooking_time'
+
+
+class SparseFieldsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='user@example.com', username='user',
+            first_name='Имя', last_name='Фамилия', password='x'
+        )
+        salt = Ingredient.objects.create(name='соль', measurement_unit='г')
+        for index in range(3):
+            recipe = Recipe.objects.create(
+                author=cls.user, name=f'Рецепт {index}', text='Описание',
+                cooking_time=10, image='cas/aa/bb/recipe.png'
+            )
+            RecipeIngredient.objects.create(
+                recipe=recipe, ingredient=salt, amount=1
+            )
+            recipe.in_featured.add(cls.user)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_sql(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.data)
+        return response, ' '.join(
+            query['sql'] for query in queries.captured_queries
+        )
+
+    def assert_tables(self, sql, present):
+        tables = {
+            model: model._meta.db_table
+            for model in (User, RecipeIngredient, Favorites, ShoppingCart)
+        }
+        for model, table in tables.items():
+            if model in present:
+                self.assertIn(f'"{table}"', sql, model)
+            else:
+                self.assertNotIn(f'"{table}"', sql, model)
+
+    def test_recipe_list(self):
+        for fast in (False, True):
+            with override_settings(FAST_READ_SERIALIZERS=fast):
+                response, sql = self.get_sql('/api/recipes/')
+                self.assert_tables(
+                    sql, (User, RecipeIngredient, Favorites, ShoppingCart)
+                )
+
+                response, sql = self.get_sql(
+                    f'/api/recipes/?fields={SHORT_FIELDS}'
+                )
+                self.assertEqual(
+                    set(response.data['results'][0]),
+                    set(SHORT_FIELDS.split(','))
+                )
+                self.assert_tables(sql, ())
+
+                response, sql = self.get_sql(
+                    '/api/recipes/?omit=author,ingredients,is_in_shopping_cart'
+                )
+                self.assert_tables(sql, (Favorites,))
+
+    def test_query_count_does_not_grow(self):
+        for fast in (False, True):
+            with override_settings(FAST_READ_SERIALIZERS=fast):
+                with CaptureQueriesContext(connection) as full:
+                    self.client.get('/api/recipes/')
+                with self.assertNumQueries(2):
+                    self.client.get(f'/api/recipes/?fields={SHORT_FIELDS}')
+                self.assertGreater(len(full.captured_queries), 2)
+
+    def test_unknown_fields(self):
+        for url in (
+            '/api/recipes/?fields=id,unknown',
+            '/api/recipes/?omit=password',
+            '/api/users/?fields=recipes',
+            '/api/users/subscriptions/?omit=unknown',
+        ):
+            for fast in (False, True):
+                with override_settings(FAST_READ_SERIALIZERS=fast):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 400, url)
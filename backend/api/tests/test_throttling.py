@@ -0,0 +1,66 @@
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api import throttling
+from recipes.models import Recipe
+from utils.shared_memory import SharedTable
+
+
+User = get_user_model()
+
+
+@override_settings(REST_FRAMEWORK={
+    **settings.REST_FRAMEWORK,
+    'DEFAULT_THROTTLE_RATES': {'recipes_write': '1/min'},
+})
+class RecipeThrottleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            email='user@example.com', username='user',
+            first_name='Имя', last_name='Фамилия', password='x'
+        )
+        cls.recipe = Recipe.objects.create(
+            author=cls.user, name='Рецепт', text='Описание',
+            cooking_time=10, image='cas/aa/bb/recipe.png'
+        )
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        buckets = SharedTable(
+            os.path.join(directory, 'throttle.bin'),
+            slots=64, value_format='dd'
+        )
+        patcher = mock.patch.object(throttling, 'buckets', buckets)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_favorite_and_cart_do_not_use_create_bucket(self):
+        for url in (
+            f'/api/recipes/{self.recipe.pk}/favorite/',
+            f'/api/recipes/{self.recipe.pk}/shopping_cart/',
+        ):
+            for _ in range(3):
+                self.assertEqual(self.client.post(url).status_code, 201)
+                self.assertEqual(self.client.delete(url).status_code, 204)
+
+        # Пустое тело: запрос проходит ограничение и отклоняется
+        # валидацией, второй упирается в пустую корзину
+        self.assertEqual(
+            self.client.post('/api/recipes/', {}, format='json').status_code,
+            400
+        )
+        self.assertEqual(
+            self.client.post('/api/recipes/', {}, format='json').status_code,
+            429
+        )
@@ -0,0 +1,71 @@
+import time
+
+from django.conf import settings
+
+from rest_framework import permissions
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle, SimpleRateThrottle
+
+from utils.shared_memory import SharedTable
+
+
+buckets = SharedTable(
+    settings.THROTTLE_STORE_PATH,
+    slots=settings.THROTTLE_STORE_SLOTS,
+    value_format='dd'
+)
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Ограничение частоты запросов по алгоритму token bucket.
+
+    Корзина определяется атрибутом throttle_scope представления, емкость
+    и скорость пополнения — строкой вида '30/min' в
+    DEFAULT_THROTTLE_RATES. Состояние корзин хранится в общем для всех
+    воркеров файле, поэтому лимит действует на весь сервер, а не на
+    отдельный процесс.
+    """
+
+    parse_rate = SimpleRateThrottle.parse_rate
+
+    def allow_request(self, request, view):
+        scope = getattr(view, 'throttle_scope', None)
+        rate = api_settings.DEFAULT_THROTTLE_RATES.get(scope)
+        if rate is None:
+            return True
+
+        capacity, duration = self.parse_rate(rate)
+        refill = capacity / duration
+        now = time.time()
+
+        if request.user and request.user.is_authenticated:
+            ident = f'user:{request.user.pk}'
+        else:
+            ident = f'ip:{self.get_ident(request)}'
+
+        def take(values):
+            tokens, stamp = values or (capacity, now)
+            tokens = min(capacity, tokens + (now - stamp) * refill)
+            if tokens >= 1:
+                return (tokens - 1, now), None
+            return (tokens, now), (1 - tokens) / refill
+
+        # За duration секунд пустая корзина заполняется целиком, после
+        # этого слот можно отдать другому клиенту
+        self.retry_after = buckets.update(
+            f'{scope}:{ident}', take, ttl=duration
+        )
+        return self.retry_after is None
+
+    def wait(self):
+        return self.retry_after
+
+
+class WriteTokenBucketThrottle(TokenBucketThrottle):
+    """Ограничение только для изменяющих запросов"""
+
+    def allow_request(self, request, view):
+        if request.method in permissions.SAFE_METHODS:
+            return True
+        return super().allow_request(request, view)
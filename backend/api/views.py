@@ -1,8 +1,13 @@
 from django_filters.rest_framework import DjangoFilterBackend
 
-from django.http import HttpRequest, HttpResponse
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect
 from django.contrib.auth import get_user_model
+from django.db.models import (
+    BooleanField, Exists, OuterRef, Prefetch, QuerySet, Value,
+    prefetch_related_objects
+)
 
 from rest_framework.viewsets import ModelViewSet
 from rest_framework import permissions, status
@@ -13,7 +18,14 @@ from rest_framework.viewsets import ReadOnlyModelViewSet
 
 from djoser.views import UserViewSet as DjoserUserViewSet
 
+from . import fast_serializers
+from .caching import get_ingredients_search, get_recipe_id
+from .counters import get_counters
 from .filters import IngredientFilter, RecipeFilter
+from .idempotency import idempotent
+from .mixins import (
+    BatchFetchMixin, EagerLoadingMixin, get_sparse_fields
+)
 from .serializers import (
     IngredientSerializer, CustomUserSerializer,
     RecipeSerializer, ShortRecipeSerializer,
@@ -22,23 +34,88 @@ from .serializers import (
 )
 
 from ingredients.models import Ingredient
-from recipes.models import Recipe
+from ingredients.snapshot import get_snapshot
+from recipes.models import Favorites, Recipe, ShoppingCart
+from recipes.similarity import find_similar
 from users.models import Follower
 
 from .permissions import IsOwnerOrReadOnly
+from .throttling import TokenBucketThrottle, WriteTokenBucketThrottle
 
+from utils.export import iter_ndjson, parse_updated_since
+from tasks.queue import enqueue
 from utils.generate_pdf import generate_txt
+from utils.media import delete_orphan
+from utils.queries import (
+    count_subquery, filter_in_order, limit_per_group
+)
 
 
 User = get_user_model()
 
+USER_FIELDS = (
+    'email', 'id', 'username',
+    'first_name', 'last_name', 'avatar'
+)
+
+
+def annotate_users(
+    queryset: QuerySet, user,
+    fields: tuple = CustomUserSerializer.Meta.fields
+):
+    """
+    Загрузка только выводимых полей пользователя и признака подписки
+    одним запросом вместо отдельного запроса на каждую строку
+    """
+    queryset = queryset.only(
+        'id', *(field for field in USER_FIELDS if field in fields)
+    )
+    if 'is_subscribed' not in fields:
+        return queryset
+
+    if user.is_authenticated:
+        is_subscribed = Exists(
+            Follower.objects.filter(
+                subscriber=user,
+                subscribed=OuterRef('pk')
+            )
+        )
+    else:
+        is_subscribed = Value(False, output_field=BooleanField())
+
+    return queryset.annotate(is_subscribed=is_subscribed)
+
+
+def annotate_recipes(
+    queryset: QuerySet, user,
+    fields: tuple = RecipeSerializer.Meta.fields
+):
+    """
+    Признаки избранного, списка покупок и подписки на автора для
+    RecipeSerializer одним запросом вместо запросов на каждую строку
+    """
+    annotations = {}
+    if 'author' in fields:
+        annotations['author_is_subscribed'] = fast_serializers.user_exists(
+            Follower.objects, user, 'subscriber', 'subscribed', 'author'
+        )
+    if 'is_favorited' in fields:
+        annotations['is_favorited'] = fast_serializers.user_exists(
+            Favorites.objects, user, 'user', 'recipe'
+        )
+    if 'is_in_shopping_cart' in fields:
+        annotations['is_in_shopping_cart'] = fast_serializers.user_exists(
+            ShoppingCart.objects, user, 'user', 'recipe'
+        )
+    return queryset.annotate(**annotations)
+
 
 # ===========================================================
 #                       Ingredients
 # ===========================================================
 
 
-class IngredientViewSet(ReadOnlyModelViewSet):
+class IngredientViewSet(EagerLoadingMixin, ReadOnlyModelViewSet):
     """ViewSet для ингредиентов"""
 
     queryset = Ingredient.objects.all()
@@ -47,22 +124,43 @@ class IngredientViewSet(ReadOnlyModelViewSet):
     filter_backends = (DjangoFilterBackend,)
     filterset_class = IngredientFilter
 
+    def list(self, request: HttpRequest, *args, **kwargs):
+        return Response(get_ingredients_search(
+            request.query_params.get('name', ''),
+            lambda: super(IngredientViewSet, self).list(
+                request, *args, **kwargs
+            ).data
+        ))
+
+    @action(
+        detail=False,
+        methods=('get',),
+        url_path='snapshot',
+        eager_loading=False
+    )
+    def snapshot(self, request: HttpRequest):
+        """
+        Редирект на актуальный снимок справочника.
+
+        Файл снимка версионирован и кешируется навсегда, сам редирект
+        не кешируется.
+        """
+        response = redirect(request.build_absolute_uri(
+            settings.MEDIA_URL + get_snapshot()
+        ))
+        response['Cache-Control'] = 'no-cache'
+        return response
+
 
 # ===========================================================
 #                       Recipes
 # ===========================================================
 
 
-class RecipeViewSet(ModelViewSet):
+class RecipeViewSet(BatchFetchMixin, EagerLoadingMixin, ModelViewSet):
     """Вьюсет для работы с рецептами"""
 
-    queryset = (
-        Recipe.objects.select_related(
-            'author'
-        ).prefetch_related(
-            'ingredients'
-        )
-    )
+    queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
     permission_classes = (
         permissions.IsAuthenticatedOrReadOnly,
@@ -70,16 +168,120 @@ class RecipeViewSet(ModelViewSet):
     )
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
+    throttle_classes = (WriteTokenBucketThrottle,)
+    throttle_scope = 'recipes_write'
+    # Избранное и список покупок переключаются часто и дешево,
+    # корзина recipes_write только для записи самого рецепта
+    throttled_actions = ('create', 'update', 'partial_update')
+
+    def get_throttles(self):
+        if self.action not in self.throttled_actions:
+            return []
+        return super().get_throttles()
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # Списки при FAST_READ_SERIALIZERS собирает fast_serializers
+        # со своими подзапросами
+        if self.action == 'retrieve' or (
+            self.action in ('list', 'similar')
+            and not settings.FAST_READ_SERIALIZERS
+        ):
+            return annotate_recipes(
+                queryset,
+                self.request.user,
+                get_sparse_fields(self.request, RecipeSerializer.Meta.fields)
+            )
+        return queryset
+
+    @idempotent
+    def create(self, request: HttpRequest, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
 
     def perform_create(self, serializer: RecipeSerializer):
         serializer.save(author=self.request.user)
 
+    def perform_update(self, serializer: RecipeSerializer):
+        old_image = serializer.instance.image.name
+        recipe = serializer.save()
+        if old_image != recipe.image.name:
+            enqueue(delete_orphan, old_image)
+
+    def perform_destroy(self, instance: Recipe):
+        image = instance.image.name
+        instance.delete()
+        if image:
+            enqueue(delete_orphan, image)
+
+    def list(self, request: HttpRequest, *args, **kwargs):
+        if not settings.FAST_READ_SERIALIZERS:
+            return super().list(request, *args, **kwargs)
+
+        fields = get_sparse_fields(request, RecipeSerializer.Meta.fields)
+        rows = fast_serializers.recipe_rows(
+            self.filter_queryset(self.get_queryset()),
+            request.user,
+            fields
+        )
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return Response(
+                fast_serializers.recipes_data(rows, request, fields)
+            )
+        return self.get_paginated_response(
+            fast_serializers.recipes_data(page, request, fields)
+        )
+
+    @action(
+        detail=True,
+        methods=('get',),
+        url_path='similar',
+        url_name='similar',
+        permission_classes=(permissions.AllowAny,)
+    )
+    def similar(self, request: HttpRequest, pk=None):
+        """
+        Рецепты с похожим набором ингредиентов, от самых похожих.
+
+        Количество задается параметром ?limit=.
+        """
+        recipe = get_object_or_404(Recipe.objects.only('pk'), pk=pk)
+        try:
+            limit = int(request.query_params.get(
+                'limit', settings.SIMILAR_DEFAULT_LIMIT
+            ))
+        except ValueError:
+            limit = settings.SIMILAR_DEFAULT_LIMIT
+        limit = max(1, min(limit, settings.SIMILAR_MAX_LIMIT))
+
+        ids = [
+            recipe_id for recipe_id, _ in find_similar(recipe.pk, limit)
+        ]
+        queryset = filter_in_order(self.get_queryset(), ids)
+        if settings.FAST_READ_SERIALIZERS:
+            fields = get_sparse_fields(request, RecipeSerializer.Meta.fields)
+            return Response(fast_serializers.recipes_data(
+                fast_serializers.recipe_rows(queryset, request.user, fields),
+                request,
+                fields
+            ))
+        return Response(self.get_serializer(queryset, many=True).data)
+
+    def get_short_recipe_data(self, recipe: Recipe):
+        if settings.FAST_READ_SERIALIZERS:
+            return fast_serializers.short_recipe_data(
+                recipe, fast_serializers.MediaURL()
+            )
+        return ShortRecipeSerializer(recipe).data
+
     @action(
         detail=True,
         methods=('get',),
         permission_classes=(permissions.AllowAny,),
         url_path='get-link',
-        queryset=Recipe.objects.all()
+        url_name='get-link',
+        queryset=Recipe.objects.all(),
+        eager_loading=False
     )
     def get_recipe_link(self, request: HttpRequest, pk=None):
         """Метод для получения короткой ссылки на рецепт"""
@@ -94,9 +296,12 @@ class RecipeViewSet(ModelViewSet):
         detail=True,
         methods=('post', 'delete'),
         url_path='favorite',
+        url_name='favorite',
         permission_classes=(permissions.IsAuthenticated,),
-        queryset=Recipe.objects.all()
+        queryset=Recipe.objects.all(),
+        eager_loading=False
     )
+    @idempotent
     def favorite_method(self, request: HttpRequest, pk=None):
         """Метод для добавления и удаления рецепта из избранного"""
         recipe = self.get_object()
@@ -110,9 +315,8 @@ class RecipeViewSet(ModelViewSet):
                 )
 
             recipe.in_featured.add(request.user)
-            serializer = ShortRecipeSerializer(recipe)
             return Response(
-                data=serializer.data,
+                data=self.get_short_recipe_data(recipe),
                 status=status.HTTP_201_CREATED
             )
 
@@ -130,9 +334,12 @@ class RecipeViewSet(ModelViewSet):
         detail=True,
         methods=('post', 'delete'),
         url_path='shopping_cart',
+        url_name='shopping-cart',
         permission_classes=(permissions.IsAuthenticated,),
         queryset=Recipe.objects.all(),
+        eager_loading=False
     )
+    @idempotent
     def shopping_cart_method(self, request: HttpRequest, pk=None):
         """Метод для добавления и удаления рецепта из корзины покупок"""
         recipe = self.get_object()
@@ -146,9 +353,8 @@ class RecipeViewSet(ModelViewSet):
                 )
 
             recipe.in_shopping_cart.add(user)
-            serializer = ShortRecipeSerializer(recipe)
             return Response(
-                data=serializer.data,
+                data=self.get_short_recipe_data(recipe),
                 status=status.HTTP_201_CREATED
             )
 
@@ -190,6 +396,35 @@ class RecipeViewSet(ModelViewSet):
         )
         return response
 
+    @action(
+        detail=False,
+        methods=('get',),
+        url_path='export',
+        permission_classes=(permissions.IsAdminUser,)
+    )
+    def export(self, request: HttpRequest):
+        """Потоковая выгрузка всех рецептов в формате NDJSON"""
+        queryset = Recipe.objects.all()
+        updated_since = request.query_params.get('updated_since')
+
+        if updated_since:
+            updated_since = parse_updated_since(updated_since)
+            if updated_since is None:
+                return Response(
+                    data={'detail': 'Неверный формат updated_since'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            queryset = queryset.filter(updated_at__gte=updated_since)
+
+        response = StreamingHttpResponse(
+            iter_ndjson(queryset),
+            content_type='application/x-ndjson; charset=utf-8'
+        )
+        response['Content-Disposition'] = (
+            'attachment; filename="recipes.ndjson"'
+        )
+        return response
+
 
 class RecipeByShortLinkAPIView(APIView):
     """
@@ -198,13 +433,11 @@ class RecipeByShortLinkAPIView(APIView):
     """
 
     permission_classes = (permissions.AllowAny,)
+    throttle_classes = (TokenBucketThrottle,)
+    throttle_scope = 'short_link'
 
     def get(self, request: HttpRequest, *args, **kwargs):
-        recipe = get_object_or_404(
-            Recipe,
-            short_code=kwargs['code']
-        )
-        return redirect(f'/recipes/{recipe.pk}/')
+        return redirect(f'/recipes/{get_recipe_id(kwargs["code"])}/')
 
 
 # ===========================================================
@@ -212,10 +445,24 @@ class RecipeByShortLinkAPIView(APIView):
 # ===========================================================
 
 
-class CustomUserViewSet(DjoserUserViewSet):
+class CustomUserViewSet(
+    BatchFetchMixin, EagerLoadingMixin, DjoserUserViewSet
+):
     queryset = User.objects.all()
     serializer_class = CustomUserSerializer
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve'):
+            return annotate_users(
+                queryset,
+                self.request.user,
+                get_sparse_fields(
+                    self.request, CustomUserSerializer.Meta.fields
+                )
+            )
+        return queryset
+
     @action(
         detail=False,
         methods=('get',),
@@ -229,12 +476,27 @@ class CustomUserViewSet(DjoserUserViewSet):
             status=status.HTTP_200_OK
         )
 
+    @action(
+        detail=False,
+        methods=('get',),
+        url_path='me/counters',
+        url_name='counters',
+        permission_classes=(permissions.IsAuthenticated,)
+    )
+    def counters(self, request: HttpRequest):
+        """Количество рецептов в корзине, избранном, подписок и рецептов"""
+        response = Response(get_counters(request.user))
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
     @action(
         detail=True,
         methods=('post', 'delete'),
         url_path='subscribe',
+        url_name='subscribe',
         permission_classes=(permissions.IsAuthenticated,)
     )
+    @idempotent
     def follow(self, request: HttpRequest, id=None):
         """Метод для подписки и отписки от пользователя"""
         user_to_follow = self.get_object()
@@ -284,15 +546,47 @@ class CustomUserViewSet(DjoserUserViewSet):
         detail=False,
         methods=('get',),
         url_path='subscriptions',
+        url_name='subscriptions',
         permission_classes=(permissions.IsAuthenticated,)
     )
     def followers_list(self, request: HttpRequest):
         """Метод для вывода всех подписок пользователя"""
         user = request.user
-        queryset = User.objects.filter(
-            subscribers__subscriber=user
+        fields = get_sparse_fields(request, FollowSerializer.Meta.fields)
+        queryset = annotate_users(
+            User.objects.filter(subscribers__subscriber=user),
+            user,
+            fields
         )
+        if 'recipes_count' in fields:
+            queryset = queryset.annotate(
+                recipes_count=count_subquery(Recipe.objects, 'author')
+            )
+
+        if settings.FAST_READ_SERIALIZERS:
+            page = self.paginate_queryset(
+                fast_serializers.follow_rows(queryset, fields)
+            )
+            return self.get_paginated_response(
+                fast_serializers.follows_data(page, request, fields)
+            )
+
         page = self.paginate_queryset(queryset)
+        if 'recipes' in fields:
+            # Нумерация рецептов для recipes_limit только по авторам
+            # текущей страницы, а не по всей таблице
+            recipes = Recipe.objects.filter(
+                author_id__in=[author.pk for author in page]
+            ).only('id', 'name', 'image', 'cooking_time', 'author_id')
+            recipes_limit = request.query_params.get('recipes_limit')
+            if recipes_limit:
+                recipes = limit_per_group(
+                    recipes, 'author_id', int(recipes_limit)
+                )
+            prefetch_related_objects(
+                page, Prefetch('recipes', queryset=recipes.order_by('pk'))
+            )
+
         serializer = FollowSerializer(
             page,
             many=True,
@@ -307,9 +601,13 @@ class CustomUserViewSet(DjoserUserViewSet):
         permission_classes=(permissions.IsAuthenticated,)
     )
     def avatar(self, request: HttpRequest):
-        """Метод для изменения и удаления аватара"""
+        """
+        Метод для изменения и удаления аватара.
+
+        Старый файл удаляется фоновой задачей после ответа.
+        """
         user = request.user
-        user.avatar.delete(save=False)
+        old_avatar = user.avatar.name
 
         if request.method == 'PUT':
             serializer = AvatarSerializer(
@@ -320,6 +618,8 @@ class CustomUserViewSet(DjoserUserViewSet):
             )
             if serializer.is_valid():
                 serializer.save()
+                if old_avatar and old_avatar != user.avatar.name:
+                    enqueue(delete_orphan, old_avatar)
                 return Response(serializer.data)
             return Response(
                 data=serializer.errors,
@@ -327,7 +627,10 @@ class CustomUserViewSet(DjoserUserViewSet):
             )
 
         elif request.method == 'DELETE':
+            user.avatar = None
             user.save()
+            if old_avatar:
+                enqueue(delete_orphan, old_avatar)
             return Response(
                 status=status.HTTP_204_NO_CONTENT
             )
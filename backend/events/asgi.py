@@ -0,0 +1,193 @@
+"""
+SSE-поток новых рецептов авторов, на которых подписан пользователь.
+
+Обрабатывается ASGI-приложением без Django-обработчика запросов:
+открытое соединение — это задача цикла событий и ограниченная очередь,
+без потока и соединения с базой. База нужна только при подключении:
+проверка токена, список подписок и пропущенные рецепты по
+Last-Event-ID.
+
+Формат события:
+
+    id: <id рецепта>
+    event: recipe
+    data: {"id": <id рецепта>, "author": <id автора>}
+
+Раз в EVENTS_HEARTBEAT_INTERVAL секунд отправляется комментарий,
+чтобы прокси не закрывали простаивающее соединение. Событие resync
+означает, что часть событий потеряна и список нужно перечитать.
+"""
+import asyncio
+import json
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from rest_framework.authtoken.models import Token
+
+from .bridge import start_listener
+from .broker import broker
+from recipes.models import Recipe
+from users.models import Follower
+
+
+def get_header(scope, name: bytes):
+    for key, value in scope['headers']:
+        if key == name:
+            return value.decode('latin-1')
+    return None
+
+
+def get_token(scope):
+    """
+    Токен из заголовка Authorization или параметра ?token=.
+
+    EventSource в браузере не умеет передавать заголовки. Строка
+    запроса с токеном попадает в журналы доступа, поэтому nginx пишет
+    для /api/events/ только путь (log_format events), а uvicorn
+    запускается с --no-access-log.
+    """
+    authorization = get_header(scope, b'authorization') or ''
+    keyword, _, key = authorization.partition(' ')
+    if keyword == 'Token' and key:
+        return key
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    return query.get('token', [None])[0]
+
+
+def get_last_event_id(scope):
+    value = get_header(scope, b'last-event-id')
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def database(func):
+    """Синхронный запрос к базе с закрытием устаревших соединений"""
+    def wrapper(*args):
+        close_old_connections()
+        try:
+            return func(*args)
+        finally:
+            close_old_connections()
+    return sync_to_async(wrapper)
+
+
+@database
+def get_user_id(key: str):
+    token = Token.objects.select_related('user').filter(key=key).first()
+    if token is None or not token.user.is_active:
+        return None
+    return token.user_id
+
+
+@database
+def get_authors(user_id: int):
+    return set(Follower.objects.filter(
+        subscriber_id=user_id
+    ).values_list('subscribed_id', flat=True))
+
+
+@database
+def get_missed(authors: set, last_event_id: int):
+    """Рецепты, созданные за время переподключения клиента"""
+    return [
+        {'id': recipe_id, 'author': author_id}
+        for recipe_id, author_id in Recipe.objects.filter(
+            author_id__in=authors, pk__gt=last_event_id
+        ).order_by('pk').values_list('pk', 'author_id')[
+            :settings.EVENTS_BACKLOG_LIMIT
+        ]
+    ]
+
+
+def format_event(event: dict):
+    return (
+        f'id: {event["id"]}\nevent: recipe\n'
+        f'data: {json.dumps(event)}\n\n'
+    ).encode()
+
+
+HEARTBEAT = b': ping\n\n'
+RESYNC = b'event: resync\ndata: {}\n\n'
+
+
+async def send_error(send, status: int, detail: str):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', b'application/json; charset=utf-8')],
+    })
+    await send({
+        'type': 'http.response.body',
+        'body': json.dumps({'detail': detail}, ensure_ascii=False).encode(),
+    })
+
+
+async def wait_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+
+async def stream(scope, receive, send):
+    if scope['method'] != 'GET':
+        await send_error(send, 405, 'Метод не разрешен')
+        return
+
+    key = get_token(scope)
+    user_id = key and await get_user_id(key)
+    if not user_id:
+        await send_error(send, 401, 'Учетные данные не были предоставлены')
+        return
+
+    authors = await get_authors(user_id)
+    start_listener()
+    subscription = broker.subscribe(user_id, authors)
+    disconnected = asyncio.ensure_future(wait_disconnect(receive))
+    try:
+        last_event_id = get_last_event_id(scope)
+        missed = []
+        if last_event_id is not None and authors:
+            missed = await get_missed(authors, last_event_id)
+
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        body = f'retry: {settings.EVENTS_RETRY_MS}\n\n'.encode()
+        body += b''.join(format_event(event) for event in missed)
+        await send({
+            'type': 'http.response.body', 'body': body, 'more_body': True
+        })
+
+        while not disconnected.done():
+            if subscription.overflowed:
+                subscription.drain()
+                chunk = RESYNC
+            else:
+                received = asyncio.ensure_future(subscription.queue.get())
+                await asyncio.wait(
+                    (received, disconnected),
+                    timeout=settings.EVENTS_HEARTBEAT_INTERVAL,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if not received.done():
+                    received.cancel()
+                    chunk = HEARTBEAT
+                else:
+                    chunk = format_event(received.result())
+            if disconnected.done():
+                break
+            await send({
+                'type': 'http.response.body', 'body': chunk, 'more_body': True
+            })
+    finally:
+        broker.unsubscribe(subscription)
+        disconnected.cancel()
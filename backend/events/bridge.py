@@ -0,0 +1,84 @@
+"""
+Передача событий между процессами через PostgreSQL LISTEN/NOTIFY.
+
+Процесс, сохранивший рецепт, отправляет pg_notify после фиксации
+транзакции, а каждый ASGI-процесс держит отдельное соединение с
+LISTEN в фоновом потоке и передает сообщения своему брокеру. На
+других базах сообщение сразу уходит брокеру текущего процесса.
+"""
+import json
+import logging
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.db import connection, connections
+
+from .broker import broker
+
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_DELAY = 5
+
+
+def send(message: dict):
+    if connection.vendor != 'postgresql':
+        broker.dispatch(message)
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT pg_notify(%s, %s)',
+            (settings.EVENTS_CHANNEL, json.dumps(message))
+        )
+
+
+class Listener(threading.Thread):
+    """Поток с LISTEN, переподключается при обрыве соединения"""
+
+    def __init__(self):
+        super().__init__(name='events-listener', daemon=True)
+
+    def run(self):
+        while True:
+            try:
+                self.listen()
+            except Exception:
+                logger.exception('Обрыв соединения LISTEN')
+            time.sleep(RECONNECT_DELAY)
+
+    def listen(self):
+        import psycopg2
+
+        database = connections['default']
+        channel = database.ops.quote_name(settings.EVENTS_CHANNEL)
+        listener = psycopg2.connect(**database.get_connection_params())
+        try:
+            listener.autocommit = True
+            with listener.cursor() as cursor:
+                cursor.execute(f'LISTEN {channel}')
+            while True:
+                if not select.select([listener], [], [], 60)[0]:
+                    continue
+                listener.poll()
+                while listener.notifies:
+                    notify = listener.notifies.pop(0)
+                    broker.dispatch(json.loads(notify.payload))
+        finally:
+            listener.close()
+
+
+listener = None
+listener_lock = threading.Lock()
+
+
+def start_listener():
+    """Запуск слушателя при первом SSE-соединении процесса"""
+    global listener
+    if connection.vendor != 'postgresql':
+        return
+    with listener_lock:
+        if listener is None:
+            listener = Listener()
+            listener.start()
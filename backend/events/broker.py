@@ -0,0 +1,103 @@
+"""
+Внутрипроцессная рассылка событий открытым SSE-соединениям.
+
+Подписки хранятся по авторам: новый рецепт доставляется за один
+поиск в словаре без запросов к базе. Все изменения структур брокера
+выполняются в потоке цикла событий; сообщения из других потоков
+(слушатель LISTEN/NOTIFY, синхронный код) передаются через
+call_soon_threadsafe.
+"""
+import asyncio
+from collections import defaultdict
+
+from django.conf import settings
+
+
+class Subscription:
+    """
+    Очередь событий одного соединения.
+
+    Очередь ограничена EVENTS_QUEUE_SIZE: если клиент не успевает
+    читать, новые события отбрасываются, а соединение получает
+    признак overflowed и просит клиента перечитать список.
+    """
+
+    def __init__(self, user_id: int, authors: set):
+        self.user_id = user_id
+        self.authors = authors
+        self.queue = asyncio.Queue(maxsize=settings.EVENTS_QUEUE_SIZE)
+        self.overflowed = False
+
+    def push(self, event: dict):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    def drain(self):
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.overflowed = False
+
+
+class Broker:
+    def __init__(self):
+        self.loop = None
+        self.by_author = defaultdict(set)
+        self.by_user = defaultdict(set)
+
+    def subscribe(self, user_id: int, authors: set):
+        """Регистрация соединения; вызывается в цикле событий"""
+        self.loop = asyncio.get_running_loop()
+        subscription = Subscription(user_id, set(authors))
+        self.by_user[user_id].add(subscription)
+        for author_id in subscription.authors:
+            self.by_author[author_id].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        self.discard(self.by_user, subscription.user_id, subscription)
+        for author_id in subscription.authors:
+            self.discard(self.by_author, author_id, subscription)
+
+    @staticmethod
+    def discard(index: dict, key: int, subscription: Subscription):
+        subscriptions = index.get(key)
+        if subscriptions is None:
+            return
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del index[key]
+
+    def dispatch(self, message: dict):
+        """
+        Передача сообщения из любого потока.
+
+        Пока в процессе нет ни одного соединения, сообщение отбрасывается.
+        """
+        if self.loop is None or self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(self.deliver, message)
+
+    def deliver(self, message: dict):
+        if message['type'] == 'recipe':
+            event = {'id': message['recipe'], 'author': message['author']}
+            for subscription in self.by_author.get(message['author'], ()):
+                subscription.push(event)
+        elif message['type'] == 'follow':
+            self.follow(
+                message['subscriber'], message['author'], message['active']
+            )
+
+    def follow(self, user_id: int, author_id: int, active: bool):
+        """Подписка или отписка пользователя во время открытого соединения"""
+        for subscription in self.by_user.get(user_id, ()):
+            if active:
+                subscription.authors.add(author_id)
+                self.by_author[author_id].add(subscription)
+            else:
+                subscription.authors.discard(author_id)
+                self.discard(self.by_author, author_id, subscription)
+
+
+broker = Broker()
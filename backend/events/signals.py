@@ -0,0 +1,35 @@
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .bridge import send
+from recipes.models import Recipe
+from users.models import Follower
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_created(sender, instance, created, raw=False, **kwargs):
+    """Новый рецепт уходит подписчикам автора после фиксации транзакции"""
+    if not created or raw:
+        return
+    transaction.on_commit(partial(send, {
+        'type': 'recipe',
+        'author': instance.author_id,
+        'recipe': instance.pk,
+    }))
+
+
+@receiver(post_save, sender=Follower)
+@receiver(post_delete, sender=Follower)
+def follow_changed(sender, instance, raw=False, **kwargs):
+    """Открытые соединения подписчика начинают или перестают получать автора"""
+    if raw:
+        return
+    transaction.on_commit(partial(send, {
+        'type': 'follow',
+        'subscriber': instance.subscriber_id,
+        'author': instance.subscribed_id,
+        'active': kwargs.get('signal') is post_save,
+    }))
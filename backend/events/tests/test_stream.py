@@ -0,0 +1,181 @@
+"""
+SSE-поток events.asgi.stream с поддельными scope, receive и send.
+
+Сообщения сигналов уходят брокеру после фиксации транзакции, поэтому
+изменения выполняются под captureOnCommitCallbacks(execute=True).
+"""
+import asyncio
+import json
+from unittest import mock
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+
+from events import asgi
+from events.broker import broker
+from recipes.models import Recipe
+from users.models import Follower
+
+
+User = get_user_model()
+
+# Чтобы ожидание «события нет» не затягивало тесты
+QUIET = 0.2
+
+
+class StreamClient:
+    """Поддельное HTTP-соединение ASGI"""
+
+    def __init__(self, token=None, last_event_id=None):
+        headers = []
+        if token is not None:
+            headers.append((b'authorization', f'Token {token}'.encode()))
+        if last_event_id is not None:
+            headers.append((b'last-event-id', str(last_event_id).encode()))
+        self.scope = {
+            'type': 'http', 'method': 'GET', 'path': '/api/events/',
+            'query_string': b'', 'headers': headers,
+        }
+        self.messages = asyncio.Queue()
+        self.disconnected = asyncio.Event()
+
+    async def receive(self):
+        await self.disconnected.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(self, message):
+        await self.messages.put(message)
+
+    async def __aenter__(self):
+        self.task = asyncio.ensure_future(
+            asgi.stream(self.scope, self.receive, self.send)
+        )
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.disconnected.set()
+        await asyncio.wait_for(self.task, 1)
+
+    async def next(self, timeout=1):
+        return await asyncio.wait_for(self.messages.get(), timeout)
+
+    async def body(self, timeout=1):
+        return (await self.next(timeout))['body']
+
+    async def start(self):
+        """Статус ответа и первый блок (retry и пропущенные события)"""
+        start = await self.next()
+        return start['status'], await self.body()
+
+    async def assert_silent(self, test):
+        with test.assertRaises(asyncio.TimeoutError):
+            await self.next(QUIET)
+
+
+def event_ids(body: bytes):
+    return [
+        json.loads(line[len('data: '):])['id']
+        for line in body.decode().splitlines()
+        if line.startswith('data: ')
+    ]
+
+
+# Соединение теста открыто внутри его транзакции, закрывать нельзя
+@mock.patch.object(asgi, 'close_old_connections', lambda: None)
+@override_settings(EVENTS_HEARTBEAT_INTERVAL=60)
+class StreamTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader, cls.author, cls.stranger = (
+            User.objects.create(
+                email=f'{name}@example.com', username=name,
+                first_name='Имя', last_name='Фамилия'
+            )
+            for name in ('reader', 'author', 'stranger')
+        )
+        cls.token = Token.objects.create(user=cls.reader).key
+        Follower.objects.create(subscriber=cls.reader, subscribed=cls.author)
+
+    def create_recipe(self, author):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Recipe.objects.create(
+                author=author, name='Рецепт', text='Описание',
+                cooking_time=10, image='cas/aa/bb/recipe.png'
+            ).pk
+
+    def set_follow(self, author, active):
+        with self.captureOnCommitCallbacks(execute=True):
+            if active:
+                Follower.objects.create(
+                    subscriber=self.reader, subscribed=author
+                )
+            else:
+                Follower.objects.filter(
+                    subscriber=self.reader, subscribed=author
+                ).delete()
+
+    async def test_unauthorized(self):
+        for token in (None, 'bad-token'):
+            async with StreamClient(token) as client:
+                status, body = await client.start()
+            self.assertEqual(status, 401)
+            self.assertIn('detail', json.loads(body))
+
+    async def test_recipes_of_followed_authors(self):
+        async with StreamClient(self.token) as client:
+            status, body = await client.start()
+            self.assertEqual(status, 200)
+            self.assertEqual(body, b'retry: 5000\n\n')
+
+            recipe_id = await sync_to_async(self.create_recipe)(self.author)
+            body = await client.body()
+            self.assertEqual(event_ids(body), [recipe_id])
+            self.assertIn(f'id: {recipe_id}\nevent: recipe\n', body.decode())
+
+            await sync_to_async(self.create_recipe)(self.stranger)
+            await client.assert_silent(self)
+
+    async def test_follow_while_connected(self):
+        async with StreamClient(self.token) as client:
+            await client.start()
+            await sync_to_async(self.set_follow)(self.stranger, True)
+            recipe_id = await sync_to_async(self.create_recipe)(self.stranger)
+            self.assertEqual(event_ids(await client.body()), [recipe_id])
+
+            await sync_to_async(self.set_follow)(self.author, False)
+            await sync_to_async(self.create_recipe)(self.author)
+            await client.assert_silent(self)
+
+    async def test_last_event_id_backlog(self):
+        create = sync_to_async(self.create_recipe)
+        first = await create(self.author)
+        await create(self.stranger)
+        second = await create(self.author)
+        async with StreamClient(self.token, last_event_id=first) as client:
+            status, body = await client.start()
+        self.assertEqual(status, 200)
+        self.assertEqual(event_ids(body), [second])
+
+    @override_settings(EVENTS_QUEUE_SIZE=2)
+    async def test_overflow_resync(self):
+        async with StreamClient(self.token) as client:
+            await client.start()
+            # Три события подряд без переключения на поток: третье не
+            # помещается в очередь
+            for recipe_id in (1, 2, 3):
+                broker.deliver({
+                    'type': 'recipe',
+                    'recipe': recipe_id,
+                    'author': self.author.pk,
+                })
+            self.assertEqual(event_ids(await client.body()), [1])
+            self.assertEqual(await client.body(), asgi.RESYNC)
+            await client.assert_silent(self)
+
+    @override_settings(EVENTS_HEARTBEAT_INTERVAL=0.05)
+    async def test_heartbeat(self):
+        async with StreamClient(self.token) as client:
+            await client.start()
+            self.assertEqual(await client.body(), asgi.HEARTBEAT)
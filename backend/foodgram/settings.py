@@ -12,6 +12,7 @@ https://docs.djangoproject.com/en/3.2/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -49,15 +50,21 @@ INSTALLED_APPS = [
     'users',
     'ingredients',
     'recipes',
+    'tasks',
+    'profiling',
+    'metrics',
+    'events',
     'api'
 ]
 
 MIDDLEWARE = [
+    'metrics.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'profiling.middleware.ProfilerMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -98,6 +105,23 @@ DATABASES = {
 }
 
 
+# Хешер новых паролей; остальные из списка только проверяют старые хеши
+# и при входе заменяются основным
+PASSWORD_HASHER = os.getenv('PASSWORD_HASHER', 'pbkdf2')
+PASSWORD_HASHER_CHOICES = {
+    'pbkdf2': 'utils.hashers.TunedPBKDF2PasswordHasher',
+    'argon2': 'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'bcrypt': 'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+}
+PASSWORD_HASHERS = [PASSWORD_HASHER_CHOICES[PASSWORD_HASHER]] + [
+    hasher for name, hasher in PASSWORD_HASHER_CHOICES.items()
+    if name != PASSWORD_HASHER
+]
+PASSWORD_PBKDF2_ITERATIONS = int(
+    os.getenv('PASSWORD_PBKDF2_ITERATIONS', 260_000)
+)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
 
@@ -140,6 +164,107 @@ STATIC_ROOT = '/app/static/backend_static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+DEFAULT_FILE_STORAGE = 'utils.storage.ContentAddressedStorage'
+
+# Поля, ссылки из которых учитываются перед удалением файла
+CONTENT_STORAGE_REFERENCES = (
+    'recipes.Recipe.image',
+    'users.CustomUser.avatar',
+)
+# Файлы моложе стольких секунд хранилище не удаляет, секунды
+CONTENT_STORAGE_DELETE_GRACE = 10 * 60
+
+# Фоновые задачи (tasks.queue, manage.py run_workers)
+TASKS_ALWAYS_EAGER = os.getenv('TASKS_ALWAYS_EAGER', 'False') == 'True'
+TASKS_WORKER_PROCESSES = int(os.getenv('TASKS_WORKER_PROCESSES', 2))
+TASKS_VISIBILITY_TIMEOUT = 300
+TASKS_MAX_ATTEMPTS = 5
+TASKS_RETRY_BACKOFF = 10
+TASKS_RETRY_BACKOFF_MAX = 3600
+
+# Рейтинг популярных рецептов (recipes.trending, ?ordering=trending)
+TRENDING_HALF_LIFE_HOURS = 72
+TRENDING_WEIGHTS = {
+    'favorite': 1.0,
+    'shopping_cart': 0.5,
+}
+TRENDING_WINDOW_DAYS = 30
+TRENDING_LAG_SECONDS = 60
+TRENDING_REFRESH_INTERVAL = 300
+
+# Заголовок Idempotency-Key (api.idempotency), секунды
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+# Через столько секунд без продления ключ упавшего запроса освобождается
+IDEMPOTENCY_LOCK_TIMEOUT = 60
+
+# Общий для воркеров кеш в отображенном в память файле (utils.mmap_cache)
+CACHES = {
+    'default': {
+        'BACKEND': 'utils.mmap_cache.MmapCache',
+        'LOCATION': os.getenv(
+            'CACHE_PATH',
+            os.path.join(tempfile.gettempdir(), 'foodgram-cache.bin')
+        ),
+        'OPTIONS': {
+            'SLOTS': int(os.getenv('CACHE_SLOTS', 8192)),
+            'WAYS': 8,
+            'SLOT_SIZE': 4096,
+        },
+    }
+}
+AUTH_TOKEN_CACHE_TIMEOUT = 300
+SHORT_LINK_CACHE_TIMEOUT = 24 * 60 * 60
+INGREDIENTS_SEARCH_CACHE_TIMEOUT = 60 * 60
+
+# Метрики запросов (metrics.middleware.MetricsMiddleware, /metrics)
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'True') == 'True'
+METRICS_STORE_PATH = os.getenv(
+    'METRICS_STORE_PATH',
+    os.path.join(tempfile.gettempdir(), 'foodgram-metrics.bin')
+)
+METRICS_STORE_SLOTS = 4096
+METRICS_ALLOWED_NETWORKS = (
+    '127.0.0.0/8', '10.0.0.0/8', '172.16.0.0/12',
+    '192.168.0.0/16', '::1/128', 'fc00::/7',
+)
+
+# Профилирование запросов (profiling.middleware.ProfilerMiddleware)
+PROFILER_ENABLED = os.getenv('PROFILER_ENABLED', 'False') == 'True'
+PROFILER_SAMPLE_RATE = int(os.getenv('PROFILER_SAMPLE_RATE', 0))
+PROFILER_MAX_PROFILES = 200
+PROFILER_DIR = os.getenv('PROFILER_DIR', BASE_DIR / 'profiles')
+
+# Кеш счетчиков /api/users/me/counters/, секунды
+COUNTERS_CACHE_TIMEOUT = 300
+
+# Наибольшее число id в ?ids= списков рецептов и пользователей
+BATCH_FETCH_MAX_IDS = 100
+
+# SSE-поток новых рецептов (events, foodgram.asgi)
+EVENTS_PATH = '/api/events/'
+EVENTS_CHANNEL = 'foodgram_events'
+EVENTS_QUEUE_SIZE = 100
+EVENTS_HEARTBEAT_INTERVAL = 15
+EVENTS_BACKLOG_LIMIT = 100
+EVENTS_RETRY_MS = 5000
+
+# Похожие рецепты по MinHash/LSH (recipes.similarity); после изменения
+# первых трех значений нужен build_similarity_index
+SIMILAR_NUM_HASHES = 64
+SIMILAR_BAND_SIZE = 4
+SIMILAR_SEED = 1
+SIMILAR_MAX_CANDIDATES = 200
+SIMILAR_DEFAULT_LIMIT = 6
+SIMILAR_MAX_LIMIT = 50
+SIMILAR_DUPLICATE_THRESHOLD = 0.8
+
+# Каталог снимков справочника ингредиентов внутри MEDIA_ROOT
+INGREDIENTS_SNAPSHOT_DIR = 'snapshots'
+
+# Каталоги MEDIA_ROOT, которые не обходит gc_media
+MEDIA_GC_EXCLUDE = (INGREDIENTS_SNAPSHOT_DIR, '.storage.lock')
+MEDIA_GC_QUARANTINE_DIR = BASE_DIR / 'media_quarantine'
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/3.2/ref/settings/#default-auto-field
 
@@ -165,7 +290,7 @@ DJOSER = {
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ],
 
     'DEFAULT_PERMISSION_CLASSES': [
@@ -178,4 +303,23 @@ REST_FRAMEWORK = {
 
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
     'PAGE_SIZE': 6,
+
+    'DEFAULT_THROTTLE_RATES': {
+        'recipes_write': os.getenv('THROTTLE_RECIPES_WRITE', '30/min'),
+        'short_link': os.getenv('THROTTLE_SHORT_LINK', '60/min'),
+    },
+    'NUM_PROXIES': 1,
 }
+
+# Начиная с этого размера таблицы админка показывает оценку числа строк
+ADMIN_ESTIMATED_COUNT_THRESHOLD = 100_000
+
+# Сборка ответов списков из .values() без ModelSerializer
+FAST_READ_SERIALIZERS = True
+
+# Общее для всех воркеров хранилище корзин api.throttling
+THROTTLE_STORE_PATH = os.getenv(
+    'THROTTLE_STORE_PATH',
+    os.path.join(tempfile.gettempdir(), 'foodgram-throttle.bin')
+)
+THROTTLE_STORE_SLOTS = 65536
@@ -2,9 +2,15 @@ from django.contrib import admin
 from django.urls import path, include
 
 from api.views import RecipeByShortLinkAPIView
+from metrics.views import metrics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include('api.urls')),
-    path('s/<str:code>/', RecipeByShortLinkAPIView.as_view()),
+    path(
+        's/<str:code>/',
+        RecipeByShortLinkAPIView.as_view(),
+        name='short-link'
+    ),
+    path('metrics', metrics, name='metrics'),
 ]
@@ -0,0 +1,30 @@
+"""
+Настройки gunicorn.
+
+Приложение загружается в мастер-процессе до форка (preload_app), поэтому
+воркеры используют уже импортированный код через copy-on-write, а не
+импортируют его заново. gc.freeze() переносит объекты мастера в
+постоянное поколение, чтобы сборщик мусора в воркерах не трогал их
+и не копировал страницы памяти.
+"""
+import gc
+import os
+
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+# Каждый воркер держит свое соединение с базой и свою память, поэтому
+# число воркеров задается явно, по умолчанию один, как у gunicorn
+workers = int(os.getenv('GUNICORN_WORKERS', 1))
+preload_app = True
+
+
+def when_ready(server):
+    from django.db import connections
+    from django.urls import get_resolver
+
+    # URLconf со вьюхами Django загружает только к первому запросу
+    get_resolver().url_patterns
+    # Соединения с базой, открытые при загрузке, не должны
+    # достаться воркерам
+    connections.close_all()
+    gc.freeze()
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from ingredients.snapshot import build_snapshot
+
+
+class Command(BaseCommand):
+    help = 'Сборка версионированного снимка справочника ингредиентов'
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Снимок: {build_snapshot()}')
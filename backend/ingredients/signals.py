@@ -0,0 +1,17 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Ingredient
+from .snapshot import refresh
+from tasks.queue import schedule
+
+
+@receiver(post_save, sender=Ingredient)
+@receiver(post_delete, sender=Ingredient)
+def schedule_snapshot_refresh(sender, instance, raw=False, **kwargs):
+    """Пересборка снимка справочника после изменения ингредиента"""
+    # loaddata сохраняет объекты с raw=True; снимок после загрузки
+    # строит команда build_ingredients_snapshot
+    if raw:
+        return
+    schedule(refresh, unique=True)
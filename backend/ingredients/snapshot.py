@@ -0,0 +1,126 @@
+"""
+Версионированный снимок справочника ингредиентов.
+
+Снимок — JSON-файл в MEDIA_ROOT/INGREDIENTS_SNAPSHOT_DIR, имя которого
+содержит хеш содержимого, поэтому его можно кешировать навсегда.
+Рядом лежат gzip-копия для gzip_static и файл current с именем
+актуальной версии.
+"""
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+
+from django.conf import settings
+
+from .models import Ingredient
+
+
+SNAPSHOT_PREFIX = 'ingredients.'
+CURRENT_FILE = 'current'
+# Сколько предыдущих версий оставлять для клиентов, получивших
+# старый редирект
+KEEP_VERSIONS = 2
+
+
+def get_snapshot_dir():
+    return os.path.join(
+        settings.MEDIA_ROOT, settings.INGREDIENTS_SNAPSHOT_DIR
+    )
+
+
+def write_atomic(path: str, content: bytes):
+    """Запись через временный файл, чтобы не отдать файл наполовину"""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(content)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def render_snapshot():
+    """Тело снимка: то же, что отдает /api/ingredients/ без фильтров"""
+    ingredients = list(
+        Ingredient.objects.order_by('pk').values(
+            'id', 'name', 'measurement_unit'
+        )
+    )
+    return json.dumps(
+        ingredients, ensure_ascii=False, separators=(',', ':')
+    ).encode()
+
+
+def get_current():
+    """Имя файла актуального снимка или None"""
+    try:
+        with open(os.path.join(get_snapshot_dir(), CURRENT_FILE)) as file:
+            return file.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def remove_old_versions(directory: str):
+    versions = sorted(
+        (
+            entry for entry in os.scandir(directory)
+            if entry.name.startswith(SNAPSHOT_PREFIX)
+            and entry.name.endswith('.json')
+        ),
+        key=lambda entry: entry.stat().st_mtime,
+        reverse=True
+    )
+    for entry in versions[KEEP_VERSIONS:]:
+        for suffix in ('', '.gz'):
+            try:
+                os.unlink(entry.path + suffix)
+            except FileNotFoundError:
+                pass
+
+
+def build_snapshot():
+    """
+    Генерация снимка.
+
+    Если содержимое не изменилось, файлы не перезаписываются.
+    Возвращает имя файла снимка относительно MEDIA_ROOT.
+    """
+    directory = get_snapshot_dir()
+    os.makedirs(directory, exist_ok=True)
+
+    content = render_snapshot()
+    version = hashlib.sha256(content).hexdigest()[:16]
+    filename = f'{SNAPSHOT_PREFIX}{version}.json'
+    path = os.path.join(directory, filename)
+
+    if not os.path.exists(path):
+        write_atomic(path + '.gz', gzip.compress(content, 9, mtime=0))
+        write_atomic(path, content)
+    else:
+        # Вернувшаяся прежняя версия не должна удалиться как старая
+        os.utime(path)
+
+    if get_current() != filename:
+        write_atomic(
+            os.path.join(directory, CURRENT_FILE), filename.encode()
+        )
+        remove_old_versions(directory)
+
+    return f'{settings.INGREDIENTS_SNAPSHOT_DIR}/{filename}'
+
+
+def get_snapshot():
+    """Имя актуального снимка; при первом обращении снимок создается"""
+    current = get_current()
+    if current is None:
+        return build_snapshot()
+    return f'{settings.INGREDIENTS_SNAPSHOT_DIR}/{current}'
+
+
+def refresh():
+    """Фоновая задача пересборки снимка после изменения справочника"""
+    build_snapshot()
@@ -0,0 +1,59 @@
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpRequest
+
+from .store import observe
+
+
+UNMATCHED_ROUTE = 'unmatched'
+
+
+def get_route(request: HttpRequest):
+    """
+    Имя маршрута вместо пути запроса.
+
+    Для роутеров DRF это basename и действие (recipes-detail,
+    users-subscriptions), для маршрутов без имени — шаблон пути.
+    """
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return UNMATCHED_ROUTE
+    if match.url_name:
+        return match.view_name
+    return match.route or UNMATCHED_ROUTE
+
+
+def get_size(response):
+    if response.has_header('Content-Length'):
+        return int(response['Content-Length'])
+    if response.streaming:
+        return None
+    return len(response.content)
+
+
+class MetricsMiddleware:
+    """
+    Учет длительности, размера и кодов ответов по маршрутам.
+
+    Должна стоять первой в MIDDLEWARE, чтобы учитывать время всей
+    цепочки. При METRICS_ENABLED = False исключается из цепочки.
+    """
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest):
+        started = time.perf_counter()
+        response = self.get_response(request)
+        observe(
+            get_route(request),
+            request.method,
+            response.status_code,
+            time.perf_counter() - started,
+            get_size(response)
+        )
+        return response
@@ -0,0 +1,56 @@
+"""
+Хранилище метрик запросов, общее для всех воркеров.
+
+Для каждой тройки (маршрут, метод, код ответа) в SharedTable лежат
+количество запросов, суммарная длительность, суммарный размер ответов
+и счетчики попаданий в интервалы гистограммы длительности.
+"""
+from bisect import bisect_left
+
+from django.conf import settings
+
+from utils.shared_memory import SharedTable
+
+
+# Верхние границы интервалов гистограммы, секунды
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+KEY_SIZE = 96
+
+table = SharedTable(
+    settings.METRICS_STORE_PATH,
+    slots=settings.METRICS_STORE_SLOTS,
+    value_format='QddQ' + 'Q' * len(BUCKETS),
+    key_size=KEY_SIZE
+)
+
+
+def observe(route: str, method: str, status: int, duration, size):
+    """Учет одного запроса"""
+    bucket = bisect_left(BUCKETS, duration)
+
+    def add(values):
+        if values is None:
+            values = [0, 0.0, 0.0, 0] + [0] * len(BUCKETS)
+        count, duration_sum, size_sum, size_count, *buckets = values
+        if bucket < len(buckets):
+            buckets[bucket] += 1
+        if size is not None:
+            size_sum += size
+            size_count += 1
+        return (
+            (count + 1, duration_sum + duration, size_sum, size_count,
+             *buckets),
+            None
+        )
+
+    table.update(f'{route} {method} {status}', add)
+
+
+def collect():
+    """Снимок всех метрик: список (маршрут, метод, код, значения)"""
+    samples = []
+    for key, values in table.items():
+        route, method, status = key.rsplit(' ', 2)
+        samples.append((route, method, status, values))
+    return sorted(samples)
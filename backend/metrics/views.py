@@ -0,0 +1,92 @@
+import ipaddress
+
+from django.conf import settings
+from django.http import HttpRequest, HttpResponse, HttpResponseForbidden
+
+from .store import BUCKETS, collect
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def is_internal(request: HttpRequest):
+    """
+    Запрос пришел из внутренней сети.
+
+    Проверяется и адрес соединения, и X-Forwarded-For: запрос снаружи,
+    проксированный nginx, тоже приходит с внутреннего адреса.
+    """
+    addresses = [request.META.get('REMOTE_ADDR', '')]
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+    if forwarded:
+        addresses.extend(forwarded.split(','))
+
+    networks = [
+        ipaddress.ip_network(network)
+        for network in settings.METRICS_ALLOWED_NETWORKS
+    ]
+    for address in addresses:
+        try:
+            address = ipaddress.ip_address(address.strip())
+        except ValueError:
+            return False
+        if not any(address in network for network in networks):
+            return False
+    return True
+
+
+def escape(value: str):
+    return (
+        value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    )
+
+
+def render(samples: list):
+    """Текстовый формат Prometheus"""
+    requests = [
+        '# HELP http_requests_total Количество запросов',
+        '# TYPE http_requests_total counter',
+    ]
+    durations = [
+        '# HELP http_request_duration_seconds Длительность запросов',
+        '# TYPE http_request_duration_seconds histogram',
+    ]
+    sizes = [
+        '# HELP http_response_size_bytes Размер ответов',
+        '# TYPE http_response_size_bytes summary',
+    ]
+
+    for route, method, status, values in samples:
+        count, duration_sum, size_sum, size_count, *buckets = values
+        labels = (
+            f'route="{escape(route)}",method="{escape(method)}",'
+            f'status="{status}"'
+        )
+        requests.append(f'http_requests_total{{{labels}}} {count}')
+
+        cumulative = 0
+        for bound, hits in zip(BUCKETS, buckets):
+            cumulative += hits
+            durations.append(
+                f'http_request_duration_seconds_bucket'
+                f'{{{labels},le="{bound}"}} {cumulative}'
+            )
+        durations.extend((
+            f'http_request_duration_seconds_bucket'
+            f'{{{labels},le="+Inf"}} {count}',
+            f'http_request_duration_seconds_sum{{{labels}}} {duration_sum}',
+            f'http_request_duration_seconds_count{{{labels}}} {count}',
+        ))
+        sizes.extend((
+            f'http_response_size_bytes_sum{{{labels}}} {size_sum}',
+            f'http_response_size_bytes_count{{{labels}}} {size_count}',
+        ))
+
+    return '\n'.join(requests + durations + sizes) + '\n'
+
+
+def metrics(request: HttpRequest):
+    """Метрики всех воркеров для Prometheus, только из внутренней сети"""
+    if not is_internal(request):
+        return HttpResponseForbidden()
+    return HttpResponse(render(collect()), content_type=CONTENT_TYPE)
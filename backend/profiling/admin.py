@@ -0,0 +1,83 @@
+import io
+import os
+import pstats
+
+from django.conf import settings
+from django.contrib import admin
+from django.http import FileResponse, Http404
+from django.urls import path, reverse
+from django.utils.html import format_html
+
+from .models import Profile
+
+
+STATS_LIMIT = 60
+
+
+def get_profile_path(profile: Profile):
+    return os.path.join(settings.PROFILER_DIR, profile.file)
+
+
+@admin.register(Profile)
+class ProfileAdmin(admin.ModelAdmin):
+    list_display = (
+        'created_at', 'method', 'path', 'status_code',
+        'duration', 'trigger', 'user'
+    )
+    list_filter = ('trigger', 'method', 'status_code')
+    list_select_related = ('user',)
+    search_fields = ('path',)
+    fields = (
+        'created_at', 'method', 'path', 'status_code', 'duration',
+        'trigger', 'user', 'download', 'stats'
+    )
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def get_urls(self):
+        return [
+            path(
+                '<int:pk>/download/',
+                self.admin_site.admin_view(self.download_view),
+                name='profiling_profile_download'
+            ),
+            *super().get_urls()
+        ]
+
+    def download_view(self, request, pk):
+        profile = self.get_object(request, pk)
+        if profile is None or not os.path.exists(get_profile_path(profile)):
+            raise Http404
+        return FileResponse(
+            open(get_profile_path(profile), 'rb'),
+            as_attachment=True,
+            filename=f'profile-{profile.pk}.prof'
+        )
+
+    def download(self, obj):
+        """Ссылка на файл pstats для snakeviz и подобных"""
+
+        return format_html(
+            '<a href="{}">profile-{}.prof</a>',
+            reverse('admin:profiling_profile_download', args=(obj.pk,)),
+            obj.pk
+        )
+    download.short_description = 'Файл pstats'
+
+    def stats(self, obj):
+        """Самые затратные функции по суммарному времени"""
+
+        stream = io.StringIO()
+        try:
+            pstats.Stats(get_profile_path(obj), stream=stream).sort_stats(
+                pstats.SortKey.CUMULATIVE
+            ).print_stats(STATS_LIMIT)
+        except FileNotFoundError:
+            return 'Файл профиля удален'
+        return format_html('<pre>{}</pre>', stream.getvalue())
+    stats.short_description = 'Статистика'
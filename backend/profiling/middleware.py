@@ -0,0 +1,130 @@
+import cProfile
+import itertools
+import os
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpRequest
+
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .models import Profile
+
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_PARAM = '_profile'
+
+
+def get_staff_user(request: HttpRequest):
+    """
+    Пользователь запроса, если он сотрудник.
+
+    Аутентификация DRF выполняется только во вьюхе, поэтому для запросов
+    с токеном пользователь определяется здесь теми же классами.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        user = None
+        for authentication in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+            try:
+                result = authentication().authenticate(Request(request))
+            except APIException:
+                return None
+            if result is not None:
+                user = result[0]
+                break
+    if user is not None and user.is_staff:
+        return user
+    return None
+
+
+def write_profile(profiler: cProfile.Profile, name: str):
+    """Запись pstats в ячейку буфера через временный файл"""
+    directory = settings.PROFILER_DIR
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory)
+    os.close(fd)
+    try:
+        profiler.dump_stats(tmp_path)
+        os.replace(tmp_path, os.path.join(directory, name))
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class ProfilerMiddleware:
+    """
+    Профилирование отдельных запросов через cProfile.
+
+    Запрос профилируется, если сотрудник передал заголовок X-Profile
+    или параметр ?_profile, либо если он попал в выборку каждого
+    PROFILER_SAMPLE_RATE-го запроса. При PROFILER_ENABLED = False
+    middleware исключается из цепочки и ничего не стоит.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILER_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.PROFILER_SAMPLE_RATE
+        self.counter = itertools.count(1)
+
+    def get_trigger(self, request: HttpRequest):
+        if PROFILE_HEADER in request.headers:
+            return Profile.Trigger.HEADER
+        if PROFILE_PARAM in request.GET:
+            return Profile.Trigger.QUERY
+        if self.sample_rate and next(self.counter) % self.sample_rate == 0:
+            return Profile.Trigger.SAMPLE
+        return None
+
+    def __call__(self, request: HttpRequest):
+        trigger = self.get_trigger(request)
+        user = None
+        if trigger in (Profile.Trigger.HEADER, Profile.Trigger.QUERY):
+            user = get_staff_user(request)
+            if user is None:
+                trigger = None
+        if trigger is None:
+            return self.get_response(request)
+
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            profiler.disable()
+        duration = (time.perf_counter() - started) * 1000
+
+        if user is None:
+            user = getattr(request, 'user', None)
+            if user is not None and not user.is_authenticated:
+                user = None
+        self.save(request, response, profiler, trigger, duration, user)
+        return response
+
+    def save(self, request, response, profiler, trigger, duration, user):
+        """
+        Сохранение профиля в кольцевой буфер.
+
+        Номер ячейки — остаток от деления pk на размер буфера; записи,
+        файлы которых уже перезаписаны, удаляются.
+        """
+        size = settings.PROFILER_MAX_PROFILES
+        profile = Profile.objects.create(
+            method=request.method,
+            path=request.get_full_path()[:2048],
+            status_code=response.status_code,
+            duration=duration,
+            trigger=trigger,
+            user=user
+        )
+        profile.file = f'{profile.pk % size}.prof'
+        write_profile(profiler, profile.file)
+        profile.save(update_fields=('file',))
+        Profile.objects.filter(pk__lte=profile.pk - size).delete()
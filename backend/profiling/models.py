@@ -0,0 +1,60 @@
+from django.conf import settings
+from django.db import models
+
+
+class Profile(models.Model):
+    """
+    Модель профиля запроса.
+
+    Сам профиль в формате pstats лежит в PROFILER_DIR, в ячейке
+    кольцевого буфера из PROFILER_MAX_PROFILES файлов.
+    """
+
+    class Trigger(models.TextChoices):
+        HEADER = 'header', 'Заголовок'
+        QUERY = 'query', 'Параметр запроса'
+        SAMPLE = 'sample', 'Выборка'
+
+    method = models.CharField(
+        verbose_name='Метод',
+        max_length=10
+    )
+    path = models.CharField(
+        verbose_name='Путь',
+        max_length=2048
+    )
+    status_code = models.PositiveSmallIntegerField(
+        verbose_name='Код ответа'
+    )
+    duration = models.FloatField(
+        verbose_name='Длительность, мс'
+    )
+    trigger = models.CharField(
+        verbose_name='Причина',
+        max_length=16,
+        choices=Trigger.choices
+    )
+    user = models.ForeignKey(
+        to=settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+        verbose_name='Пользователь'
+    )
+    file = models.CharField(
+        verbose_name='Файл профиля',
+        max_length=255
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Создан',
+        auto_now_add=True
+    )
+
+    class Meta:
+        verbose_name = 'профиль запроса'
+        verbose_name_plural = 'Профили запросов'
+        ordering = ('-pk',)
+
+    def __str__(self):
+        return f'{self.method} {self.path} ({self.duration:.0f} мс)'
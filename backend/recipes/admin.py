@@ -1,9 +1,16 @@
+from django.conf import settings
 from django.contrib import admin
+from django.db.models import Count
+from django.urls import reverse
+from django.utils.html import format_html, format_html_join
 
 from .models import (
-    Recipe, RecipeIngredient,
+    Recipe, RecipeIngredient, RecipeScore, RecipeSignature,
     ShoppingCart, Favorites
 )
+from .similarity import find_similar, index_recipes
+from utils.paginator import EstimatedCountPaginator
+from utils.queries import count_subquery
 
 
 class RecipeIngredientInline(admin.TabularInline):
@@ -14,33 +21,114 @@ class RecipeIngredientInline(admin.TabularInline):
     autocomplete_fields = ('ingredient',)
 
 
+class DuplicateIngredientsFilter(admin.SimpleListFilter):
+    """Рецепты, набор ингредиентов которых совпадает с другим рецептом"""
+
+    title = 'дубликаты по ингредиентам'
+    parameter_name = 'duplicates'
+
+    def lookups(self, request, model_admin):
+        return (('yes', 'Есть дубликат'),)
+
+    def queryset(self, request, queryset):
+        if self.value() != 'yes':
+            return queryset
+        return queryset.filter(
+            signature__ingredients_key__in=RecipeSignature.objects.values(
+                'ingredients_key'
+            ).annotate(
+                recipes=Count('pk')
+            ).filter(recipes__gt=1).values('ingredients_key')
+        ).order_by('signature__ingredients_key', 'pk')
+
+
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
-    list_display = ('name', 'author')
+    list_display = ('name', 'author', 'favorites_count')
     list_display_links = ('name', 'author')
-    search_fields = ('name', 'author')
-    readonly_fields = ('favorites_count', 'short_code')
+    list_select_related = ('author',)
+    list_filter = (DuplicateIngredientsFilter,)
+    search_fields = ('name', 'author__username')
+    readonly_fields = ('favorites_count', 'short_code', 'similar_recipes')
     autocomplete_fields = ('author',)
     inlines = [RecipeIngredientInline]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            favorites_count=count_subquery(Favorites.objects, 'recipe')
+        )
 
     def favorites_count(self, obj):
         """Количество добавлений рецепта в избранное"""
 
-        return obj.in_featured.count()
+        return getattr(obj, 'favorites_count', None)
     favorites_count.short_description = "В избранном"
+    favorites_count.admin_order_field = 'favorites_count'
+
+    def similar_recipes(self, obj):
+        """
+        Самые похожие по ингредиентам рецепты; с мерой Жаккара от
+        SIMILAR_DUPLICATE_THRESHOLD помечаются как возможные дубликаты
+        """
+        if obj.pk is None:
+            return '-'
+        similar = find_similar(obj.pk, settings.SIMILAR_DEFAULT_LIMIT)
+        names = dict(
+            Recipe.objects.filter(
+                pk__in=[recipe_id for recipe_id, _ in similar]
+            ).values_list('pk', 'name')
+        )
+        return format_html_join(
+            format_html('<br>'),
+            '<a href="{}">{}</a> — {}{}',
+            (
+                (
+                    reverse('admin:recipes_recipe_change', args=(recipe_id,)),
+                    names.get(recipe_id, recipe_id),
+                    f'{score:.2f}',
+                    ' (возможный дубликат)'
+                    if score >= settings.SIMILAR_DUPLICATE_THRESHOLD else ''
+                )
+                for recipe_id, score in similar
+            )
+        ) or '-'
+    similar_recipes.short_description = 'Похожие рецепты'
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        index_recipes([form.instance.pk])
 
 
 @admin.register(Favorites)
 class FavoritesAdmin(admin.ModelAdmin):
     list_display = ('user', 'recipe')
     list_display_links = ('user', 'recipe')
-    search_fields = ('user', 'recipe')
+    list_select_related = ('user', 'recipe')
+    search_fields = ('user__username', 'recipe__name')
     autocomplete_fields = ('user', 'recipe')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(ShoppingCart)
 class ShoppingCartAdmin(admin.ModelAdmin):
     list_display = ('user', 'recipe')
     list_display_links = ('user', 'recipe')
-    search_fields = ('user', 'recipe')
+    list_select_related = ('user', 'recipe')
+    search_fields = ('user__username', 'recipe__name')
     autocomplete_fields = ('user', 'recipe')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+
+@admin.register(RecipeScore)
+class RecipeScoreAdmin(admin.ModelAdmin):
+    list_display = ('recipe', 'score', 'last_event_at')
+    list_select_related = ('recipe',)
+    search_fields = ('recipe__name',)
+    readonly_fields = ('recipe', 'score', 'last_event_at')
+    ordering = ('-score',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+from recipes.similarity import index_recipes
+
+
+class Command(BaseCommand):
+    help = 'Построение индекса похожих рецептов (MinHash/LSH)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Рецептов за один проход'
+        )
+
+    def handle(self, *args, **options):
+        recipe_ids = Recipe.objects.order_by('pk').values_list(
+            'pk', flat=True
+        )
+        batch, total = [], 0
+        for recipe_id in recipe_ids.iterator(chunk_size=options['batch_size']):
+            batch.append(recipe_id)
+            if len(batch) == options['batch_size']:
+                total += index_recipes(batch)
+                batch = []
+        if batch:
+            total += index_recipes(batch)
+        self.stdout.write(f'Проиндексировано рецептов: {total}')
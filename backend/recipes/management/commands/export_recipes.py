@@ -0,0 +1,49 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.models import Recipe
+from utils.export import (
+    DEFAULT_CHUNK_SIZE, iter_ndjson, parse_updated_since
+)
+
+
+class Command(BaseCommand):
+    help = 'Выгрузка всех рецептов с авторами и ингредиентами в NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-o', '--output',
+            default='-',
+            help='Файл для выгрузки ("-" — стандартный вывод)'
+        )
+        parser.add_argument(
+            '--updated-since',
+            help='Выгружать только рецепты, измененные после даты (ISO 8601)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_CHUNK_SIZE,
+            help='Размер пачки при чтении из базы'
+        )
+
+    def handle(self, *args, **options):
+        queryset = Recipe.objects.all()
+
+        if options['updated_since']:
+            updated_since = parse_updated_since(options['updated_since'])
+            if updated_since is None:
+                raise CommandError('Неверный формат --updated-since')
+            queryset = queryset.filter(updated_at__gte=updated_since)
+
+        if options['output'] == '-':
+            self.write(sys.stdout.buffer, queryset, options['chunk_size'])
+        else:
+            with open(options['output'], 'wb') as output:
+                self.write(output, queryset, options['chunk_size'])
+
+    def write(self, output, queryset, chunk_size):
+        for block in iter_ndjson(queryset, chunk_size):
+            output.write(block)
+        output.flush()
@@ -0,0 +1,75 @@
+import os
+import shutil
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+
+from utils.media import iter_orphans
+
+
+class Command(BaseCommand):
+    help = 'Удаление файлов из MEDIA_ROOT, на которые нет ссылок в базе'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours',
+            type=float,
+            default=24,
+            help='Не трогать файлы моложе указанного числа часов'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество путей, проверяемых одним запросом'
+        )
+        parser.add_argument(
+            '--quarantine',
+            action='store_true',
+            help='Переносить файлы в MEDIA_GC_QUARANTINE_DIR вместо удаления'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только вывести список файлов'
+        )
+
+    def handle(self, *args, **options):
+        root = str(settings.MEDIA_ROOT)
+        if not os.path.isdir(root):
+            return
+
+        collected = 0
+        for name in iter_orphans(
+            root,
+            grace_seconds=options['grace_hours'] * 3600,
+            batch_size=options['batch_size'],
+            exclude=settings.MEDIA_GC_EXCLUDE
+        ):
+            if not options['dry_run']:
+                if options['quarantine']:
+                    removed = self.quarantine(root, name)
+                else:
+                    default_storage.delete(name)
+                    removed = not default_storage.exists(name)
+                if not removed:
+                    # Файл получил ссылку или был загружен повторно
+                    continue
+            if options['verbosity'] > 1 or options['dry_run']:
+                self.stdout.write(name)
+            collected += 1
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Файлов без ссылок: {collected}'
+        ))
+
+    def quarantine(self, root, name):
+        """Перенос файла с той же повторной проверкой, что и в delete()"""
+        with default_storage.locked(name):
+            if not default_storage.is_orphan(name):
+                return False
+            target = os.path.join(settings.MEDIA_GC_QUARANTINE_DIR, name)
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.move(os.path.join(root, name), target)
+        return True
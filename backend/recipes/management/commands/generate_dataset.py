@@ -0,0 +1,95 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from ingredients.models import Ingredient
+from recipes.models import Favorites, Recipe, RecipeIngredient, ShoppingCart
+from users.models import CustomUser, Follower
+from utils.dataset import DatasetGenerator, load_ingredients, reset_sequences
+
+
+class Command(BaseCommand):
+    help = 'Генерация синтетического набора данных'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100_000)
+        parser.add_argument('--recipes', type=int, default=100_000)
+        parser.add_argument('--favorites', type=int, default=1_000_000)
+        parser.add_argument('--shopping-cart', type=int, default=300_000)
+        parser.add_argument('--follows', type=int, default=500_000)
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=1,
+            help='Зерно генератора; одинаковое зерно дает одинаковый набор'
+        )
+        parser.add_argument(
+            '--zipf',
+            type=float,
+            default=1.1,
+            help='Показатель распределения Ципфа'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=90,
+            help='За сколько дней распределить даты добавления'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=50_000,
+            help='Количество строк в одном COPY или bulk_create'
+        )
+        parser.add_argument(
+            '--ingredients-csv',
+            default=settings.BASE_DIR.parent / 'data' / 'ingredients.csv',
+            help='Справочник ингредиентов: название, единица измерения'
+        )
+
+    def report(self, name: str, count: int):
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(f'{name}: {count} ({elapsed:.1f} с)')
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        self.started = time.monotonic()
+        generator = DatasetGenerator(
+            options['seed'], options['zipf'],
+            options['batch_size'], options['days']
+        )
+
+        ingredient_ids = load_ingredients(options['ingredients_csv'])
+        self.report('Ингредиенты', len(ingredient_ids))
+
+        user_ids = generator.users(options['users'])
+        self.report('Пользователи', len(user_ids))
+
+        recipe_ids, ingredients = generator.recipes(
+            options['recipes'], user_ids, ingredient_ids
+        )
+        self.report('Рецепты', len(recipe_ids))
+        self.report('Ингредиенты рецептов', ingredients)
+
+        activity = generator.sampler(user_ids)
+        popularity = generator.sampler(recipe_ids)
+        self.report('Избранное', generator.favorites(
+            options['favorites'], activity, popularity
+        ))
+        self.report('Списки покупок', generator.shopping_cart(
+            options['shopping_cart'], activity, popularity
+        ))
+        self.report('Подписки', generator.follows(
+            options['follows'], activity, generator.sampler(user_ids)
+        ))
+
+        reset_sequences((
+            CustomUser, Ingredient, Recipe, RecipeIngredient,
+            Favorites, ShoppingCart, Follower
+        ))
+        self.stdout.write(
+            'Рейтинг популярных рецептов пересчитает update_trending, '
+            'индекс похожих рецептов построит build_similarity_index'
+        )
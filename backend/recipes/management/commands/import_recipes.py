@@ -0,0 +1,90 @@
+import os
+import sys
+from itertools import count, islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+from utils.recipe_import import create_pool, import_chunk, parse_record
+
+
+class Command(BaseCommand):
+    help = 'Пакетный импорт рецептов из NDJSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Файл NDJSON ("-" — стандартный ввод)'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=500,
+            help='Количество рецептов в одной транзакции'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count(),
+            help='Количество процессов для декодирования картинок'
+        )
+        parser.add_argument(
+            '--author',
+            help='Email автора для записей без поля author'
+        )
+        parser.add_argument(
+            '--resume-from',
+            type=int,
+            default=0,
+            help=(
+                'Номер пачки, с которой продолжить импорт '
+                '(при том же --chunk-size)'
+            )
+        )
+
+    def handle(self, *args, **options):
+        if options['path'] == '-':
+            self.run(sys.stdin, options)
+        else:
+            with open(options['path'], encoding='utf-8') as source:
+                self.run(source, options)
+
+    def run(self, source, options):
+        lines = (
+            (number, text)
+            for number, text in enumerate(source, 1)
+            if text.strip()
+        )
+        total = 0
+
+        with create_pool(options['workers']) as pool:
+            for index in count():
+                chunk = list(islice(lines, options['chunk_size']))
+                if not chunk:
+                    break
+                if index < options['resume_from']:
+                    continue
+
+                try:
+                    records = [
+                        parse_record(number, text) for number, text in chunk
+                    ]
+                    for record in records:
+                        record['author'] = (
+                            record['author'] or options['author']
+                        )
+                    imported = import_chunk(pool, records)
+                except Exception as error:
+                    raise CommandError(
+                        f'Пачка {index} не импортирована ({error}). '
+                        f'Для продолжения: --resume-from {index}'
+                    ) from error
+
+                total += imported
+                self.stdout.write(
+                    f'Пачка {index}: строки {chunk[0][0]}-{chunk[-1][0]}, '
+                    f'добавлено {imported}, всего {total}'
+                )
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Импортировано рецептов: {total}'
+        ))
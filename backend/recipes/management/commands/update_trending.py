@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from recipes.trending import refresh, update_scores
+from tasks.queue import schedule
+
+
+class Command(BaseCommand):
+    help = 'Пересчет рейтинга популярных рецептов'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--schedule',
+            action='store_true',
+            help='Поставить периодический пересчет в очередь задач'
+        )
+
+    def handle(self, *args, **options):
+        if options['schedule']:
+            schedule(refresh, max_attempts=1, unique=True)
+            self.stdout.write('Пересчет рейтинга поставлен в очередь')
+            return
+
+        count = update_scores()
+        self.stdout.write(f'Обновлен рейтинг рецептов: {count}')
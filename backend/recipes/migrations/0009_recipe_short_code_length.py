@@ -0,0 +1,18 @@
+# Generated by Django 3.2 on 2026-10-19 20:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0008_similarity'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='short_code',
+            field=models.CharField(blank=True, max_length=8, unique=True),
+        ),
+    ]
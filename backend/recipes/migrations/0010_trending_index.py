@@ -0,0 +1,44 @@
+# Generated by Django 3.2 on 2026-10-19 20:37
+
+from django.db import migrations, models
+import django.db.models.expressions
+
+
+def create_missing_scores(apps, schema_editor):
+    """Строки рейтинга с score=0 для рецептов без событий"""
+    Recipe = apps.get_model('recipes', 'Recipe')
+    RecipeScore = apps.get_model('recipes', 'RecipeScore')
+    quote = schema_editor.quote_name
+    scores = quote(RecipeScore._meta.db_table)
+    recipes = quote(Recipe._meta.db_table)
+    schema_editor.execute(
+        f'INSERT INTO {scores} ({quote("recipe_id")}, {quote("score")}) '
+        f'SELECT {quote("id")}, 0 FROM {recipes} WHERE NOT EXISTS ('
+        f'SELECT 1 FROM {scores} WHERE {scores}.{quote("recipe_id")} = '
+        f'{recipes}.{quote("id")})'
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0009_recipe_short_code_length'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipescore',
+            name='last_event_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True, verbose_name='Время последнего учтенного события'),
+        ),
+        migrations.AlterField(
+            model_name='recipescore',
+            name='score',
+            field=models.FloatField(default=0, verbose_name='Рейтинг'),
+        ),
+        migrations.RunPython(create_missing_scores, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='recipescore',
+            index=models.Index(django.db.models.expressions.OrderBy(django.db.models.expressions.F('score'), descending=True), django.db.models.expressions.OrderBy(django.db.models.expressions.F('recipe'), descending=True), name='recipe_score_trending_idx'),
+        ),
+    ]
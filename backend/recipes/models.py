@@ -1,6 +1,7 @@
 import shortuuid
 
 from django.db import models
+from django.db.models import F
 from django.contrib.auth import get_user_model
 from django.core import validators
 
@@ -9,6 +10,11 @@ from ingredients.models import Ingredient
 
 User = get_user_model()
 
+# Длина коротких ссылок рецептов, созданных через API и импорт; поле
+# вмещает и более длинные коды синтетических данных (utils.dataset)
+SHORT_CODE_LENGTH = 3
+SHORT_CODE_MAX_LENGTH = 8
+
 
 class Recipe(models.Model):
     """Модель для описания рецепта"""
@@ -36,13 +42,19 @@ class Recipe(models.Model):
     text = models.TextField(verbose_name='Описание')
     cooking_time = models.PositiveIntegerField(
         verbose_name='Время приготовления (в минутах)',
-        validators=[validators.MinValueValidator(1)]
+        validators=[validators.MinValueValidator(1)],
+        db_index=True
     )
     short_code = models.CharField(
-        max_length=3,
+        max_length=SHORT_CODE_MAX_LENGTH,
         blank=True,
         unique=True
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+        db_index=True
+    )
     in_featured = models.ManyToManyField(
         to=User,
         through='Favorites',
@@ -58,7 +70,9 @@ class Recipe(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.short_code:
-            self.short_code = shortuuid.ShortUUID().random(length=3)
+            self.short_code = shortuuid.ShortUUID().random(
+                length=SHORT_CODE_LENGTH
+            )
         super().save(*args, **kwargs)
 
     class Meta:
@@ -83,6 +97,11 @@ class ShoppingCart(models.Model):
         related_name='shopping_cart',
         verbose_name='Рецепт'
     )
+    created_at = models.DateTimeField(
+        verbose_name='Дата добавления',
+        auto_now_add=True,
+        db_index=True
+    )
 
     class Meta:
         verbose_name = 'рецепт в корзине'
@@ -109,6 +128,11 @@ class Favorites(models.Model):
         related_name='favorites',
         verbose_name='Рецепт'
     )
+    created_at = models.DateTimeField(
+        verbose_name='Дата добавления',
+        auto_now_add=True,
+        db_index=True
+    )
 
     class Meta:
         verbose_name = 'избранное'
@@ -144,3 +168,111 @@ class RecipeIngredient(models.Model):
     class Meta:
         verbose_name = 'ингредиент для рецепта'
         verbose_name_plural = 'Ингредиенты для рецепта'
+        indexes = [
+            models.Index(
+                fields=('recipe', 'ingredient'),
+                name='recipe_ingredient_idx'
+            )
+        ]
+
+
+class RecipeScore(models.Model):
+    """
+    Рейтинг популярности рецепта.
+
+    score — натуральный логарифм суммы весов добавлений в избранное
+    и корзину, каждое из которых затухает экспоненциально со временем.
+    Хранится относительно фиксированной точки отсчета, поэтому
+    упорядочивание по score совпадает с упорядочиванием по текущему
+    затухшему рейтингу, а новые события просто прибавляются.
+
+    Строка создается вместе с рецептом (recipes.signals) с score=0 и
+    пустым last_event_at: событий еще не было. Вклад любого события
+    после начала 2025 года больше нуля, так что такие рецепты идут в
+    списке после набравших рейтинг. Сортировка ?ordering=trending
+    читается по индексу recipe_score_trending_idx.
+    """
+
+    recipe = models.OneToOneField(
+        to=Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='score',
+        verbose_name='Рецепт'
+    )
+    score = models.FloatField(
+        verbose_name='Рейтинг',
+        default=0
+    )
+    last_event_at = models.DateTimeField(
+        verbose_name='Время последнего учтенного события',
+        null=True,
+        blank=True,
+        db_index=True
+    )
+
+    class Meta:
+        verbose_name = 'рейтинг рецепта'
+        verbose_name_plural = 'Рейтинги рецептов'
+        indexes = [
+            models.Index(
+                F('score').desc(), F('recipe').desc(),
+                name='recipe_score_trending_idx'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.recipe_id}: {self.score:.3f}'
+
+
+class RecipeSignature(models.Model):
+    """
+    MinHash-подпись набора ингредиентов рецепта (recipes.similarity).
+
+    signature — массив из SIMILAR_NUM_HASHES беззнаковых 32-битных
+    минимумов хеш-функций. ingredients_key — хеш самого набора,
+    одинаковый у рецептов с совпадающими ингредиентами.
+    """
+
+    recipe = models.OneToOneField(
+        to=Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='signature',
+        verbose_name='Рецепт'
+    )
+    signature = models.BinaryField(verbose_name='MinHash-подпись')
+    ingredients_key = models.BigIntegerField(
+        verbose_name='Хеш набора ингредиентов',
+        db_index=True
+    )
+
+    class Meta:
+        verbose_name = 'подпись рецепта'
+        verbose_name_plural = 'Подписи рецептов'
+
+
+class RecipeBucket(models.Model):
+    """
+    Корзина LSH: хеш одной полосы MinHash-подписи.
+
+    Рецепты с общей корзиной — кандидаты в похожие.
+    """
+
+    recipe = models.ForeignKey(
+        to=Recipe,
+        on_delete=models.CASCADE,
+        related_name='buckets',
+        verbose_name='Рецепт'
+    )
+    key = models.BigIntegerField(verbose_name='Хеш полосы')
+
+    class Meta:
+        verbose_name = 'корзина LSH'
+        verbose_name_plural = 'Корзины LSH'
+        indexes = [
+            models.Index(
+                fields=('key', 'recipe'),
+                name='recipe_bucket_key_idx'
+            )
+        ]
@@ -0,0 +1,39 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from .models import Recipe, RecipeIngredient, RecipeScore
+from .similarity import index_recipes
+from ingredients.models import Ingredient
+from tasks.queue import enqueue
+
+
+# Рецептов в одной задаче переиндексации
+REINDEX_BATCH_SIZE = 1000
+
+
+@receiver(post_save, sender=Recipe)
+def create_score(sender, instance, created, **kwargs):
+    """Строка рейтинга для нового рецепта: без нее он выпадет из trending"""
+    # Срабатывает и при loaddata (raw=True): фикстуры без рейтингов
+    # иначе оставили бы рецепты без строки
+    if created:
+        RecipeScore.objects.get_or_create(recipe=instance)
+
+
+@receiver(pre_delete, sender=Ingredient)
+def remember_ingredient_recipes(sender, instance, **kwargs):
+    # После удаления ссылки на ингредиент обнулены (SET_NULL),
+    # и затронутые рецепты уже не найти
+    instance._recipe_ids = list(
+        RecipeIngredient.objects.filter(
+            ingredient=instance
+        ).values_list('recipe_id', flat=True).distinct()
+    )
+
+
+@receiver(post_delete, sender=Ingredient)
+def reindex_ingredient_recipes(sender, instance, **kwargs):
+    """Подписи рецептов с удаленным ингредиентом пересчитываются в очереди"""
+    recipe_ids = getattr(instance, '_recipe_ids', [])
+    for start in range(0, len(recipe_ids), REINDEX_BATCH_SIZE):
+        enqueue(index_recipes, recipe_ids[start:start + REINDEX_BATCH_SIZE])
@@ -0,0 +1,165 @@
+"""
+Поиск рецептов с похожим набором ингредиентов.
+
+Для каждого рецепта хранится MinHash-подпись набора ингредиентов:
+вероятность совпадения одной позиции у двух подписей равна мере
+Жаккара их наборов. Подпись делится на полосы по SIMILAR_BAND_SIZE
+позиций, хеш каждой полосы — корзина LSH. Кандидаты — рецепты с общей
+корзиной, их набирается не больше SIMILAR_MAX_CANDIDATES (сначала с
+наибольшим числом общих корзин), затем они упорядочиваются по точной
+мере Жаккара.
+
+Подписи пересчитываются при записи ингредиентов рецепта и, через
+очередь задач, при удалении ингредиента (см. recipes.signals). При
+изменении SIMILAR_NUM_HASHES, SIMILAR_BAND_SIZE или SIMILAR_SEED
+индекс нужно перестроить командой build_similarity_index.
+"""
+import hashlib
+import random
+from array import array
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+
+from .models import RecipeBucket, RecipeIngredient, RecipeSignature
+
+
+# Простое число Мерсенна 2^31 - 1: значения хешей помещаются в uint32
+PRIME = 2 ** 31 - 1
+
+
+@lru_cache(maxsize=None)
+def get_coefficients(num_hashes: int, seed: int):
+    """Коэффициенты хеш-функций h(x) = (a * x + b) mod PRIME"""
+    rng = random.Random(seed)
+    return tuple(
+        (rng.randrange(1, PRIME), rng.randrange(0, PRIME))
+        for _ in range(num_hashes)
+    )
+
+
+def minhash(ingredient_ids):
+    coefficients = get_coefficients(
+        settings.SIMILAR_NUM_HASHES, settings.SIMILAR_SEED
+    )
+    return array('I', (
+        min((a * ingredient + b) % PRIME for ingredient in ingredient_ids)
+        for a, b in coefficients
+    ))
+
+
+def to_key(data: bytes):
+    """Знаковое 64-битное число для BigIntegerField"""
+    return int.from_bytes(
+        hashlib.blake2b(data, digest_size=8).digest(), 'big', signed=True
+    )
+
+
+def band_keys(signature: array):
+    size = settings.SIMILAR_BAND_SIZE
+    return [
+        to_key(
+            band.to_bytes(2, 'big') + signature[start:start + size].tobytes()
+        )
+        for band, start in enumerate(range(0, len(signature), size))
+    ]
+
+
+def ingredients_key(ingredient_ids):
+    return to_key(array('Q', sorted(ingredient_ids)).tobytes())
+
+
+def get_ingredient_sets(recipe_ids):
+    ingredient_sets = defaultdict(set)
+    rows = RecipeIngredient.objects.filter(
+        recipe_id__in=recipe_ids, ingredient__isnull=False
+    ).values_list('recipe_id', 'ingredient_id')
+    for recipe_id, ingredient_id in rows:
+        ingredient_sets[recipe_id].add(ingredient_id)
+    return ingredient_sets
+
+
+def index_recipes(recipe_ids):
+    """
+    Пересчет подписей и корзин рецептов.
+
+    Вызывается после записи ингредиентов рецепта; рецепты без
+    ингредиентов из индекса удаляются.
+    """
+    recipe_ids = list(recipe_ids)
+    signatures, buckets = [], []
+    for recipe_id, ingredients in get_ingredient_sets(recipe_ids).items():
+        signature = minhash(ingredients)
+        signatures.append(RecipeSignature(
+            recipe_id=recipe_id,
+            signature=signature.tobytes(),
+            ingredients_key=ingredients_key(ingredients)
+        ))
+        buckets.extend(
+            RecipeBucket(recipe_id=recipe_id, key=key)
+            for key in band_keys(signature)
+        )
+
+    with transaction.atomic():
+        RecipeSignature.objects.filter(recipe_id__in=recipe_ids).delete()
+        RecipeBucket.objects.filter(recipe_id__in=recipe_ids).delete()
+        RecipeSignature.objects.bulk_create(signatures)
+        RecipeBucket.objects.bulk_create(buckets)
+    return len(signatures)
+
+
+def get_signature(recipe_id: int):
+    """Сохраненная подпись или, если рецепт еще не проиндексирован, новая"""
+    stored = RecipeSignature.objects.filter(
+        recipe_id=recipe_id
+    ).values_list('signature', flat=True).first()
+    if stored is not None:
+        signature = array('I')
+        signature.frombytes(stored)
+        if len(signature) == settings.SIMILAR_NUM_HASHES:
+            return signature
+    ingredients = get_ingredient_sets([recipe_id]).get(recipe_id)
+    return minhash(ingredients) if ingredients else None
+
+
+def jaccard(first: set, second: set):
+    return len(first & second) / len(first | second)
+
+
+def find_similar(recipe_id: int, limit: int):
+    """
+    До limit пар (id рецепта, мера Жаккара) от самых похожих.
+
+    Три запроса: подпись, кандидаты по корзинам и ингредиенты
+    кандидатов.
+    """
+    signature = get_signature(recipe_id)
+    if signature is None:
+        return []
+
+    candidates = list(
+        RecipeBucket.objects.filter(
+            key__in=band_keys(signature)
+        ).exclude(
+            recipe_id=recipe_id
+        ).values('recipe_id').annotate(
+            bands=Count('pk')
+        ).order_by('-bands', 'recipe_id').values_list(
+            'recipe_id', flat=True
+        )[:settings.SIMILAR_MAX_CANDIDATES]
+    )
+    if not candidates:
+        return []
+
+    ingredient_sets = get_ingredient_sets([recipe_id, *candidates])
+    ingredients = ingredient_sets.pop(recipe_id, set())
+    ranked = sorted(
+        (
+            (-jaccard(ingredients, other), candidate)
+            for candidate, other in ingredient_sets.items()
+        )
+    )[:limit]
+    return [(candidate, -score) for score, candidate in ranked]
@@ -0,0 +1,143 @@
+"""
+Похожие рецепты: порядок по точной мере Жаккара, ?limit=,
+переиндексация при записи ингредиентов и при удалении ингредиента,
+фильтр дубликатов в админке.
+"""
+from django.contrib.admin.sites import site
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from ingredients.models import Ingredient
+from recipes.admin import DuplicateIngredientsFilter
+from recipes.models import Recipe, RecipeIngredient, RecipeSignature
+from recipes.similarity import index_recipes, ingredients_key
+
+
+User = get_user_model()
+
+
+# Полоса из одной позиции: кандидатом становится любой рецепт с общей
+# позицией подписи, и результат не зависит от удачи LSH
+@override_settings(SIMILAR_BAND_SIZE=1)
+class SimilarRecipesTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create(
+            email='author@example.com', username='author',
+            first_name='Имя', last_name='Фамилия'
+        )
+        cls.ingredients = [
+            Ingredient.objects.create(name=f'ингредиент {index}',
+                                      measurement_unit='г')
+            for index in range(16)
+        ]
+        base = cls.ingredients[:10]
+        extra = cls.ingredients[10:13]
+        cls.base = cls.create_recipe('Исходный', base)
+        # Меры Жаккара к исходному: 1, 9/11, 8/12, 7/13 и 0
+        cls.same = cls.create_recipe('Тот же набор', base)
+        cls.close = cls.create_recipe('Близкий', base[:9] + extra[:1])
+        cls.middle = cls.create_recipe('Средний', base[:8] + extra[:2])
+        cls.far = cls.create_recipe('Дальний', base[:7] + extra)
+        cls.other = cls.create_recipe('Другой', cls.ingredients[13:])
+        with override_settings(SIMILAR_BAND_SIZE=1):
+            index_recipes(Recipe.objects.values_list('pk', flat=True))
+
+    @classmethod
+    def create_recipe(cls, name, ingredients):
+        recipe = Recipe.objects.create(
+            author=cls.author, name=name, text='Описание',
+            cooking_time=10, image='cas/aa/bb/recipe.png'
+        )
+        RecipeIngredient.objects.bulk_create(
+            RecipeIngredient(recipe=recipe, ingredient=ingredient, amount=1)
+            for ingredient in ingredients
+        )
+        return recipe
+
+    def get_similar(self, recipe, query=''):
+        response = APIClient().get(
+            f'/api/recipes/{recipe.pk}/similar/{query}'
+        )
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.json()]
+
+    def test_order(self):
+        expected = [self.same.pk, self.close.pk, self.middle.pk, self.far.pk]
+        for fast in (False, True):
+            with override_settings(FAST_READ_SERIALIZERS=fast):
+                self.assertEqual(
+                    self.get_similar(self.base, '?limit=10'), expected
+                )
+
+    @override_settings(SIMILAR_DEFAULT_LIMIT=2, SIMILAR_MAX_LIMIT=3)
+    def test_limit(self):
+        for query, count in (
+            ('', 2),
+            ('?limit=1', 1),
+            ('?limit=0', 1),
+            ('?limit=-5', 1),
+            ('?limit=100', 3),
+            ('?limit=abc', 2),
+        ):
+            self.assertEqual(
+                self.get_similar(self.base, query),
+                [self.same.pk, self.close.pk, self.middle.pk][:count],
+                query
+            )
+
+    def test_update_ingredients_through_api(self):
+        client = APIClient()
+        client.force_authenticate(self.author)
+        response = client.patch(
+            f'/api/recipes/{self.close.pk}/',
+            {'ingredients': [
+                {'id': ingredient.pk, 'amount': 1}
+                for ingredient in self.ingredients[13:]
+            ]},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertNotIn(
+            self.close.pk, self.get_similar(self.base, '?limit=10')
+        )
+        self.assertEqual(
+            self.get_similar(self.other, '?limit=10'), [self.close.pk]
+        )
+
+    @override_settings(TASKS_ALWAYS_EAGER=True)
+    def test_ingredient_delete_reindexes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ingredients[10].delete()
+        # У «Близкого» остались base[:9], у «Среднего» — base[:8] и
+        # extra[1]: подписи и ключи наборов пересчитаны
+        for recipe, ingredients in (
+            (self.close, self.ingredients[:9]),
+            (self.middle, self.ingredients[:8] + self.ingredients[11:12]),
+        ):
+            self.assertEqual(
+                RecipeSignature.objects.get(recipe=recipe).ingredients_key,
+                ingredients_key(ingredient.pk for ingredient in ingredients)
+            )
+        self.assertEqual(
+            self.get_similar(self.base, '?limit=10'),
+            [self.same.pk, self.close.pk, self.middle.pk, self.far.pk]
+        )
+
+    def test_duplicates_admin_filter(self):
+        request = RequestFactory().get('/admin/recipes/recipe/')
+        model_admin = site._registry[Recipe]
+        duplicates = DuplicateIngredientsFilter(
+            request, {'duplicates': 'yes'}, Recipe, model_admin
+        )
+        self.assertCountEqual(
+            duplicates.queryset(request, Recipe.objects.all()),
+            [self.base, self.same]
+        )
+        unfiltered = DuplicateIngredientsFilter(
+            request, {}, Recipe, model_admin
+        )
+        self.assertEqual(
+            unfiltered.queryset(request, Recipe.objects.all()).count(), 6
+        )
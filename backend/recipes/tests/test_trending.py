@@ -0,0 +1,69 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from recipes import trending
+from recipes.models import Recipe, RecipeScore
+from tasks.models import Task
+from tasks.queue import claim, run
+
+
+User = get_user_model()
+
+
+class RecipeScoreTests(TestCase):
+    def test_score_row_created_with_recipe(self):
+        user = User.objects.create_user(
+            email='user@example.com', username='user',
+            first_name='Имя', last_name='Фамилия', password='x'
+        )
+        recipe = Recipe.objects.create(
+            author=user, name='Рецепт', text='Описание',
+            cooking_time=10, image='cas/aa/bb/recipe.png'
+        )
+        score = RecipeScore.objects.get(recipe=recipe)
+        self.assertEqual(score.score, 0)
+        self.assertIsNone(score.last_event_at)
+
+        recipe.in_featured.add(user)
+        with override_settings(TRENDING_LAG_SECONDS=-1):
+            self.assertEqual(trending.update_scores(), 1)
+        score.refresh_from_db()
+        # Первое событие заменяет нулевой рейтинг, а не складывается с ним
+        self.assertAlmostEqual(
+            score.score,
+            trending.event_score(1.0, score.last_event_at)
+        )
+
+
+class TrendingRefreshTests(TestCase):
+    @override_settings(TASKS_ALWAYS_EAGER=True)
+    def test_eager_schedule_runs_once(self):
+        """Периодический пересчет в eager-режиме не зацикливается"""
+        with mock.patch.object(
+            trending, 'update_scores', wraps=trending.update_scores
+        ) as update_scores:
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command(
+                    'update_trending', '--schedule', stdout=StringIO()
+                )
+        self.assertEqual(update_scores.call_count, 1)
+        self.assertFalse(Task.objects.exists())
+
+    def test_failed_refresh_schedules_next(self):
+        """Ошибка пересчета не обрывает цепочку задач"""
+        call_command('update_trending', '--schedule', stdout=StringIO())
+        with mock.patch.object(
+            trending, 'update_scores', side_effect=RuntimeError
+        ):
+            self.assertFalse(run(claim(visibility_timeout=60)))
+
+        failed = Task.objects.get(status=Task.Status.FAILED)
+        queued = Task.objects.get(status=Task.Status.QUEUED)
+        self.assertEqual(failed.max_attempts, 1)
+        self.assertEqual(queued.name, 'recipes.trending.refresh')
+        self.assertGreater(queued.run_at, timezone.now())
@@ -0,0 +1,127 @@
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Favorites, RecipeScore, ShoppingCart
+from tasks.queue import schedule
+
+
+# Точка отсчета логарифмического рейтинга (см. RecipeScore)
+EPOCH = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+BATCH_SIZE = 2000
+
+
+def logaddexp(a, b):
+    """log(exp(a) + exp(b)) без переполнения"""
+    if a is None:
+        return b
+    if a < b:
+        a, b = b, a
+    return a + math.log1p(math.exp(b - a))
+
+
+def event_score(weight: float, moment: datetime):
+    """Логарифм вклада события с учетом затухания"""
+    decay_rate = math.log(2) / (settings.TRENDING_HALF_LIFE_HOURS * 3600)
+    return math.log(weight) + decay_rate * (moment - EPOCH).total_seconds()
+
+
+def collect_events(since: datetime, until: datetime):
+    """Вклады новых событий по рецептам: {id: (score, последнее событие)}"""
+    increments = {}
+    sources = (
+        (Favorites, settings.TRENDING_WEIGHTS['favorite']),
+        (ShoppingCart, settings.TRENDING_WEIGHTS['shopping_cart']),
+    )
+
+    for model, weight in sources:
+        events = model.objects.filter(
+            created_at__gt=since,
+            created_at__lte=until
+        ).values_list('recipe_id', 'created_at').iterator(
+            chunk_size=BATCH_SIZE
+        )
+        for recipe_id, created_at in events:
+            score, last_event_at = increments.get(recipe_id, (None, since))
+            increments[recipe_id] = (
+                logaddexp(score, event_score(weight, created_at)),
+                max(last_event_at, created_at)
+            )
+
+    return increments
+
+
+def update_scores():
+    """
+    Инкрементальный пересчет рейтинга.
+
+    Учитываются только события, появившиеся после последнего пересчета
+    (при первом запуске — за окно TRENDING_WINDOW_DAYS). Вклад новых
+    событий прибавляется к сохраненному значению без полного пересчета.
+    """
+    now = timezone.now()
+    since = RecipeScore.objects.aggregate(
+        last=Max('last_event_at')
+    )['last'] or now - timedelta(days=settings.TRENDING_WINDOW_DAYS)
+    # События в еще не зафиксированных транзакциях подхватит
+    # следующий запуск
+    until = now - timedelta(seconds=settings.TRENDING_LAG_SECONDS)
+
+    increments = collect_events(since, until)
+    recipe_ids = list(increments)
+
+    for start in range(0, len(recipe_ids), BATCH_SIZE):
+        batch = recipe_ids[start:start + BATCH_SIZE]
+        with transaction.atomic():
+            existing = RecipeScore.objects.select_for_update().in_bulk(batch)
+            created, updated = [], []
+            for recipe_id in batch:
+                score, last_event_at = increments[recipe_id]
+                row = existing.get(recipe_id)
+                if row is None:
+                    created.append(RecipeScore(
+                        recipe_id=recipe_id,
+                        score=score,
+                        last_event_at=last_event_at
+                    ))
+                elif row.last_event_at is None:
+                    # Строка, созданная вместе с рецептом: событий не было
+                    row.score = score
+                    row.last_event_at = last_event_at
+                    updated.append(row)
+                else:
+                    row.score = logaddexp(row.score, score)
+                    row.last_event_at = max(row.last_event_at, last_event_at)
+                    updated.append(row)
+            RecipeScore.objects.bulk_create(created)
+            RecipeScore.objects.bulk_update(
+                updated, ('score', 'last_event_at')
+            )
+
+    return len(recipe_ids)
+
+
+def refresh():
+    """
+    Фоновая задача: пересчет рейтинга и планирование следующего.
+
+    Следующий пересчет планируется и после ошибки, иначе цепочка
+    периодических задач оборвется. Упавшая задача не повторяется
+    (max_attempts=1): ее заменяет следующий пересчет.
+    """
+    try:
+        update_scores()
+    finally:
+        schedule(
+            refresh,
+            run_at=timezone.now() + timedelta(
+                seconds=settings.TRENDING_REFRESH_INTERVAL
+            ),
+            max_attempts=1,
+            unique=True
+        )
@@ -0,0 +1,21 @@
+from django.contrib import admin
+from django.utils import timezone
+
+from .models import Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'run_at', 'created_at')
+    list_filter = ('status',)
+    search_fields = ('name',)
+    readonly_fields = ('created_at', 'locked_until', 'last_error')
+    actions = ('requeue',)
+
+    def requeue(self, request, queryset):
+        """Повторный запуск задач"""
+
+        queryset.update(
+            status=Task.Status.QUEUED, attempts=0, run_at=timezone.now()
+        )
+    requeue.short_description = 'Поставить в очередь заново'
@@ -0,0 +1,87 @@
+import logging
+import multiprocessing
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DatabaseError, connections
+
+from tasks.queue import claim, run
+
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Запуск воркеров фоновых задач'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-p', '--processes',
+            type=int,
+            default=settings.TASKS_WORKER_PROCESSES,
+            help='Количество процессов-воркеров'
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=1.0,
+            help='Пауза между опросами пустой очереди, секунд'
+        )
+        parser.add_argument(
+            '--visibility-timeout',
+            type=float,
+            default=settings.TASKS_VISIBILITY_TIMEOUT,
+            help='Через сколько секунд задача зависшего воркера освободится'
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Выполнить все готовые задачи и завершиться'
+        )
+
+    def handle(self, *args, **options):
+        if options['processes'] <= 1:
+            self.work(options)
+            return
+
+        connections.close_all()
+        workers = [
+            multiprocessing.Process(target=self.work, args=(options,))
+            for _ in range(options['processes'])
+        ]
+        for worker in workers:
+            worker.start()
+
+        def stop(signum, frame):
+            for worker in workers:
+                worker.terminate()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        for worker in workers:
+            worker.join()
+
+    def work(self, options):
+        stopping = False
+
+        def stop(signum, frame):
+            nonlocal stopping
+            stopping = True
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        while not stopping:
+            try:
+                task = claim(options['visibility_timeout'])
+                if task is not None:
+                    run(task)
+                    continue
+            except DatabaseError:
+                logger.exception('Ошибка базы данных в воркере')
+                connections.close_all()
+            if options['once']:
+                break
+            time.sleep(options['poll_interval'])
@@ -0,0 +1,69 @@
+from django.db import models
+from django.utils import timezone
+
+
+class Task(models.Model):
+    """Модель фоновой задачи"""
+
+    class Status(models.TextChoices):
+        QUEUED = 'queued', 'В очереди'
+        RUNNING = 'running', 'Выполняется'
+        FAILED = 'failed', 'Ошибка'
+
+    name = models.CharField(
+        verbose_name='Функция',
+        max_length=255
+    )
+    args = models.JSONField(
+        verbose_name='Позиционные аргументы',
+        default=list
+    )
+    kwargs = models.JSONField(
+        verbose_name='Именованные аргументы',
+        default=dict
+    )
+    status = models.CharField(
+        verbose_name='Статус',
+        max_length=16,
+        choices=Status.choices,
+        default=Status.QUEUED
+    )
+    attempts = models.PositiveIntegerField(
+        verbose_name='Попыток',
+        default=0
+    )
+    max_attempts = models.PositiveIntegerField(
+        verbose_name='Максимум попыток',
+        default=5
+    )
+    run_at = models.DateTimeField(
+        verbose_name='Запустить после',
+        default=timezone.now
+    )
+    locked_until = models.DateTimeField(
+        verbose_name='Занята до',
+        null=True,
+        blank=True
+    )
+    last_error = models.TextField(
+        verbose_name='Последняя ошибка',
+        blank=True
+    )
+    created_at = models.DateTimeField(
+        verbose_name='Создана',
+        auto_now_add=True
+    )
+
+    class Meta:
+        verbose_name = 'задачу'
+        verbose_name_plural = 'Задачи'
+        ordering = ('run_at',)
+        indexes = [
+            models.Index(
+                fields=('status', 'run_at'),
+                name='task_status_run_at'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.name} ({self.get_status_display()})'
@@ -0,0 +1,165 @@
+import logging
+import traceback
+from contextlib import nullcontext
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Task
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_task_name(task):
+    if isinstance(task, str):
+        return task
+    return f'{task.__module__}.{task.__qualname__}'
+
+
+def schedule(
+    task, args=(), kwargs=None, run_at=None,
+    max_attempts=None, unique=False
+):
+    """
+    Постановка задачи в очередь.
+
+    task — функция уровня модуля или путь к ней. Аргументы должны
+    сериализоваться в JSON. Запись создается в текущей транзакции,
+    поэтому воркер увидит задачу только после ее фиксации. С unique=True
+    задача не добавляется, если такая же уже ждет в очереди.
+
+    С TASKS_ALWAYS_EAGER задача выполняется сразу после фиксации, а
+    отложенная (run_at) пропускается: без воркера ее некому выполнить
+    в срок, а немедленный запуск зациклил бы периодические задачи.
+    """
+    name = get_task_name(task)
+    args, kwargs = list(args), kwargs or {}
+
+    if settings.TASKS_ALWAYS_EAGER:
+        if run_at is not None:
+            logger.debug('Отложенная задача %s пропущена', name)
+            return None
+        transaction.on_commit(lambda: import_string(name)(*args, **kwargs))
+        return None
+
+    if unique:
+        queued = Task.objects.filter(
+            name=name, args=args, kwargs=kwargs,
+            status=Task.Status.QUEUED
+        ).first()
+        if queued is not None:
+            return queued
+
+    return Task.objects.create(
+        name=name,
+        args=args,
+        kwargs=kwargs,
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts or settings.TASKS_MAX_ATTEMPTS
+    )
+
+
+def enqueue(task, *args, **kwargs):
+    """Постановка задачи в очередь для немедленного выполнения"""
+    return schedule(task, args, kwargs)
+
+
+def claim(visibility_timeout: float):
+    """
+    Захват одной готовой к выполнению задачи.
+
+    Строка блокируется через SELECT ... FOR UPDATE SKIP LOCKED, так что
+    воркеры не ждут друг друга. Задача, воркер которой не уложился в
+    visibility_timeout, снова становится доступной. На базах без
+    SKIP LOCKED (SQLite) чтение выполняется вне транзакции, а от
+    двойного захвата защищает условный UPDATE.
+    """
+    now = timezone.now()
+    if connection.features.has_select_for_update_skip_locked:
+        atomic = transaction.atomic()
+    else:
+        atomic = nullcontext()
+
+    with atomic:
+        task = Task.objects.select_for_update(skip_locked=True).filter(
+            Q(status=Task.Status.QUEUED, run_at__lte=now)
+            | Q(status=Task.Status.RUNNING, locked_until__lt=now)
+        ).order_by('run_at').first()
+        if task is None:
+            return None
+
+        if task.attempts >= task.max_attempts:
+            Task.objects.filter(
+                pk=task.pk, attempts=task.attempts
+            ).update(
+                status=Task.Status.FAILED,
+                last_error='Превышено время выполнения'
+            )
+            return None
+
+        claimed = Task.objects.filter(
+            pk=task.pk, attempts=task.attempts
+        ).update(
+            status=Task.Status.RUNNING,
+            attempts=F('attempts') + 1,
+            locked_until=now + timedelta(seconds=visibility_timeout)
+        )
+        if not claimed:
+            return None
+
+    task.refresh_from_db()
+    return task
+
+
+def get_retry_delay(attempts: int):
+    """Экспоненциальная задержка перед повторной попыткой"""
+    return min(
+        settings.TASKS_RETRY_BACKOFF * 2 ** (attempts - 1),
+        settings.TASKS_RETRY_BACKOFF_MAX
+    )
+
+
+def run(task: Task):
+    """
+    Выполнение задачи; успешные задачи удаляются из очереди.
+
+    Результат записывается, только если задача все еще захвачена этим
+    воркером: номер попытки не изменился. Если воркер не уложился в
+    visibility_timeout и задачу захватил другой, запись пропускается.
+    """
+    claimed = Task.objects.filter(
+        pk=task.pk, status=Task.Status.RUNNING, attempts=task.attempts
+    )
+    try:
+        import_string(task.name)(*task.args, **task.kwargs)
+    except Exception:
+        error = traceback.format_exc()
+        logger.warning('Задача %s завершилась ошибкой', task, exc_info=True)
+
+        if task.attempts >= task.max_attempts:
+            updated = claimed.update(
+                status=Task.Status.FAILED,
+                last_error=error
+            )
+        else:
+            updated = claimed.update(
+                status=Task.Status.QUEUED,
+                run_at=timezone.now() + timedelta(
+                    seconds=get_retry_delay(task.attempts)
+                ),
+                locked_until=None,
+                last_error=error
+            )
+        if not updated:
+            logger.warning('Задача %s захвачена другим воркером', task)
+        return False
+
+    deleted, _ = claimed.delete()
+    if not deleted:
+        logger.warning('Задача %s захвачена другим воркером', task)
+    return True
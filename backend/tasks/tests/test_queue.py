@@ -0,0 +1,54 @@
+from datetime import timedelta
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from tasks.models import Task
+from tasks.queue import claim, enqueue, run
+
+
+def succeed():
+    pass
+
+
+def fail():
+    raise RuntimeError
+
+
+@override_settings(TASKS_ALWAYS_EAGER=False)
+class QueueTests(TestCase):
+    def claim_twice(self, task):
+        """Первый воркер не уложился в таймаут, задачу захватил второй"""
+        enqueue(task)
+        slow = claim(visibility_timeout=60)
+        Task.objects.update(locked_until=timezone.now() - timedelta(1))
+        fast = claim(visibility_timeout=60)
+        self.assertEqual((slow.attempts, fast.attempts), (1, 2))
+        return slow, fast
+
+    def assert_claimed_by(self, worker):
+        task = Task.objects.get()
+        self.assertEqual(task.status, Task.Status.RUNNING)
+        self.assertEqual(task.attempts, worker.attempts)
+        self.assertEqual(task.locked_until, worker.locked_until)
+
+    def test_run_deletes_task(self):
+        enqueue(succeed)
+        self.assertTrue(run(claim(visibility_timeout=60)))
+        self.assertFalse(Task.objects.exists())
+
+    def test_expired_claim_does_not_delete_new_claim(self):
+        slow, fast = self.claim_twice(succeed)
+        self.assertTrue(run(slow))
+        self.assert_claimed_by(fast)
+        self.assertTrue(run(fast))
+        self.assertFalse(Task.objects.exists())
+
+    def test_expired_claim_does_not_overwrite_new_claim(self):
+        slow, fast = self.claim_twice(fail)
+        self.assertFalse(run(slow))
+        self.assert_claimed_by(fast)
+        self.assertFalse(run(fast))
+        task = Task.objects.get()
+        self.assertEqual(task.status, Task.Status.QUEUED)
+        self.assertIsNone(task.locked_until)
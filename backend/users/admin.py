@@ -3,6 +3,9 @@ from django.contrib.auth import get_user_model
 from django import forms
 
 from .models import Follower
+from recipes.models import Recipe
+from utils.paginator import EstimatedCountPaginator
+from utils.queries import count_subquery
 
 
 User = get_user_model()
@@ -13,11 +16,34 @@ class UserAdmin(admin.ModelAdmin):
     list_display = (
         'username', 'email',
         'is_staff', 'is_superuser',
-        'is_active'
+        'is_active', 'recipes_count',
+        'followers_count'
     )
     search_fields = ('username', 'email')
     list_filter = ('is_staff', 'is_superuser', 'is_active')
     readonly_fields = ('date_joined', 'last_login')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            recipes_count=count_subquery(Recipe.objects, 'author'),
+            followers_count=count_subquery(Follower.objects, 'subscribed')
+        )
+
+    def recipes_count(self, obj):
+        """Количество рецептов пользователя"""
+
+        return obj.recipes_count
+    recipes_count.short_description = 'Рецептов'
+    recipes_count.admin_order_field = 'recipes_count'
+
+    def followers_count(self, obj):
+        """Количество подписчиков пользователя"""
+
+        return obj.followers_count
+    followers_count.short_description = 'Подписчиков'
+    followers_count.admin_order_field = 'followers_count'
 
 
 class FollowerAdminForm(forms.ModelForm):
@@ -47,6 +73,9 @@ class FollowerAdmin(admin.ModelAdmin):
     form = FollowerAdminForm
     list_display = ('subscriber', 'subscribed')
     list_display_links = ('subscriber', 'subscribed')
+    list_select_related = ('subscriber', 'subscribed')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     search_fields = (
         'subscriber__username',
         'subscriber__email',
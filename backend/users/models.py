@@ -1,7 +1,9 @@
 from django.contrib.auth.models import AbstractUser
 from django.core.validators import RegexValidator
 from django.db import models
-from django.contrib.auth.hashers import make_password
+from django.contrib.auth.hashers import check_password
+
+from utils import hashers
 
 
 class CustomUser(AbstractUser):
@@ -57,13 +59,25 @@ class CustomUser(AbstractUser):
         ordering = ('id',)
 
     def save(self, *args, **kwargs):
-        if (
-            self.password and len(self.password) < 50
-            and not self.password.startswith('pbkdf2_')
-        ):
-            self.password = make_password(self.password)
+        # Открытый пароль, присвоенный напрямую (например, в админке)
+        if self.password and not hashers.is_hashed(self.password):
+            self.set_password(self.password)
         return super().save(*args, **kwargs)
 
+    def check_password(self, raw_password):
+        """
+        Проверка пароля.
+
+        Хеш устаревшего алгоритма или с другими параметрами после
+        успешной проверки пересчитывается основным хешером.
+        """
+        is_correct = check_password(raw_password, self.password)
+        if is_correct and hashers.must_update(self.password):
+            self.set_password(raw_password)
+            self._password = None
+            self.save(update_fields=('password',))
+        return is_correct
+
     def __str__(self):
         return self.username
 
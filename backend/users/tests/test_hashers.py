@@ -0,0 +1,97 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import (
+    UNUSABLE_PASSWORD_SUFFIX_LENGTH, is_password_usable, make_password
+)
+from django.test import TestCase, override_settings
+
+from utils import hashers
+
+
+User = get_user_model()
+
+PBKDF2 = 'utils.hashers.TunedPBKDF2PasswordHasher'
+ARGON2 = 'django.contrib.auth.hashers.Argon2PasswordHasher'
+
+
+@override_settings(PASSWORD_HASHERS=[PBKDF2], PASSWORD_PBKDF2_ITERATIONS=10)
+class HashersTests(TestCase):
+    def create_user(self, password):
+        return User.objects.create(
+            email='user@example.com', username='user',
+            first_name='Имя', last_name='Фамилия', password=password
+        )
+
+    def test_is_hashed(self):
+        self.assertTrue(hashers.is_hashed(make_password('secret')))
+        self.assertTrue(hashers.is_hashed(make_password(None)))
+        for password in (
+            'secret',
+            '!secret',
+            '!' + 'a' * (UNUSABLE_PASSWORD_SUFFIX_LENGTH - 1),
+            '!' + '-' * UNUSABLE_PASSWORD_SUFFIX_LENGTH,
+            'pbkdf2_sha256',
+            'argon2$secret',
+            'bcrypt_sha256$secret',
+        ):
+            self.assertFalse(hashers.is_hashed(password), password)
+
+    def test_plain_password_is_hashed_on_save(self):
+        for password in ('secret', '!secret'):
+            User.objects.all().delete()
+            user = self.create_user(password)
+            user.refresh_from_db()
+            self.assertNotEqual(user.password, password)
+            self.assertTrue(user.password.startswith('pbkdf2_sha256$10$'))
+            self.assertTrue(user.check_password(password))
+
+    def test_hash_is_not_rehashed_on_save(self):
+        encoded = make_password('secret')
+        user = self.create_user(encoded)
+        user.save()
+        user.refresh_from_db()
+        self.assertEqual(user.password, encoded)
+
+    def test_unusable_password_stays_unusable(self):
+        user = self.create_user(make_password(None))
+        user.save()
+        user.refresh_from_db()
+        self.assertFalse(is_password_usable(user.password))
+        self.assertFalse(user.check_password(''))
+
+    def test_set_password(self):
+        user = self.create_user('old')
+        user.set_password('new')
+        user.save()
+        user.refresh_from_db()
+        self.assertTrue(user.check_password('new'))
+        self.assertFalse(user.check_password('old'))
+
+    def test_rehash_on_login_with_new_iterations(self):
+        user = self.create_user('secret')
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=20):
+            with mock.patch.object(
+                User, 'save', autospec=True, side_effect=User.save
+            ) as save:
+                self.assertTrue(user.check_password('secret'))
+            save.assert_called_once_with(user, update_fields=('password',))
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$20$'))
+
+    def test_rehash_on_login_with_old_algorithm(self):
+        with override_settings(PASSWORD_HASHERS=[ARGON2]):
+            user = self.create_user('secret')
+        self.assertTrue(user.password.startswith('argon2'))
+        with override_settings(PASSWORD_HASHERS=[PBKDF2, ARGON2]):
+            self.assertTrue(user.check_password('secret'))
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('pbkdf2_sha256$10$'))
+
+    def test_wrong_password_is_not_rehashed(self):
+        user = self.create_user('secret')
+        encoded = user.password
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=20):
+            self.assertFalse(user.check_password('wrong'))
+        user.refresh_from_db()
+        self.assertEqual(user.password, encoded)
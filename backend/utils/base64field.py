@@ -6,17 +6,22 @@ from django.core.files.base import ContentFile
 from rest_framework import serializers
 
 
+def decode_base64_image(data: str):
+    """Декодирование картинки из строки вида data:image/...;base64,..."""
+    format, imgstr = data.split(';base64,')
+    ext = format.split('/')[-1]
+    return ContentFile(
+        base64.b64decode(imgstr),
+        name=f'{str(uuid.uuid4())}.{ext}'
+    )
+
+
 class Base64ImageField(serializers.ImageField):
     """Поле для картинок в формате Base64"""
 
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
-            format, imgstr = data.split(';base64,')
-            ext = format.split('/')[-1]
-            data = ContentFile(
-                base64.b64decode(imgstr),
-                name=f'{str(uuid.uuid4())}.{ext}'
-            )
+            data = decode_base64_image(data)
         return super().to_internal_value(data)
 
     def to_representation(self, value):
@@ -0,0 +1,333 @@
+"""
+Генерация синтетического набора данных для нагрузочных проверок.
+
+Популярность рецептов и авторов, активность пользователей и выбор
+ингредиентов распределены по Ципфу, поэтому у нескольких авторов
+оказываются огромные числа подписчиков, а у большинства — единицы.
+Строки пишутся в PostgreSQL через COPY FROM STDIN, на остальных базах —
+через bulk_create. Все случайные величины берутся из одного
+генератора, поэтому при одинаковом seed набор воспроизводится.
+"""
+import csv
+import io
+import itertools
+import random
+from bisect import bisect
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.color import no_style
+from django.db import connection
+from django.db.models import Max
+from django.utils import timezone
+
+from api.constants import (
+    MAX_COOKING_TIME, MAX_INGREDIENT_AMOUNT,
+    MIN_COOKING_TIME, MIN_INGREDIENT_AMOUNT
+)
+from ingredients.models import Ingredient
+from recipes.models import (
+    Favorites, Recipe, RecipeIngredient, RecipeScore, ShoppingCart
+)
+from users.models import Follower
+
+
+User = get_user_model()
+
+# Алфавит shortuuid.ShortUUID() по умолчанию
+SHORT_CODE_ALPHABET = (
+    '23456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+)
+# Коды синтетических рецептов длиннее кодов из API, поэтому не
+# пересекаются с ними; 57^6 ≈ 3.4e10 рецептов
+DATASET_SHORT_CODE_LENGTH = 6
+
+# Картинка 1x1 PNG, общая для всех сгенерированных рецептов
+PLACEHOLDER_IMAGE = bytes.fromhex(
+    '89504e470d0a1a0a0000000d4948445200000001000000010806000000'
+    '1f15c4890000000d49444154789c63f8cfc0f01f0005000201e5273fa7'
+    '0000000049454e44ae426082'
+)
+
+INGREDIENTS_PER_RECIPE = (3, 10)
+
+
+class ZipfSampler:
+    """Выбор элементов последовательности с вероятностью ~ 1 / rank^s"""
+
+    def __init__(self, items: list, exponent: float, rng: random.Random):
+        self.items = list(items)
+        rng.shuffle(self.items)
+        self.rng = rng
+        self.cum_weights = list(itertools.accumulate(
+            1 / rank ** exponent for rank in range(1, len(self.items) + 1)
+        ))
+        self.total = self.cum_weights[-1] if self.cum_weights else 0
+
+    def __len__(self):
+        return len(self.items)
+
+    def weight(self, index: int):
+        """Доля элемента с рангом index + 1"""
+        previous = self.cum_weights[index - 1] if index else 0
+        return (self.cum_weights[index] - previous) / self.total
+
+    def choice(self):
+        return self.items[
+            bisect(self.cum_weights, self.rng.random() * self.total)
+        ]
+
+    def sample(self, count: int, exclude=None):
+        """
+        count различных элементов, кроме exclude.
+
+        Если выборка по Ципфу слишком часто попадает в уже выбранное,
+        остаток добирается равномерно.
+        """
+        available = len(self.items) - (exclude is not None)
+        count = min(count, available)
+        chosen = set()
+        attempts = count * 4
+        while len(chosen) < count and attempts:
+            item = self.choice()
+            if item != exclude:
+                chosen.add(item)
+            attempts -= 1
+        if len(chosen) < count:
+            rest = [
+                item for item in self.items
+                if item not in chosen and item != exclude
+            ]
+            chosen.update(self.rng.sample(rest, count - len(chosen)))
+        return chosen
+
+
+def spread(total: int, sampler: ZipfSampler, rng: random.Random):
+    """
+    Количество связей для каждого элемента sampler.
+
+    Ожидаемое количество пропорционально весу элемента, сумма близка
+    к total. Дробная часть округляется случайно.
+    """
+    for index, item in enumerate(sampler.items):
+        expected = total * sampler.weight(index)
+        count = int(expected)
+        if rng.random() < expected - count:
+            count += 1
+        if count:
+            yield item, count
+
+
+class RowWriter:
+    """Запись строк в таблицу модели пачками"""
+
+    def __init__(self, model, fields: tuple, batch_size: int):
+        self.model = model
+        self.fields = [model._meta.get_field(field) for field in fields]
+        self.batch_size = batch_size
+        self.use_copy = connection.vendor == 'postgresql'
+        self.written = 0
+
+    def write(self, rows):
+        rows = iter(rows)
+        while True:
+            batch = list(itertools.islice(rows, self.batch_size))
+            if not batch:
+                return self.written
+            if self.use_copy:
+                self.copy(batch)
+            else:
+                self.model.objects.bulk_create(
+                    self.model(**{
+                        field.attname: value
+                        for field, value in zip(self.fields, row)
+                    })
+                    for row in batch
+                )
+            self.written += len(batch)
+
+    def copy(self, batch: list):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(batch)
+        buffer.seek(0)
+        columns = ', '.join(
+            connection.ops.quote_name(field.column) for field in self.fields
+        )
+        with connection.cursor() as cursor:
+            cursor.cursor.copy_expert(
+                f'COPY {connection.ops.quote_name(self.model._meta.db_table)}'
+                f' ({columns}) FROM STDIN WITH (FORMAT csv)',
+                buffer
+            )
+
+
+def next_id(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def reset_sequences(models: list):
+    """Сдвиг последовательностей id после вставки с явными id"""
+    statements = connection.ops.sequence_reset_sql(no_style(), models)
+    with connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def load_ingredients(path: str):
+    """Ингредиенты из CSV (название, единица), которых еще нет в базе"""
+    existing = set(Ingredient.objects.values_list('name', flat=True))
+    with open(path, encoding='utf-8') as source:
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit=unit)
+            for name, unit in csv.reader(source)
+            if name not in existing
+        )
+    return list(Ingredient.objects.values_list('pk', flat=True))
+
+
+def dataset_short_code(recipe_id: int):
+    """
+    Короткий код синтетического рецепта: id в системе счисления
+    по алфавиту shortuuid, дополненный до DATASET_SHORT_CODE_LENGTH.
+
+    id уникальны, поэтому коды уникальны без проверки по базе.
+    """
+    base = len(SHORT_CODE_ALPHABET)
+    digits = []
+    while recipe_id:
+        recipe_id, digit = divmod(recipe_id, base)
+        digits.append(SHORT_CODE_ALPHABET[digit])
+    return ''.join(reversed(digits)).rjust(
+        DATASET_SHORT_CODE_LENGTH, SHORT_CODE_ALPHABET[0]
+    )
+
+
+class DatasetGenerator:
+    """Генерация пользователей, рецептов и связей между ними"""
+
+    def __init__(
+        self, seed: int, exponent: float, batch_size: int, days: int
+    ):
+        self.rng = random.Random(seed)
+        self.seed = seed
+        self.exponent = exponent
+        self.batch_size = batch_size
+        self.now = timezone.now()
+        self.days = days
+
+    def sampler(self, items):
+        return ZipfSampler(items, self.exponent, self.rng)
+
+    def moment(self):
+        """Случайный момент за последние days дней"""
+        return self.now - timedelta(
+            seconds=self.rng.random() * self.days * 86400
+        )
+
+    def writer(self, model, fields):
+        return RowWriter(model, fields, self.batch_size)
+
+    def users(self, count: int):
+        first_id = next_id(User)
+        password = make_password(f'dataset-{self.seed}')
+        prefix = f'ds{self.seed}_'
+        fields = (
+            'id', 'password', 'is_superuser', 'username', 'first_name',
+            'last_name', 'email', 'is_staff', 'is_active', 'date_joined'
+        )
+        rows = (
+            (
+                user_id, password, False, f'{prefix}{user_id}',
+                'Имя', f'Фамилия {user_id}',
+                f'{prefix}{user_id}@example.com', False, True, self.now
+            )
+            for user_id in range(first_id, first_id + count)
+        )
+        self.writer(User, fields).write(rows)
+        return list(range(first_id, first_id + count))
+
+    def recipes(self, count: int, user_ids: list, ingredient_ids: list):
+        image = default_storage.save(
+            Recipe._meta.get_field('image').upload_to + 'dataset.png',
+            ContentFile(PLACEHOLDER_IMAGE)
+        )
+        first_id = next_id(Recipe)
+        recipe_ids = list(range(first_id, first_id + count))
+        authors = self.sampler(user_ids)
+
+        recipe_rows = (
+            (
+                recipe_id, f'Рецепт {recipe_id}',
+                f'Описание рецепта {recipe_id}',
+                self.rng.randint(MIN_COOKING_TIME, min(MAX_COOKING_TIME, 240)),
+                image, authors.choice(), dataset_short_code(recipe_id),
+                self.now
+            )
+            for recipe_id in recipe_ids
+        )
+        self.writer(Recipe, (
+            'id', 'name', 'text', 'cooking_time',
+            'image', 'author', 'short_code', 'updated_at'
+        )).write(recipe_rows)
+        self.writer(RecipeScore, ('recipe', 'score')).write(
+            (recipe_id, 0) for recipe_id in recipe_ids
+        )
+
+        ingredients = self.sampler(ingredient_ids)
+        ingredient_rows = (
+            (
+                recipe_id, ingredient_id,
+                self.rng.randint(
+                    MIN_INGREDIENT_AMOUNT, min(MAX_INGREDIENT_AMOUNT, 1000)
+                )
+            )
+            for recipe_id in recipe_ids
+            for ingredient_id in ingredients.sample(
+                self.rng.randint(*INGREDIENTS_PER_RECIPE)
+            )
+        )
+        written = self.writer(
+            RecipeIngredient, ('recipe', 'ingredient', 'amount')
+        ).write(ingredient_rows)
+        return recipe_ids, written
+
+    def relations(
+        self, model, fields: tuple, total: int,
+        sources: ZipfSampler, targets: ZipfSampler, is_follow=False
+    ):
+        """
+        Уникальные пары (источник, цель) для модели связи.
+
+        Активность источников и популярность целей распределены
+        по Ципфу. Подписка на самого себя не создается.
+        """
+        rows = (
+            (source, target) if is_follow
+            else (source, target, self.moment())
+            for source, count in spread(total, sources, self.rng)
+            for target in targets.sample(
+                count, exclude=source if is_follow else None
+            )
+        )
+        return self.writer(model, fields).write(rows)
+
+    def favorites(self, total: int, activity, popularity):
+        return self.relations(
+            Favorites, ('user', 'recipe', 'created_at'),
+            total, activity, popularity
+        )
+
+    def shopping_cart(self, total: int, activity, popularity):
+        return self.relations(
+            ShoppingCart, ('user', 'recipe', 'created_at'),
+            total, activity, popularity
+        )
+
+    def follows(self, total: int, activity, authors):
+        return self.relations(
+            Follower, ('subscriber', 'subscribed'),
+            total, activity, authors, is_follow=True
+        )
@@ -0,0 +1,119 @@
+import json
+from collections import defaultdict
+from datetime import datetime, time
+from itertools import islice
+
+from django.db.models import QuerySet
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from recipes.models import RecipeIngredient
+
+
+RECIPE_FIELDS = (
+    'id', 'name', 'text', 'cooking_time', 'image',
+    'short_code', 'updated_at',
+    'author_id', 'author__email', 'author__username',
+    'author__first_name', 'author__last_name'
+)
+
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def parse_updated_since(value: str):
+    """Разбор границы инкрементальной выгрузки (дата или дата и время)"""
+    try:
+        moment = parse_datetime(value)
+        if moment is None:
+            day = parse_date(value)
+            if day is None:
+                return None
+            moment = datetime.combine(day, time.min)
+    except ValueError:
+        return None
+
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def get_ingredients_map(recipe_ids: list):
+    """Ингредиенты для пачки рецептов одним запросом"""
+    ingredients_map = defaultdict(list)
+    rows = RecipeIngredient.objects.filter(
+        recipe_id__in=recipe_ids
+    ).order_by('recipe_id', 'pk').values_list(
+        'recipe_id', 'ingredient_id', 'ingredient__name',
+        'ingredient__measurement_unit', 'amount'
+    )
+
+    for recipe_id, pk, name, measurement_unit, amount in rows:
+        ingredients_map[recipe_id].append({
+            'id': pk,
+            'name': name,
+            'measurement_unit': measurement_unit,
+            'amount': amount
+        })
+
+    return ingredients_map
+
+
+def iter_recipes(queryset: QuerySet, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Построчный обход рецептов вместе с автором и ингредиентами.
+
+    Рецепты читаются серверным курсором, ингредиенты подгружаются
+    отдельным запросом на каждую пачку из chunk_size рецептов,
+    поэтому расход памяти не зависит от размера выгрузки.
+    """
+    rows = queryset.order_by('pk').values(
+        *RECIPE_FIELDS
+    ).iterator(chunk_size=chunk_size)
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+
+        ingredients_map = get_ingredients_map(
+            [row['id'] for row in chunk]
+        )
+
+        for row in chunk:
+            yield {
+                'id': row['id'],
+                'name': row['name'],
+                'text': row['text'],
+                'cooking_time': row['cooking_time'],
+                'image': row['image'],
+                'short_code': row['short_code'],
+                'updated_at': row['updated_at'].isoformat(),
+                'author': {
+                    'id': row['author_id'],
+                    'email': row['author__email'],
+                    'username': row['author__username'],
+                    'first_name': row['author__first_name'],
+                    'last_name': row['author__last_name']
+                },
+                'ingredients': ingredients_map.get(row['id'], [])
+            }
+
+
+def iter_ndjson(queryset: QuerySet, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """
+    Выгрузка рецептов в формате NDJSON (по строке на рецепт).
+
+    Строки отдаются блоками по chunk_size, чтобы не делать
+    отдельную запись в сокет на каждый рецепт.
+    """
+    dumps = json.JSONEncoder(
+        ensure_ascii=False, separators=(',', ':')
+    ).encode
+    recipes = iter_recipes(queryset, chunk_size)
+
+    while True:
+        lines = [dumps(recipe) for recipe in islice(recipes, chunk_size)]
+        if not lines:
+            return
+        lines.append('')
+        yield '\n'.join(lines).encode('utf-8')
@@ -0,0 +1,56 @@
+"""
+Хешеры паролей и проверки сохраненных хешей.
+
+Хеширование выполняется в потоке запроса: воркеры gunicorn
+синхронные, и передача хеша в пул потоков только добавляла бы
+переключение потоков. Число одновременных хеширований ограничено
+числом воркеров, пропускная способность входа — выбором
+PASSWORD_HASHER и PASSWORD_PBKDF2_ITERATIONS.
+"""
+from django.conf import settings
+from django.contrib.auth.hashers import (
+    UNUSABLE_PASSWORD_PREFIX, UNUSABLE_PASSWORD_SUFFIX_LENGTH,
+    PBKDF2PasswordHasher, get_hasher, identify_hasher
+)
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2 с числом итераций из PASSWORD_PBKDF2_ITERATIONS"""
+
+    @property
+    def iterations(self):
+        return settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+def is_unusable(password: str):
+    """Строка вида make_password(None): '!' и случайный суффикс"""
+    suffix = password[len(UNUSABLE_PASSWORD_PREFIX):]
+    return (
+        password.startswith(UNUSABLE_PASSWORD_PREFIX)
+        and len(suffix) == UNUSABLE_PASSWORD_SUFFIX_LENGTH
+        and suffix.isascii()
+        and suffix.isalnum()
+    )
+
+
+def is_hashed(password: str):
+    """Строка — результат make_password, а не открытый пароль"""
+    try:
+        # Имя алгоритма без параметров тоже опознается как хеш
+        identify_hasher(password).decode(password)
+    except (ValueError, IndexError):
+        return is_unusable(password)
+    return True
+
+
+def must_update(encoded: str):
+    """
+    Хеш нужно пересчитать: он получен не основным хешером или
+    с другими параметрами (число итераций, стоимость)
+    """
+    preferred = get_hasher('default')
+    hasher = identify_hasher(encoded)
+    return (
+        hasher.algorithm != preferred.algorithm
+        or preferred.must_update(encoded)
+    )
@@ -0,0 +1,76 @@
+import os
+import time
+from itertools import islice
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+
+def iter_media_files(root, exclude=()):
+    """
+    Обход дерева MEDIA_ROOT без построения полного списка файлов.
+
+    Возвращает пары (путь относительно root, время изменения).
+    """
+    stack = ['']
+    while stack:
+        directory = stack.pop()
+        with os.scandir(os.path.join(root, directory)) as entries:
+            for entry in entries:
+                name = (
+                    f'{directory}/{entry.name}' if directory else entry.name
+                )
+                if name in exclude:
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(name)
+                elif entry.is_file(follow_symlinks=False):
+                    yield name, entry.stat(follow_symlinks=False).st_mtime
+
+
+def get_referenced(names: list):
+    """Имена файлов из пачки, на которые ссылаются записи в базе"""
+    referenced = set()
+    for reference in settings.CONTENT_STORAGE_REFERENCES:
+        model_label, field_name = reference.rsplit('.', 1)
+        model = apps.get_model(model_label)
+        referenced.update(
+            model._default_manager.filter(
+                **{f'{field_name}__in': names}
+            ).values_list(field_name, flat=True)
+        )
+    return referenced
+
+
+def iter_orphans(root, grace_seconds: float, batch_size: int, exclude=()):
+    """
+    Файлы старше grace_seconds, на которые нет ссылок в базе.
+
+    Ссылки проверяются пачками по batch_size имен, поэтому ни дерево
+    файлов, ни список путей из базы не загружаются в память целиком.
+    """
+    deadline = time.time() - grace_seconds
+    candidates = (
+        name for name, mtime in iter_media_files(root, exclude)
+        if mtime < deadline
+    )
+
+    while True:
+        batch = list(islice(candidates, batch_size))
+        if not batch:
+            return
+        referenced = get_referenced(batch)
+        for name in batch:
+            if name not in referenced:
+                yield name
+
+
+def delete_orphan(name: str):
+    """
+    Фоновая задача удаления замененного файла.
+
+    Хранилище удалит файл, только если на него больше нет ссылок
+    и он старше CONTENT_STORAGE_DELETE_GRACE; остальное соберет gc_media.
+    """
+    default_storage.delete(name)
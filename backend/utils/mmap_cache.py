@@ -0,0 +1,424 @@
+"""
+Бэкенд кеша Django в файле, отображенном в память.
+
+Все процессы, открывшие один LOCATION (воркеры gunicorn одного
+контейнера), видят одни и те же записи, поэтому кеш не дублируется
+по воркерам, как locmem, и не требует Redis или memcached.
+
+Таблица наборно-ассоциативная: хеш ключа выбирает набор из WAYS
+слотов фиксированного размера SLOT_SIZE, внутри набора ключ ищется
+перебором. Если свободного или просроченного слота нет, вытесняется
+запись по алгоритму CLOCK: стрелка набора обходит слоты, снимая
+признак обращения, и занимает первый слот без него. Набор изменяется
+под блокировкой fcntl на его диапазон байт (между процессами) и под
+одной из полос threading.Lock (между потоками процесса).
+
+django.core.cache.caches создает экземпляр бэкенда в каждом потоке,
+а блокировки fcntl принадлежат процессу и потоки одного процесса не
+разделяют. Поэтому дескриптор, отображение и полосы блокировок общие
+для всех экземпляров процесса с одним файлом и геометрией таблицы.
+
+Значение, которое вместе с ключом не помещается в слот, не
+кешируется: set() удаляет прежнее значение ключа, set_many()
+возвращает такие ключи, add() возвращает False.
+
+Пример настройки:
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'utils.mmap_cache.MmapCache',
+            'LOCATION': '/tmp/foodgram-cache.bin',
+            'OPTIONS': {'SLOTS': 8192, 'WAYS': 8, 'SLOT_SIZE': 4096},
+        }
+    }
+"""
+import math
+import mmap
+import os
+import pickle
+import struct
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+from .shared_memory import fcntl, key_hash
+
+
+MAGIC = b'FGCACHE1'
+# Заголовок файла: MAGIC, количество наборов, слотов в наборе, размер слота
+FILE_HEADER = struct.Struct('<8sIII')
+FILE_HEADER_SIZE = 64
+# Заголовок набора: позиция стрелки CLOCK
+SET_HEADER = struct.Struct('<I4x')
+# Заголовок слота: хеш ключа (0 — пустой), время истечения,
+# длины ключа и значения, признак обращения
+SLOT_HEADER = struct.Struct('<QdIIB3x')
+
+LOCK_STRIPES = 64
+
+
+class SharedMapping:
+    """Открытый файл кеша, общий для экземпляров бэкенда в процессе"""
+
+    def __init__(self, fd: int, map: mmap.mmap):
+        self.fd = fd
+        self.map = map
+        self.stripes = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+    def close(self):
+        self.map.close()
+        os.close(self.fd)
+
+
+# (путь, pid, наборов, слотов в наборе, размер слота) -> SharedMapping
+mappings = {}
+mappings_lock = threading.Lock()
+
+
+class MmapCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self.path = location
+        self.ways = int(options.get('WAYS', 8))
+        self.sets = max(1, int(options.get('SLOTS', 8192)) // self.ways)
+        self.slot_size = int(options.get('SLOT_SIZE', 4096))
+        self.payload_size = self.slot_size - SLOT_HEADER.size
+        self.set_size = SET_HEADER.size + self.ways * self.slot_size
+        self.size = FILE_HEADER_SIZE + self.sets * self.set_size
+        self.pid = None
+
+    # ===========================================================
+    #                       Файл и блокировки
+    # ===========================================================
+
+    def open(self):
+        """Общее отображение файла в текущем процессе (заново после fork)"""
+        pid = os.getpid()
+        key = (self.path, pid, self.sets, self.ways, self.slot_size)
+        with mappings_lock:
+            mapping = mappings.get(key)
+            if mapping is None:
+                # Файлы, унаследованные от родителя при fork: блокировок
+                # этого процесса на них нет, закрытие ничего не снимает
+                for other in list(mappings):
+                    if other[1] != pid:
+                        mappings.pop(other).close()
+                mapping = mappings[key] = self.map_file()
+        self.fd = mapping.fd
+        self.map = mapping.map
+        self.stripes = mapping.stripes
+        self.pid = pid
+
+    def map_file(self):
+        header = FILE_HEADER.pack(MAGIC, self.sets, self.ways, self.slot_size)
+        while True:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            if fcntl:
+                fcntl.lockf(fd, fcntl.LOCK_EX, FILE_HEADER_SIZE, 0)
+            if os.fstat(fd).st_nlink and (
+                os.pread(fd, FILE_HEADER.size, 0) == header
+            ):
+                break
+            if os.fstat(fd).st_nlink:
+                # Новый файл или другая геометрия: таблица создается
+                # заново в новом файле, процессы со старой геометрией
+                # продолжают работать со старым
+                self.replace(header)
+            # Иначе файл успел заменить другой процесс
+            os.close(fd)
+        mapping = SharedMapping(fd, mmap.mmap(fd, self.size))
+        if fcntl:
+            fcntl.lockf(fd, fcntl.LOCK_UN, FILE_HEADER_SIZE, 0)
+        return mapping
+
+    def replace(self, header: bytes):
+        temporary = f'{self.path}.{os.getpid()}.tmp'
+        fd = os.open(temporary, os.O_RDWR | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            os.ftruncate(fd, self.size)
+            os.pwrite(fd, header, 0)
+        finally:
+            os.close(fd)
+        os.replace(temporary, self.path)
+
+    def locate(self, key: str):
+        """Хеш ключа, его байты и индекс набора"""
+        encoded = key.encode('utf-8')
+        hashed = key_hash(encoded)
+        return hashed, encoded, hashed % self.sets
+
+    def lock(self, index: int):
+        return SetLock(self, index)
+
+    def set_offset(self, index: int):
+        return FILE_HEADER_SIZE + index * self.set_size
+
+    def slot_offset(self, index: int, way: int):
+        return (
+            self.set_offset(index) + SET_HEADER.size + way * self.slot_size
+        )
+
+    # ===========================================================
+    #                       Слоты набора
+    # ===========================================================
+
+    def find(self, index: int, hashed: int, encoded: bytes):
+        """
+        Слот ключа в наборе или None.
+
+        Просроченная запись освобождается, и ключ считается
+        отсутствующим.
+        """
+        for way in range(self.ways):
+            offset = self.slot_offset(index, way)
+            stored_hash, expires, key_length, _, _ = (
+                SLOT_HEADER.unpack_from(self.map, offset)
+            )
+            if stored_hash != hashed:
+                continue
+            start = offset + SLOT_HEADER.size
+            if self.map[start:start + key_length] != encoded:
+                continue
+            if expires <= time.time():
+                self.clear_slot(index, way)
+                return None
+            return way
+        return None
+
+    def read(self, index: int, way: int):
+        offset = self.slot_offset(index, way)
+        stored_hash, expires, key_length, value_length, _ = (
+            SLOT_HEADER.unpack_from(self.map, offset)
+        )
+        SLOT_HEADER.pack_into(
+            self.map, offset,
+            stored_hash, expires, key_length, value_length, 1
+        )
+        start = offset + SLOT_HEADER.size + key_length
+        return self.map[start:start + value_length]
+
+    def write(
+        self, index: int, way: int, hashed: int,
+        encoded: bytes, value: bytes, expires: float, referenced: bool
+    ):
+        offset = self.slot_offset(index, way)
+        SLOT_HEADER.pack_into(
+            self.map, offset,
+            hashed, expires, len(encoded), len(value), referenced
+        )
+        start = offset + SLOT_HEADER.size
+        self.map[start:start + len(encoded) + len(value)] = encoded + value
+
+    def clear_slot(self, index: int, way: int):
+        SLOT_HEADER.pack_into(
+            self.map, self.slot_offset(index, way), 0, 0, 0, 0, 0
+        )
+
+    def free_way(self, index: int):
+        """Свободный или просроченный слот, иначе вытесняемый по CLOCK"""
+        now = time.time()
+        for way in range(self.ways):
+            stored_hash, expires, _, _, _ = SLOT_HEADER.unpack_from(
+                self.map, self.slot_offset(index, way)
+            )
+            if not stored_hash or expires <= now:
+                return way
+
+        offset = self.set_offset(index)
+        hand, = SET_HEADER.unpack_from(self.map, offset)
+        for _ in range(2 * self.ways):
+            way = hand % self.ways
+            hand += 1
+            slot = self.slot_offset(index, way)
+            header = SLOT_HEADER.unpack_from(self.map, slot)
+            if not header[4]:
+                break
+            SLOT_HEADER.pack_into(self.map, slot, *header[:4], 0)
+        SET_HEADER.pack_into(self.map, offset, hand % self.ways)
+        return way
+
+    def store(self, key: str, value: bytes, expires: float, only_new=False):
+        """
+        Запись значения; False, если запись не выполнена.
+
+        Не помещающееся в слот значение удаляет прежнее значение ключа.
+        """
+        hashed, encoded, index = self.locate(key)
+        fits = len(encoded) + len(value) <= self.payload_size
+        with self.lock(index):
+            way = self.find(index, hashed, encoded)
+            if only_new and way is not None:
+                return False
+            if not fits or expires <= time.time():
+                if way is not None:
+                    self.clear_slot(index, way)
+                return False
+            # Новая запись получает признак обращения только при
+            # повторном чтении и вытесняется раньше используемых
+            referenced = way is not None
+            if way is None:
+                way = self.free_way(index)
+            self.write(
+                index, way, hashed, encoded, value, expires, referenced
+            )
+        return True
+
+    def get_expires(self, timeout):
+        expires = self.get_backend_timeout(timeout)
+        return math.inf if expires is None else expires
+
+    def prepare_key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    # ===========================================================
+    #                       API кеша Django
+    # ===========================================================
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.prepare_key(key, version)
+        return self.store(
+            key,
+            pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+            self.get_expires(timeout),
+            only_new=True
+        )
+
+    def get(self, key, default=None, version=None):
+        key = self.prepare_key(key, version)
+        hashed, encoded, index = self.locate(key)
+        with self.lock(index):
+            way = self.find(index, hashed, encoded)
+            if way is None:
+                return default
+            value = self.read(index, way)
+        return pickle.loads(value)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.prepare_key(key, version)
+        self.store(
+            key,
+            pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+            self.get_expires(timeout)
+        )
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        """Ключи, значения которых не поместились в слот"""
+        expires = self.get_expires(timeout)
+        failed = []
+        for key, value in data.items():
+            stored = self.store(
+                self.prepare_key(key, version),
+                pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                expires
+            )
+            if not stored and expires > time.time():
+                failed.append(key)
+        return failed
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.prepare_key(key, version)
+        hashed, encoded, index = self.locate(key)
+        expires = self.get_expires(timeout)
+        with self.lock(index):
+            way = self.find(index, hashed, encoded)
+            if way is None:
+                return False
+            if expires <= time.time():
+                self.clear_slot(index, way)
+                return True
+            offset = self.slot_offset(index, way)
+            header = SLOT_HEADER.unpack_from(self.map, offset)
+            SLOT_HEADER.pack_into(
+                self.map, offset, header[0], expires, *header[2:]
+            )
+        return True
+
+    def delete(self, key, version=None):
+        key = self.prepare_key(key, version)
+        hashed, encoded, index = self.locate(key)
+        with self.lock(index):
+            way = self.find(index, hashed, encoded)
+            if way is None:
+                return False
+            self.clear_slot(index, way)
+        return True
+
+    def has_key(self, key, version=None):
+        key = self.prepare_key(key, version)
+        hashed, encoded, index = self.locate(key)
+        with self.lock(index):
+            return self.find(index, hashed, encoded) is not None
+
+    def incr(self, key, delta=1, version=None):
+        """Атомарное изменение числа под блокировкой набора"""
+        prepared = self.prepare_key(key, version)
+        hashed, encoded, index = self.locate(prepared)
+        with self.lock(index):
+            way = self.find(index, hashed, encoded)
+            if way is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(self.read(index, way)) + delta
+            pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+            if len(encoded) + len(pickled) > self.payload_size:
+                self.clear_slot(index, way)
+                raise ValueError(f"Key '{key}' value is too large")
+            expires = SLOT_HEADER.unpack_from(
+                self.map, self.slot_offset(index, way)
+            )[1]
+            self.write(index, way, hashed, encoded, pickled, expires, True)
+        return value
+
+    def clear(self):
+        if self.pid != os.getpid():
+            self.open()
+        for stripe in self.stripes:
+            stripe.acquire()
+        try:
+            if fcntl:
+                fcntl.lockf(self.fd, fcntl.LOCK_EX, 0, FILE_HEADER_SIZE)
+            try:
+                for index in range(self.sets):
+                    SET_HEADER.pack_into(
+                        self.map, self.set_offset(index), 0
+                    )
+                    for way in range(self.ways):
+                        self.clear_slot(index, way)
+            finally:
+                if fcntl:
+                    fcntl.lockf(self.fd, fcntl.LOCK_UN, 0, FILE_HEADER_SIZE)
+        finally:
+            for stripe in self.stripes:
+                stripe.release()
+
+
+class SetLock:
+    """Блокировка набора между потоками и между процессами"""
+
+    def __init__(self, cache: MmapCache, index: int):
+        self.cache = cache
+        self.index = index
+
+    def __enter__(self):
+        cache = self.cache
+        if cache.pid != os.getpid():
+            cache.open()
+        self.stripe = cache.stripes[self.index % LOCK_STRIPES]
+        self.stripe.acquire()
+        if fcntl:
+            fcntl.lockf(
+                cache.fd, fcntl.LOCK_EX,
+                cache.set_size, cache.set_offset(self.index)
+            )
+
+    def __exit__(self, *exc_info):
+        cache = self.cache
+        if fcntl:
+            fcntl.lockf(
+                cache.fd, fcntl.LOCK_UN,
+                cache.set_size, cache.set_offset(self.index)
+            )
+        self.stripe.release()
@@ -0,0 +1,59 @@
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.db.models import (
+    Case, Count, F, IntegerField, OuterRef, QuerySet, Subquery, Value, When,
+    Window
+)
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Coalesce, RowNumber
+
+
+def count_subquery(queryset: QuerySet, field_name: str):
+    """Количество связанных строк коррелированным подзапросом"""
+    return Coalesce(
+        Subquery(
+            queryset.filter(
+                **{field_name: OuterRef('pk')}
+            ).order_by().values(field_name).annotate(
+                count=Count('pk')
+            ).values('count'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def filter_in_order(queryset: QuerySet, ids: list):
+    """Объекты с перечисленными id в порядке списка"""
+    return queryset.filter(pk__in=ids).order_by(Case(
+        *(When(pk=pk, then=Value(index)) for index, pk in enumerate(ids)),
+    ))
+
+
+def limit_per_group(queryset: QuerySet, field_name: str, limit: int):
+    """
+    Первые limit строк (по pk) для каждого значения field_name.
+
+    Номер строки в группе считается оконной функцией ROW_NUMBER(),
+    отбор выполняется в базе. Django 3.2 не умеет фильтровать по
+    оконным выражениям, поэтому пронумерованная выборка оборачивается
+    в подзапрос.
+    """
+    ranked = queryset.order_by().annotate(
+        position=Window(
+            RowNumber(),
+            partition_by=F(field_name),
+            order_by=F('pk').asc()
+        )
+    ).values('pk', 'position')
+    try:
+        sql, params = ranked.query.sql_with_params()
+    except EmptyResultSet:
+        return queryset.none()
+    quote_name = connections[queryset.db].ops.quote_name
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT {quote_name(queryset.model._meta.pk.column)} '
+        f'FROM ({sql}) {quote_name("ranked")} '
+        f'WHERE {quote_name("position")} <= %s',
+        (*params, limit)
+    ))
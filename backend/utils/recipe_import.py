@@ -0,0 +1,220 @@
+import json
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+import shortuuid
+from PIL import Image
+
+from django.contrib.auth import get_user_model
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from api.constants import (
+    MIN_INGREDIENT_AMOUNT, MAX_INGREDIENT_AMOUNT,
+    MIN_COOKING_TIME, MAX_COOKING_TIME
+)
+from ingredients.models import Ingredient
+from recipes.models import (
+    SHORT_CODE_LENGTH, Recipe, RecipeIngredient, RecipeScore
+)
+from recipes.similarity import index_recipes
+from utils.base64field import decode_base64_image
+
+
+User = get_user_model()
+
+IMAGE_UPLOAD_TO = Recipe._meta.get_field('image').upload_to
+
+
+class ImportRecordError(Exception):
+    """Ошибка в строке импортируемого файла"""
+
+    def __init__(self, line: int, message):
+        self.line = line
+        super().__init__(f'строка {line}: {message}')
+
+
+def create_pool(workers: int):
+    """Пул процессов для декодирования картинок"""
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=django.setup
+    )
+
+
+def store_image(data: str):
+    """
+    Декодирование и сохранение картинки рецепта.
+
+    Выполняется в дочернем процессе. Помимо строки Base64 принимает
+    путь к уже загруженному файлу (как в выгрузке export_recipes).
+    Возвращает имя файла и признак того, что файл был создан.
+    """
+    if not data.startswith('data:image'):
+        if not default_storage.exists(data):
+            raise ValueError(f'Файл {data} не найден')
+        return data, False
+
+    image = decode_base64_image(data)
+    Image.open(image).verify()
+    return default_storage.save(IMAGE_UPLOAD_TO + image.name, image), True
+
+
+def parse_record(line: int, text: str):
+    """Разбор и проверка одной строки NDJSON"""
+    try:
+        record = json.loads(text)
+        author = record.get('author')
+        if isinstance(author, dict):
+            author = author.get('email')
+        ingredients = {}
+        for item in record['ingredients']:
+            amount = int(item['amount'])
+            if not MIN_INGREDIENT_AMOUNT <= amount <= MAX_INGREDIENT_AMOUNT:
+                raise ValueError(f'Недопустимое количество {amount}')
+            if item['name'] in ingredients:
+                raise ValueError('Повторяющийся ингредиент')
+            ingredients[item['name']] = amount
+        cooking_time = int(record['cooking_time'])
+        if not MIN_COOKING_TIME <= cooking_time <= MAX_COOKING_TIME:
+            raise ValueError(f'Недопустимое время {cooking_time}')
+        parsed = {
+            'line': line,
+            'author': author,
+            'name': record['name'],
+            'text': record['text'],
+            'cooking_time': cooking_time,
+            'image': record['image'],
+            'ingredients': ingredients
+        }
+    except (KeyError, TypeError, ValueError) as error:
+        raise ImportRecordError(line, repr(error))
+
+    if not ingredients:
+        raise ImportRecordError(line, 'Отсутствуют ингредиенты')
+    return parsed
+
+
+def resolve(records: list, key: str, queryset, field_name: str):
+    """Поиск связанных объектов для всей пачки одним запросом"""
+    values = set()
+    for record in records:
+        value = record[key]
+        values.update(value if isinstance(value, dict) else (value,))
+
+    found = dict(
+        queryset.filter(
+            **{f'{field_name}__in': values}
+        ).values_list(field_name, 'pk')
+    )
+
+    for record in records:
+        value = record[key]
+        for item in (value if isinstance(value, dict) else (value,)):
+            if item not in found:
+                raise ImportRecordError(
+                    record['line'], f'Не найден объект {item!r}'
+                )
+    return found
+
+
+def generate_short_codes(count: int):
+    """Уникальные короткие коды для пачки рецептов"""
+    codes = set()
+    generator = shortuuid.ShortUUID()
+
+    while len(codes) < count:
+        candidates = {
+            generator.random(length=SHORT_CODE_LENGTH)
+            for _ in range(count - len(codes))
+        } - codes
+        taken = set(
+            Recipe.objects.filter(
+                short_code__in=candidates
+            ).values_list('short_code', flat=True)
+        )
+        codes |= candidates - taken
+
+    return list(codes)
+
+
+def store_images(pool: ProcessPoolExecutor, records: list):
+    """
+    Параллельное декодирование картинок пачки.
+
+    При ошибке уже сохраненные файлы пачки удаляются.
+    """
+    futures = [
+        pool.submit(store_image, record['image']) for record in records
+    ]
+    images, error = [], None
+
+    for record, future in zip(records, futures):
+        try:
+            images.append(future.result())
+        except Exception as exc:
+            error = error or ImportRecordError(record['line'], exc)
+
+    if error:
+        delete_images(images)
+        raise error
+    return images
+
+
+def delete_images(images: list):
+    for name, created in images:
+        if created:
+            default_storage.delete(name)
+
+
+def import_chunk(pool: ProcessPoolExecutor, records: list):
+    """Импорт пачки рецептов в одной транзакции"""
+    authors = resolve(records, 'author', User.objects, 'email')
+    ingredients = resolve(
+        records, 'ingredients', Ingredient.objects, 'name'
+    )
+    images = store_images(pool, records)
+
+    try:
+        with transaction.atomic():
+            codes = generate_short_codes(len(records))
+            recipes = Recipe.objects.bulk_create([
+                Recipe(
+                    author_id=authors[record['author']],
+                    name=record['name'],
+                    text=record['text'],
+                    cooking_time=record['cooking_time'],
+                    image=image,
+                    short_code=code
+                )
+                for record, (image, _), code in zip(records, images, codes)
+            ])
+
+            if recipes and recipes[0].pk is None:
+                pks = dict(
+                    Recipe.objects.filter(
+                        short_code__in=codes
+                    ).values_list('short_code', 'pk')
+                )
+                for recipe in recipes:
+                    recipe.pk = pks[recipe.short_code]
+
+            # bulk_create не отправляет post_save (recipes.signals)
+            RecipeScore.objects.bulk_create(
+                RecipeScore(recipe_id=recipe.pk) for recipe in recipes
+            )
+            RecipeIngredient.objects.bulk_create([
+                RecipeIngredient(
+                    recipe_id=recipe.pk,
+                    ingredient_id=ingredients[name],
+                    amount=amount
+                )
+                for record, recipe in zip(records, recipes)
+                for name, amount in record['ingredients'].items()
+            ])
+            index_recipes(recipe.pk for recipe in recipes)
+    except Exception:
+        delete_images(images)
+        raise
+
+    return len(recipes)
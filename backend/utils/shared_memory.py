@@ -0,0 +1,175 @@
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: блокировка действует только внутри процесса
+    fcntl = None
+
+
+MAX_PROBES = 8
+
+MAGIC = b'FGTABLE2'
+# Заголовок файла: MAGIC, контрольная сумма формата записи, число слотов
+HEADER = struct.Struct('<8sII')
+HEADER_SIZE = 64
+
+
+def key_hash(key: bytes):
+    """Стабильный между процессами 64-битный хеш ключа (0 — пустой слот)"""
+    digest = hashlib.blake2b(key, digest_size=8).digest()
+    return int.from_bytes(digest, 'little') | 1
+
+
+class SharedTable:
+    """
+    Хеш-таблица фиксированного размера в файле, отображенном в память.
+
+    Файл разделяется всеми процессами (воркерами gunicorn), открывшими
+    один и тот же путь. Хеш ключа выбирает группу из MAX_PROBES слотов,
+    группа изменяется под блокировкой fcntl только на ее диапазон байт.
+    Ключ сравнивается по 64-битному хешу всего ключа; в слоте хранится
+    начало ключа длиной до key_size байт только для items().
+
+    Слот с истекшим ttl считается свободным. Если в группе нет ни
+    свободного, ни истекшего слота, занимается слот, который истекает
+    раньше остальных.
+    """
+
+    def __init__(self, path, slots: int, value_format: str, key_size=48):
+        self.path = path
+        self.groups = max(1, slots // MAX_PROBES)
+        self.slots = self.groups * MAX_PROBES
+        self.record = struct.Struct(f'<Qd{key_size}s{value_format}')
+        self.group_size = MAX_PROBES * self.record.size
+        self.key_size = key_size
+        self.lock = threading.Lock()
+        self.pid = None
+
+    def open(self):
+        """
+        Отображение файла в память (заново после fork).
+
+        Файл другого формата или размера очищается.
+        """
+        size = HEADER_SIZE + self.slots * self.record.size
+        header = HEADER.pack(
+            MAGIC, zlib.crc32(self.record.format.encode()), self.slots
+        )
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        if fcntl:
+            fcntl.lockf(fd, fcntl.LOCK_EX, HEADER_SIZE, 0)
+        try:
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self.map = mmap.mmap(fd, size)
+            if self.map[:HEADER.size] != header:
+                self.map[HEADER_SIZE:] = bytes(size - HEADER_SIZE)
+                self.map[:HEADER.size] = header
+        finally:
+            if fcntl:
+                fcntl.lockf(fd, fcntl.LOCK_UN, HEADER_SIZE, 0)
+        self.fd = fd
+        self.pid = os.getpid()
+
+    def lock_group(self, group: int):
+        if fcntl:
+            fcntl.lockf(
+                self.fd, fcntl.LOCK_EX,
+                self.group_size, HEADER_SIZE + group * self.group_size
+            )
+
+    def unlock_group(self, group: int):
+        if fcntl:
+            fcntl.lockf(
+                self.fd, fcntl.LOCK_UN,
+                self.group_size, HEADER_SIZE + group * self.group_size
+            )
+
+    def offset(self, index: int):
+        return HEADER_SIZE + index * self.record.size
+
+    def find(self, group: int, hashed: int):
+        """
+        Слот ключа в группе и его значения.
+
+        Если ключа нет — (свободный, истекший или раньше всех
+        истекающий слот, None).
+        """
+        now = time.time()
+        free, free_expires = None, math.inf
+        for index in range(group * MAX_PROBES, (group + 1) * MAX_PROBES):
+            stored_hash, expires, _, *values = self.record.unpack_from(
+                self.map, self.offset(index)
+            )
+            if stored_hash == hashed and expires > now:
+                return index, values
+            if not stored_hash or expires <= now:
+                expires = -math.inf
+            if free is None or expires < free_expires:
+                free, free_expires = index, expires
+        return free, None
+
+    def update(self, key: str, func, ttl: float = None):
+        """
+        Атомарное изменение значения по ключу.
+
+        func получает текущие значения (None для нового ключа) и
+        возвращает пару (новые значения, результат для вызывающего).
+        Через ttl секунд после изменения слот может быть занят другим
+        ключом, и ключ снова считается новым.
+        """
+        encoded = key.encode('utf-8')
+        hashed = key_hash(encoded)
+        group = hashed % self.groups
+        expires = math.inf if ttl is None else time.time() + ttl
+
+        with self.lock:
+            if self.pid != os.getpid():
+                self.open()
+
+            self.lock_group(group)
+            try:
+                index, current = self.find(group, hashed)
+                values, result = func(current)
+                self.record.pack_into(
+                    self.map, self.offset(index),
+                    hashed, expires, encoded[:self.key_size], *values
+                )
+                return result
+            finally:
+                self.unlock_group(group)
+
+    def items(self):
+        """Все действующие слоты: список пар (ключ, значения)"""
+        items = []
+        with self.lock:
+            if self.pid != os.getpid():
+                self.open()
+
+            for group in range(self.groups):
+                self.lock_group(group)
+                try:
+                    records = [
+                        self.record.unpack_from(self.map, self.offset(index))
+                        for index in range(
+                            group * MAX_PROBES, (group + 1) * MAX_PROBES
+                        )
+                    ]
+                finally:
+                    self.unlock_group(group)
+                now = time.time()
+                for stored_hash, expires, key, *values in records:
+                    if stored_hash and expires > now:
+                        items.append((
+                            key.rstrip(b'\0').decode('utf-8', 'replace'),
+                            values
+                        ))
+        return items
@@ -0,0 +1,133 @@
+import hashlib
+import os
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+from django.apps import apps
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+try:
+    import fcntl
+except ImportError:
+    # Windows: блокировка действует только внутри процесса
+    fcntl = None
+
+
+LOCK_STRIPES = 256
+
+stripes = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+# (путь файла блокировки, pid) -> дескриптор. Блокировки lockf
+# принадлежат процессу и снимаются все при закрытии любого его
+# дескриптора этого файла, поэтому дескриптор один на процесс и
+# не закрывается.
+lock_files = {}
+lock_files_lock = threading.Lock()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Файловое хранилище, именующее файлы по SHA-256 содержимого.
+
+    Одинаковые картинки хранятся в одном экземпляре, а имя файла
+    меняется вместе с содержимым, поэтому ссылки на него можно
+    кешировать бессрочно. Файл удаляется только тогда, когда на него
+    не ссылается ни одно поле из CONTENT_STORAGE_REFERENCES.
+
+    Проверка ссылок с удалением и сохранение файла с тем же именем
+    выполняются под общей блокировкой имени. Файлы моложе
+    CONTENT_STORAGE_DELETE_GRACE секунд не удаляются: запись, которая
+    на них сошлется, может быть еще не зафиксирована.
+    """
+
+    prefix = 'cas'
+    lock_name = '.storage.lock'
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+
+        name = self.get_content_name(name, content)
+        with self.locked(name):
+            if self.exists(name):
+                # Время изменения — начало отсрочки удаления для
+                # is_orphan и gc_media
+                os.utime(self.path(name))
+                return name
+            return self._save(name, content)
+
+    @contextmanager
+    def locked(self, name):
+        """
+        Блокировка имени файла между потоками и процессами.
+
+        Имена делятся на LOCK_STRIPES полос: полоса — threading.Lock
+        в процессе и байт файла lock_name под fcntl между процессами.
+        """
+        stripe = zlib.crc32(name.encode('utf-8')) % LOCK_STRIPES
+        with stripes[stripe]:
+            fd = self.get_lock_file()
+            if fcntl:
+                fcntl.lockf(fd, fcntl.LOCK_EX, 1, stripe)
+            try:
+                yield
+            finally:
+                if fcntl:
+                    fcntl.lockf(fd, fcntl.LOCK_UN, 1, stripe)
+
+    def get_lock_file(self):
+        """Дескриптор файла lock_name, общий для потоков процесса"""
+        path = os.path.join(self.location, self.lock_name)
+        key = (path, os.getpid())
+        with lock_files_lock:
+            if key not in lock_files:
+                os.makedirs(self.location, exist_ok=True)
+                lock_files[key] = os.open(
+                    path, os.O_RDWR | os.O_CREAT, 0o600
+                )
+            return lock_files[key]
+
+    def get_content_name(self, name, content):
+        digest = hashlib.sha256()
+        for chunk in content.chunks():
+            digest.update(chunk)
+        digest = digest.hexdigest()
+
+        ext = os.path.splitext(name)[1].lower()
+        return f'{self.prefix}/{digest[:2]}/{digest[2:4]}/{digest}{ext}'
+
+    def references(self, name):
+        """Количество записей в базе, ссылающихся на файл"""
+        total = 0
+        for reference in settings.CONTENT_STORAGE_REFERENCES:
+            model_label, field_name = reference.rsplit('.', 1)
+            model = apps.get_model(model_label)
+            total += model._default_manager.filter(
+                **{field_name: name}
+            ).count()
+        return total
+
+    def is_orphan(self, name):
+        """Файла нет в базе и он старше CONTENT_STORAGE_DELETE_GRACE"""
+        try:
+            modified = os.stat(self.path(name)).st_mtime
+        except FileNotFoundError:
+            return False
+        if modified > time.time() - settings.CONTENT_STORAGE_DELETE_GRACE:
+            return False
+        return not self.references(name)
+
+    def delete(self, name):
+        if not name:
+            return
+        with self.locked(name):
+            if self.is_orphan(name):
+                super().delete(name)
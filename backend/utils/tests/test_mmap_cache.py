@@ -0,0 +1,221 @@
+"""
+Семантика utils.mmap_cache.MmapCache как бэкенда кеша Django и
+атомарность incr() между экземплярами, потоками и процессами.
+"""
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from utils import mmap_cache
+from utils.mmap_cache import MmapCache
+
+
+INCREMENTS = 200
+
+
+class SlowReadCache(MmapCache):
+    """
+    Пауза между чтением и записью слота: без общей блокировки incr()
+    теряет изменения. Считает чтения, начатые, пока другое не
+    завершено.
+    """
+    active = 0
+    overlaps = 0
+
+    def read(self, index, way):
+        SlowReadCache.active += 1
+        if SlowReadCache.active > 1:
+            SlowReadCache.overlaps += 1
+        value = super().read(index, way)
+        time.sleep(0.0001)
+        SlowReadCache.active -= 1
+        return value
+
+
+def make_cache(path, backend=MmapCache, timeout=300, **options):
+    options = {'SLOTS': 64, 'WAYS': 4, 'SLOT_SIZE': 256, **options}
+    return backend(path, {'TIMEOUT': timeout, 'OPTIONS': options})
+
+
+def increment(path, backend, count):
+    """incr() через отдельный экземпляр, как у каждого потока caches"""
+    cache = make_cache(path, backend)
+    for _ in range(count):
+        cache.incr('counter')
+
+
+def increment_in_process(path, count):
+    increment(path, SlowReadCache, count)
+    os._exit(0)
+
+
+class MmapCacheTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'cache.bin')
+        self.cache = make_cache(self.path)
+
+    def tearDown(self):
+        with mmap_cache.mappings_lock:
+            for key in list(mmap_cache.mappings):
+                if key[0] == self.path:
+                    mmap_cache.mappings.pop(key).close()
+        shutil.rmtree(self.directory)
+
+    def test_simple(self):
+        self.cache.set('key', 'value')
+        self.assertEqual(self.cache.get('key'), 'value')
+        self.assertIsNone(self.cache.get('missing'))
+        self.assertEqual(self.cache.get('missing', 'default'), 'default')
+        self.cache.set('none', None)
+        self.assertIsNone(self.cache.get('none', 'default'))
+        self.cache.set('ключ', {'список': [1, 2]})
+        self.assertEqual(self.cache.get('ключ'), {'список': [1, 2]})
+
+    def test_shared_between_instances(self):
+        self.cache.set('key', 'value')
+        self.assertEqual(make_cache(self.path).get('key'), 'value')
+
+    def test_add(self):
+        self.assertTrue(self.cache.add('key', 'value'))
+        self.assertFalse(self.cache.add('key', 'other'))
+        self.assertEqual(self.cache.get('key'), 'value')
+
+    def test_delete_and_has_key(self):
+        self.cache.set('key', 'value')
+        self.assertTrue(self.cache.has_key('key'))
+        self.assertTrue(self.cache.delete('key'))
+        self.assertFalse(self.cache.delete('key'))
+        self.assertFalse(self.cache.has_key('key'))
+
+    def test_many(self):
+        self.assertEqual(self.cache.set_many({'a': 1, 'b': 2}), [])
+        self.assertEqual(
+            self.cache.get_many(['a', 'b', 'c']), {'a': 1, 'b': 2}
+        )
+        self.cache.delete_many(['a', 'c'])
+        self.assertEqual(self.cache.get_many(['a', 'b']), {'b': 2})
+
+    def test_versions(self):
+        self.cache.set('key', 1, version=2)
+        self.assertIsNone(self.cache.get('key'))
+        self.assertEqual(self.cache.get('key', version=2), 1)
+        self.assertEqual(self.cache.incr_version('key', version=2), 3)
+        self.assertIsNone(self.cache.get('key', version=2))
+        self.assertEqual(self.cache.get('key', version=3), 1)
+
+    def test_expiry(self):
+        now = time.time()
+        with mock.patch('time.time', return_value=now):
+            self.cache.set('key', 'value', 10)
+            self.cache.set('forever', 'value', None)
+            self.assertFalse(self.cache.add('zero', 'value', 0))
+            self.cache.set('zero', 'value', 0)
+            self.assertFalse(self.cache.has_key('zero'))
+        with mock.patch('time.time', return_value=now + 11):
+            self.assertIsNone(self.cache.get('key'))
+            self.assertTrue(self.cache.add('key', 'new', 10))
+            self.assertEqual(self.cache.get('forever'), 'value')
+
+    def test_touch(self):
+        now = time.time()
+        with mock.patch('time.time', return_value=now):
+            self.cache.set('key', 'value', 10)
+            self.assertTrue(self.cache.touch('key', 60))
+            self.assertFalse(self.cache.touch('missing'))
+        with mock.patch('time.time', return_value=now + 30):
+            self.assertEqual(self.cache.get('key'), 'value')
+            self.assertTrue(self.cache.touch('key', 0))
+            self.assertFalse(self.cache.has_key('key'))
+
+    def test_incr_decr(self):
+        self.cache.set('key', 1)
+        self.assertEqual(self.cache.incr('key'), 2)
+        self.assertEqual(self.cache.incr('key', 10), 12)
+        self.assertEqual(self.cache.decr('key', 2), 10)
+        self.assertEqual(self.cache.get('key'), 10)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_incr_keeps_expiry(self):
+        now = time.time()
+        with mock.patch('time.time', return_value=now):
+            self.cache.set('key', 1, 10)
+            self.cache.incr('key')
+        with mock.patch('time.time', return_value=now + 11):
+            self.assertIsNone(self.cache.get('key'))
+
+    def test_oversize_value(self):
+        big = 'x' * 1024
+        self.cache.set('key', 'value')
+        self.cache.set('key', big)
+        self.assertIsNone(self.cache.get('key'))
+        self.assertFalse(self.cache.add('other', big))
+        self.assertEqual(
+            self.cache.set_many({'small': 1, 'big': big}), ['big']
+        )
+        self.assertEqual(self.cache.get('small'), 1)
+
+    def test_clear(self):
+        self.cache.set_many({'a': 1, 'b': 2})
+        make_cache(self.path).clear()
+        self.assertEqual(self.cache.get_many(['a', 'b']), {})
+
+    def test_eviction_keeps_referenced(self):
+        cache = make_cache(self.path, SLOTS=4, WAYS=4)
+        for number in range(4):
+            cache.set(number, number)
+        cache.get(0)
+        cache.set(4, 4)
+        self.assertEqual(cache.get(0), 0)
+        self.assertEqual(cache.get(4), 4)
+        self.assertEqual(len(cache.get_many(range(5))), 4)
+
+    def test_geometry_change(self):
+        self.cache.set('key', 'value')
+        other = make_cache(self.path, SLOT_SIZE=512)
+        self.assertIsNone(other.get('key'))
+        other.set('key', 'other')
+        self.assertEqual(
+            make_cache(self.path, SLOT_SIZE=512).get('key'), 'other'
+        )
+
+    def test_incr_across_threads(self):
+        """Экземпляры разных потоков делят блокировки процесса"""
+        self.cache.set('counter', 0)
+        SlowReadCache.overlaps = 0
+        threads = [
+            threading.Thread(
+                target=increment,
+                args=(self.path, SlowReadCache, INCREMENTS)
+            )
+            for _ in range(4)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(SlowReadCache.overlaps, 0)
+        self.assertEqual(self.cache.get('counter'), 4 * INCREMENTS)
+
+    def test_incr_across_processes(self):
+        self.cache.set('counter', 0)
+        context = multiprocessing.get_context('fork')
+        processes = [
+            context.Process(
+                target=increment_in_process, args=(self.path, INCREMENTS)
+            )
+            for _ in range(4)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+            self.assertEqual(process.exitcode, 0)
+        self.assertEqual(self.cache.get('counter'), 4 * INCREMENTS)
@@ -0,0 +1,65 @@
+import fcntl
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import zlib
+
+from django.test import SimpleTestCase
+
+from utils.storage import LOCK_STRIPES, ContentAddressedStorage
+
+
+def try_lock(path, stripe, result):
+    """1, если байт полосы удалось заблокировать из другого процесса"""
+    fd = os.open(path, os.O_RDWR)
+    try:
+        fcntl.lockf(fd, fcntl.LOCK_EX | fcntl.LOCK_NB, 1, stripe)
+    except OSError:
+        result.value = 0
+    else:
+        result.value = 1
+    os._exit(0)
+
+
+class StorageLockTests(SimpleTestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.storage = ContentAddressedStorage(location=self.directory)
+        self.lock_path = os.path.join(
+            self.directory, ContentAddressedStorage.lock_name
+        )
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def is_locked_elsewhere(self, stripe):
+        context = multiprocessing.get_context('fork')
+        result = context.Value('i', -1)
+        process = context.Process(
+            target=try_lock, args=(self.lock_path, stripe, result)
+        )
+        process.start()
+        process.join()
+        return result.value == 0
+
+    def test_lock_survives_other_thread_release(self):
+        """Выход другого потока из своей полосы не снимает блокировку"""
+        first, second = 'cas/a.png', 'cas/b.png'
+        stripe = zlib.crc32(first.encode()) % LOCK_STRIPES
+        self.assertNotEqual(
+            stripe, zlib.crc32(second.encode()) % LOCK_STRIPES
+        )
+        with self.storage.locked(first):
+            thread = threading.Thread(
+                target=self.lock_and_release, args=(second,)
+            )
+            thread.start()
+            thread.join()
+            self.assertTrue(self.is_locked_elsewhere(stripe))
+        self.assertFalse(self.is_locked_elsewhere(stripe))
+
+    def lock_and_release(self, name):
+        with self.storage.locked(name):
+            pass